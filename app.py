@@ -3,37 +3,95 @@ import logging
 from flask import Flask, jsonify
 from flask_sqlalchemy import SQLAlchemy
 from flask_jwt_extended import JWTManager
-from flask_bcrypt import Bcrypt
 from sqlalchemy.orm import DeclarativeBase
 from werkzeug.middleware.proxy_fix import ProxyFix
 from config import Config
 
-# Configure logging
-logging.basicConfig(level=logging.DEBUG)
+# Configure logging: JSON records handed to a listener thread, levels from Config
+from logging_config import configure_logging
+configure_logging(Config)
+logger = logging.getLogger(__name__)
 
 class Base(DeclarativeBase):
     pass
 
 # Initialize extensions
-db = SQLAlchemy(model_class=Base)
+from database import RoutingSession
+db = SQLAlchemy(model_class=Base, session_options={'class_': RoutingSession})
 jwt = JWTManager()
-bcrypt = Bcrypt()
 
 def create_app():
     """Application factory pattern"""
     app = Flask(__name__)
     app.config.from_object(Config)
     
+    # Fast JSON encoding configured from JSON_SORT_KEYS / JSONIFY_PRETTYPRINT_REGULAR
+    from json_provider import FastJSONProvider
+    app.json = FastJSONProvider(app)
+    
     # Set secret key for sessions
     app.secret_key = os.environ.get("SESSION_SECRET", "dev-secret-key")
     
     # ProxyFix for proper URL generation
     app.wsgi_app = ProxyFix(app.wsgi_app, x_proto=1, x_host=1)
     
+    # Pool options and the optional read replica bind
+    from database import configure_engines, replica_router
+    configure_engines(app)
+    
     # Initialize extensions with app
     db.init_app(app)
     jwt.init_app(app)
-    bcrypt.init_app(app)
+    
+    # WAL and PRAGMAs for SQLite files, and the single-writer queue
+    from database import init_database
+    init_database(app, db)
+    
+    from write_queue import write_queue
+    write_queue.init_app(app)
+    
+    replica_router.init_app(app)
+    
+    from cache import response_cache
+    response_cache.init_app(app)
+    
+    from hashing import password_hasher
+    password_hasher.init_app(app)
+    
+    # Task change notifications for GET /api/tasks/stream
+    from pubsub import pubsub
+    pubsub.init_app(app)
+    
+    # Scheduled maintenance (overdue sweep, tombstone purge, reconcile)
+    from jobs import job_scheduler
+    job_scheduler.init_app(app)
+    
+    # Resolve tokens to cached user records
+    from auth.identity import init_identity, user_cache
+    init_identity(app, jwt)
+    
+    # SQL statement budgets and slow query log
+    from query_guard import query_guard
+    query_guard.init_app(app)
+    
+    # Per-endpoint latency/SQL/serialization metrics at /metrics
+    if app.config.get('METRICS_ENABLED', True):
+        from metrics import request_metrics, stats_collector
+        request_metrics.init_app(app)
+        request_metrics.add_collector(stats_collector(
+            'response_cache_events_total', 'Response cache hits, misses, evictions and invalidations',
+            response_cache.stats))
+        request_metrics.add_collector(stats_collector(
+            'user_cache_events_total', 'User record cache hits, misses, evictions and invalidations',
+            user_cache.stats, exclude=('hit_ratio',)))
+        from logging_config import logging_stats
+        request_metrics.add_collector(stats_collector(
+            'log_records_discarded_total', 'Log records dropped on a full queue or removed by sampling',
+            logging_stats))
+        request_metrics.add_collector(stats_collector(
+            'task_stream_events_total', 'Task streams opened, closed and rejected, and notifications delivered or dropped',
+            pubsub.stats))
+        request_metrics.add_collector(job_scheduler.durations.expose)
     
     # Register blueprints
     from auth import auth_bp
@@ -42,6 +100,10 @@ def create_app():
     app.register_blueprint(auth_bp, url_prefix='/api/auth')
     app.register_blueprint(tasks_bp, url_prefix='/api/tasks')
     
+    # Register CLI commands
+    from commands import register_commands
+    register_commands(app)
+    
     # Global error handlers
     @app.errorhandler(400)
     def bad_request(error):
@@ -63,6 +125,10 @@ def create_app():
     def validation_error(error):
         return jsonify({'error': 'Validation error', 'message': str(error)}), 422
     
+    @app.errorhandler(503)
+    def service_unavailable(error):
+        return jsonify({'error': 'Service unavailable', 'message': 'Server is busy, please retry'}), 503, {'Retry-After': '1'}
+    
     @app.errorhandler(500)
     def internal_error(error):
         db.session.rollback()
@@ -106,7 +172,15 @@ def create_app():
                     'create': 'POST /api/tasks',
                     'get': 'GET /api/tasks/<id>',
                     'update': 'PUT /api/tasks/<id>',
-                    'delete': 'DELETE /api/tasks/<id>'
+                    'delete': 'DELETE /api/tasks/<id>',
+                    'stats': 'GET /api/tasks/stats',
+                    'changes': 'GET /api/tasks/changes?since=<token>',
+                    'stream': 'GET /api/tasks/stream (Server-Sent Events)',
+                    'batch_create': 'POST /api/tasks/batch',
+                    'batch_update': 'PATCH /api/tasks/batch',
+                    'batch_delete': 'DELETE /api/tasks/batch',
+                    'export': 'GET /api/tasks/export?format=ndjson|csv',
+                    'import': 'POST /api/tasks/import?format=ndjson|csv'
                 }
             }
         })
@@ -116,7 +190,15 @@ def create_app():
         # Import models to ensure they're registered
         import models
         db.create_all()
-        logging.info("Database tables created successfully")
+        logger.info("Database tables created successfully")
+        
+        # create_all() skips columns and indexes on tables that already exist
+        from migrations import ensure_schema
+        ensure_schema()
+        
+        # Full-text index behind GET /api/tasks?q=
+        from tasks.search import ensure_search_index
+        ensure_search_index()
     
     return app
 
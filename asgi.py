@@ -0,0 +1,126 @@
+"""
+ASGI entry point: uvicorn asgi:app
+
+The Flask blueprints are synchronous, so they run on a bounded thread pool
+(ASGI_WORKER_THREADS) behind the event loop instead of one request per
+worker process. Conditional polls of the task list and stats, the bulk of
+client traffic, are answered on the event loop itself: the token is checked,
+the user's change version is read through an async SQLAlchemy session, and
+a matching If-None-Match gets its 304 without entering Flask. Anything else,
+or any failure on that path, falls through to the WSGI app.
+"""
+from datetime import datetime
+from a2wsgi import WSGIMiddleware
+from flask_jwt_extended import decode_token
+from sqlalchemy import select
+from werkzeug.datastructures import MultiDict
+from werkzeug.http import parse_etags
+from urllib.parse import parse_qsl
+from app import app as flask_app
+from models import User, TaskCounter
+from tasks.etags import list_etag, stats_etag, etag_headers
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Paths answered natively when the client's ETag is still current, keyed
+# exactly as the Flask views key them (overdue lists and stats by date too)
+CONDITIONAL_PATHS = {
+    '/api/tasks': lambda user_id, version, args: list_etag(user_id, version, args, datetime.utcnow().date()),
+    '/api/tasks/stats': lambda user_id, version, args: stats_etag(user_id, version, args, datetime.utcnow().date()),
+}
+
+def _header(scope, name):
+    for key, value in scope['headers']:
+        if key == name:
+            return value.decode('latin-1')
+    return None
+
+class ConditionalGetMiddleware:
+    """
+    Answer If-None-Match polls of the task list and stats on the event loop
+
+    Args:
+        app: ASGI application handling every other request
+        session_factory: async_sessionmaker for the application database
+    """
+
+    def __init__(self, app, session_factory):
+        self.app = app
+        self.session_factory = session_factory
+
+    async def __call__(self, scope, receive, send):
+        if (scope['type'] == 'http' and scope['method'] == 'GET'
+                and scope['path'] in CONDITIONAL_PATHS):
+            try:
+                etag = await self._current_etag(scope)
+            except Exception as e:
+                logger.debug("Conditional fast path skipped: %s", e)
+                etag = None
+
+            if etag is not None:
+                await send({
+                    'type': 'http.response.start',
+                    'status': 304,
+                    'headers': [(key.lower().encode('latin-1'), value.encode('latin-1'))
+                                for key, value in etag_headers(etag).items()]
+                })
+                await send({'type': 'http.response.body', 'body': b''})
+                return
+
+        await self.app(scope, receive, send)
+
+    async def _current_etag(self, scope):
+        """Return the ETag when it matches If-None-Match, otherwise None"""
+        if_none_match = _header(scope, b'if-none-match')
+        authorization = _header(scope, b'authorization')
+        if not if_none_match or not authorization or not authorization.startswith('Bearer '):
+            return None
+
+        with flask_app.app_context():
+            claims = decode_token(authorization[len('Bearer '):])
+        if claims.get('type') != 'access':
+            return None
+        user_id = int(claims['sub'])
+
+        # Joining users keeps tokens of deleted users on the Flask path, which rejects them
+        async with self.session_factory() as session:
+            version = await session.scalar(
+                select(TaskCounter.version)
+                .join(User, User.id == TaskCounter.user_id)
+                .where(TaskCounter.user_id == user_id)
+            )
+        if version is None:
+            return None
+
+        args = MultiDict(parse_qsl(scope['query_string'].decode('latin-1'), keep_blank_values=True))
+        etag = CONDITIONAL_PATHS[scope['path']](user_id, version, args)
+        return etag if parse_etags(if_none_match).contains_weak(etag) else None
+
+def create_asgi_app(wsgi_app=flask_app):
+    """
+    Wrap the Flask app for ASGI servers
+
+    Args:
+        wsgi_app (flask.Flask): Application to serve
+
+    Returns:
+        ASGI application
+    """
+    asgi_app = WSGIMiddleware(wsgi_app, workers=wsgi_app.config.get('ASGI_WORKER_THREADS', 32))
+
+    try:
+        from async_db import create_async_session_factory
+        session_factory = create_async_session_factory(wsgi_app)
+    except Exception as e:
+        logger.warning("Async database driver unavailable, serving every request through WSGI: %s", e)
+        return asgi_app
+
+    return ConditionalGetMiddleware(asgi_app, session_factory)
+
+app = create_asgi_app()
+
+# uvicorn imports this module in every worker process, which runs the
+# background jobs as gunicorn workers do (see gunicorn.conf.py)
+from jobs import job_scheduler
+job_scheduler.ensure_started()
@@ -0,0 +1,51 @@
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+# Async DBAPI drivers used for each database backend
+ASYNC_DRIVERS = {
+    'sqlite': 'sqlite+aiosqlite',
+    'postgresql': 'postgresql+asyncpg',
+    'postgres': 'postgresql+asyncpg',
+}
+
+def async_database_url(url):
+    """
+    Convert a sync database URL to the equivalent async driver URL
+
+    Args:
+        url (str or sqlalchemy.engine.URL): Sync database URL
+
+    Returns:
+        sqlalchemy.engine.URL: URL using aiosqlite or asyncpg
+    """
+    url = make_url(url)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for {backend} databases")
+    return url.set(drivername=ASYNC_DRIVERS[backend])
+
+def create_async_session_factory(app):
+    """
+    Build an async engine and session factory for the app's database
+
+    Uses the URL of the app's sync engine, so relative SQLite paths resolve
+    to the same file Flask-SQLAlchemy uses.
+
+    Args:
+        app (flask.Flask): Application whose database to connect to
+
+    Returns:
+        sqlalchemy.ext.asyncio.async_sessionmaker: Factory of AsyncSession objects
+    """
+    from app import db
+
+    with app.app_context():
+        url = async_database_url(db.engine.url)
+
+    options = {}
+    if url.get_backend_name() != 'sqlite':
+        pool_options = app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {})
+        options = {key: value for key, value in pool_options.items() if key.startswith('pool_')}
+
+    engine = create_async_engine(url, **options)
+    return async_sessionmaker(engine, expire_on_commit=False)
@@ -0,0 +1,90 @@
+from flask import jsonify
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+from app import db
+from cache import MemoryCacheBackend
+from models import User
+
+class UserCache:
+    """
+    TTL cache of user records (User.to_dict() output) keyed by user id
+
+    Records are dropped after any committed change to the user. The cache
+    is per process, so changes made by other workers are seen after the TTL.
+    """
+
+    def __init__(self):
+        self.ttl = 60
+        self.backend = MemoryCacheBackend()
+
+    def init_app(self, app):
+        self.ttl = app.config.get('USER_CACHE_TTL', self.ttl)
+        self.backend = MemoryCacheBackend(app.config.get('USER_CACHE_MAX_ENTRIES', 10000))
+
+    def get(self, user_id):
+        """Return the cached record of a user, loading it on a miss"""
+        record = self.backend.get(str(user_id), 'user')
+        if record is None:
+            user = db.session.execute(select(User).where(User.id == int(user_id))).scalar_one_or_none()
+            if user is None:
+                return None
+            record = user.to_dict()
+            self.backend.set(str(user_id), 'user', record, self.ttl)
+        return record
+
+    def invalidate(self, user_id):
+        """Drop a user's cached record"""
+        self.backend.invalidate(str(user_id))
+
+    def stats(self):
+        """Return hit/miss counters and the hit ratio"""
+        stats = self.backend.stats()
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_ratio'] = round(stats['hits'] / lookups, 4) if lookups else 0.0
+        return stats
+
+user_cache = UserCache()
+
+def user_claims(user):
+    """
+    Claims embedded in access tokens so clients and services can read the
+    user's identity without calling /api/auth/me
+
+    Args:
+        user (User): Authenticated user
+
+    Returns:
+        dict: Additional JWT claims
+    """
+    return {
+        'username': user.username,
+        'email': user.email
+    }
+
+def init_identity(app, jwt):
+    """Resolve every JWT to a cached user record and reject tokens of missing users"""
+    user_cache.init_app(app)
+
+    @jwt.user_lookup_loader
+    def load_user(jwt_header, jwt_payload):
+        return user_cache.get(jwt_payload['sub'])
+
+    @jwt.user_lookup_error_loader
+    def user_lookup_error(jwt_header, jwt_payload):
+        return jsonify({'error': 'User not found', 'message': 'The user for this token no longer exists'}), 401
+
+@event.listens_for(User, 'after_update')
+@event.listens_for(User, 'after_delete')
+def _record_changed_user(mapper, connection, target):
+    session = Session.object_session(target)
+    if session is not None:
+        session.info.setdefault('changed_user_records', set()).add(target.id)
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_changed_users(session):
+    for user_id in session.info.pop('changed_user_records', ()):
+        user_cache.invalidate(user_id)
+
+@event.listens_for(Session, 'after_rollback')
+def _forget_changed_users(session):
+    session.info.pop('changed_user_records', None)
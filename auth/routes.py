@@ -1,12 +1,16 @@
-from flask import request, jsonify
-from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
+from flask import request, jsonify, abort
+from flask_jwt_extended import create_access_token, jwt_required, get_current_user as get_token_user
 from marshmallow import ValidationError
 from auth import auth_bp
-from app import db, bcrypt
-from models import User
+from app import db
+from models import User, TaskCounter
 from schemas import UserRegistrationSchema, UserLoginSchema
+from hashing import HashingBusyError
+from auth.identity import user_claims
 import logging
 
+logger = logging.getLogger(__name__)
+
 # Initialize schemas
 user_registration_schema = UserRegistrationSchema()
 user_login_schema = UserLoginSchema()
@@ -37,14 +41,17 @@ def register():
         )
         user.set_password(data['password'])
         
-        # Save to database
+        # Save to database along with the user's empty task counters
         db.session.add(user)
+        db.session.flush()
+        db.session.add(TaskCounter(user_id=user.id, total=0, completed=0, completion_seconds=0.0))
         db.session.commit()
         
-        logging.info(f"New user registered: {user.username}")
+        logger.info("New user registered: %s", user.username,
+                    extra={'event': 'user_registered', 'user_id': user.id})
         
         # Create access token
-        access_token = create_access_token(identity=str(user.id))
+        access_token = create_access_token(identity=str(user.id), additional_claims=user_claims(user))
         
         return jsonify({
             'message': 'User registered successfully',
@@ -54,9 +61,12 @@ def register():
         
     except ValidationError as err:
         return jsonify({'error': 'Validation failed', 'messages': err.messages}), 400
+    except HashingBusyError:
+        db.session.rollback()
+        abort(503)
     except Exception as e:
         db.session.rollback()
-        logging.error(f"Registration error: {str(e)}")
+        logger.error("Registration error: %s", e)
         return jsonify({'error': 'Registration failed', 'message': str(e)}), 500
 
 @auth_bp.route('/login', methods=['POST'])
@@ -81,10 +91,19 @@ def login():
         if not user or not user.check_password(data['password']):
             return jsonify({'error': 'Invalid credentials'}), 401
         
+        # Upgrade hashes made with an older algorithm or cost; when the
+        # hashing pool is busy keep the old hash and retry on a later login
+        try:
+            if user.rehash_password_if_needed(data['password']):
+                db.session.commit()
+                logger.info("Password rehashed for user: %s", user.username)
+        except HashingBusyError:
+            logger.warning("Password rehash skipped, hashing pool busy: %s", user.username)
+        
         # Create access token
-        access_token = create_access_token(identity=str(user.id))
+        access_token = create_access_token(identity=str(user.id), additional_claims=user_claims(user))
         
-        logging.info(f"User logged in: {user.username}")
+        logger.info("User logged in: %s", user.username, extra={'event': 'user_login', 'user_id': user.id})
         
         return jsonify({
             'message': 'Login successful',
@@ -94,8 +113,11 @@ def login():
         
     except ValidationError as err:
         return jsonify({'error': 'Validation failed', 'messages': err.messages}), 400
+    except HashingBusyError:
+        db.session.rollback()
+        abort(503)
     except Exception as e:
-        logging.error(f"Login error: {str(e)}")
+        logger.error("Login error: %s", e)
         return jsonify({'error': 'Login failed', 'message': str(e)}), 500
 
 @auth_bp.route('/me', methods=['GET'])
@@ -103,16 +125,11 @@ def login():
 def get_current_user():
     """Get current user information"""
     try:
-        current_user_id = int(get_jwt_identity())
-        user = User.query.get(current_user_id)
-        
-        if not user:
-            return jsonify({'error': 'User not found'}), 404
-        
+        # Resolved from the user cache when the token was verified
         return jsonify({
-            'user': user.to_dict()
+            'user': get_token_user()
         }), 200
         
     except Exception as e:
-        logging.error(f"Get current user error: {str(e)}")
+        logger.error("Get current user error: %s", e)
         return jsonify({'error': 'Failed to get user information'}), 500
@@ -0,0 +1,391 @@
+"""
+API load test: seeded users and tasks, scripted scenarios, baseline comparison
+
+Seeds --users users with --tasks tasks each into a fresh SQLite file (or
+the database at --database-url), then runs each scenario for --duration
+seconds with --clients concurrent clients against the app in-process (the
+Flask test client, one per thread) and over HTTP against gunicorn started
+with gunicorn.conf.py:
+
+    login_storm     POST /api/auth/login as random users
+    deep_pages      GET /api/tasks at offset pages in the last tenth of the list
+    cursor_walk     GET /api/tasks following next_cursor, restarting after the last page
+    stats_polling   GET /api/tasks/stats, revalidating with If-None-Match
+    mixed_crud      list, read, create, update and delete tasks
+
+Reports requests/sec, p50/p95/p99 latency in ms, SQL statements per request
+(from the Server-Timing header) and status counts as JSON. --save writes
+the results to a file; --baseline compares against such a file and exits 1
+if throughput dropped, or p95 or SQL statements per request grew, by more
+than --tolerance. Timings are only comparable on the same machine; an N+1
+query shows up in the statement count anywhere.
+
+Usage:
+    python -m benchmarks.api_load [--users 50] [--tasks 200] [--targets inprocess,gunicorn]
+    python -m benchmarks.api_load --save benchmarks/baseline.json
+    python -m benchmarks.api_load --baseline benchmarks/baseline.json
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import re
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PASSWORD = 'Bench-mark-1'
+PER_PAGE = 20
+SEED_CHUNK = 5000
+QUERIES_PATTERN = re.compile(r'desc="(\d+) queries"')
+
+SCENARIOS = ('login_storm', 'deep_pages', 'cursor_walk', 'stats_polling', 'mixed_crud')
+
+def configure_environment(args):
+    # Config is read when app is imported, so everything must be set first
+    os.environ['DATABASE_URL'] = args.database_url
+    os.environ['FLASK_DEBUG'] = 'False'
+    os.environ['METRICS_ENABLED'] = 'True'
+    os.environ['SERVER_TIMING_HEADER'] = 'True'
+    os.environ.setdefault('LOG_LEVEL', 'WARNING')
+    os.environ.setdefault('JWT_SECRET_KEY', 'benchmark-secret-key-of-sufficient-length')
+
+def seed(users, tasks_per_user, reset):
+    """
+    Insert users and tasks directly and rebuild their counters
+
+    Returns:
+        list: (user_id, username, access token) per user
+    """
+    from flask_jwt_extended import create_access_token
+    from sqlalchemy import insert, select, func, text
+    from app import app, db
+    from models import User, Task
+    from tasks.search import ensure_search_index
+    from hashing import password_hasher
+    from auth.identity import user_claims
+    from tasks.counters import reconcile_counters
+
+    with app.app_context():
+        if reset:
+            db.drop_all()
+            # tasks_fts is not a model table: drop_all leaves it behind, holding
+            # the old rows, while the triggers that kept it in sync go with tasks
+            if db.engine.dialect.name == 'sqlite':
+                db.session.execute(text('DROP TABLE IF EXISTS tasks_fts'))
+                db.session.commit()
+            db.create_all()
+            ensure_search_index()
+        elif db.session.scalar(select(func.count()).select_from(User)):
+            raise SystemExit('Database already has users; pass --reset to recreate its tables')
+
+        # One hash with the configured algorithm and cost, so logins cost what they do in production
+        password_hash = password_hasher.hash(PASSWORD)
+        db.session.execute(insert(User), [
+            {'username': f'bench{i}', 'email': f'bench{i}@example.com', 'password_hash': password_hash}
+            for i in range(users)
+        ])
+        accounts = db.session.execute(select(User).order_by(User.id)).scalars().all()
+
+        today = date.today()
+        rows = []
+        for user in accounts:
+            for n in range(tasks_per_user):
+                rows.append({
+                    'user_id': user.id,
+                    'title': f'Task {n}',
+                    'description': f'Seeded task {n} of {user.username}',
+                    'due_date': today + timedelta(days=n % 60 - 30) if n % 4 else None,
+                    'completed': n % 3 == 0,
+                })
+                if len(rows) == SEED_CHUNK:
+                    db.session.execute(insert(Task), rows)
+                    rows = []
+        if rows:
+            db.session.execute(insert(Task), rows)
+        reconcile_counters(fix=True)
+        db.session.commit()
+
+        return [
+            (user.id, user.username, create_access_token(identity=str(user.id), additional_claims=user_claims(user)))
+            for user in accounts
+        ]
+
+class InProcessClient:
+    """Flask test client with the same interface as HTTPClient"""
+
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def request(self, method, path, body=None, headers=None):
+        response = self.client.open(path, method=method, json=body, headers=headers)
+        return response.status_code, response.headers, response.get_data()
+
+    def close(self):
+        pass
+
+class HTTPClient:
+    """Keep-alive HTTP client, reconnecting after errors"""
+
+    def __init__(self, port):
+        self.port = port
+        self.conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+
+    def request(self, method, path, body=None, headers=None):
+        headers = dict(headers or {})
+        if body is not None:
+            body = json.dumps(body)
+            headers['Content-Type'] = 'application/json'
+        try:
+            self.conn.request(method, path, body=body, headers=headers)
+            response = self.conn.getresponse()
+            return response.status, response.headers, response.read()
+        except (OSError, http.client.HTTPException):
+            self.conn.close()
+            self.conn = http.client.HTTPConnection('127.0.0.1', self.port, timeout=30)
+            return 'error', None, b''
+
+    def close(self):
+        self.conn.close()
+
+class Recorder:
+    """Latency, statement count and status of each request of one client"""
+
+    def __init__(self, client):
+        self.client = client
+        self.latencies = []
+        self.queries = []
+        self.statuses = {}
+
+    def request(self, method, path, body=None, headers=None):
+        started = time.perf_counter()
+        status, response_headers, data = self.client.request(method, path, body, headers)
+        self.latencies.append(time.perf_counter() - started)
+        self.statuses[str(status)] = self.statuses.get(str(status), 0) + 1
+        timing = response_headers.get('Server-Timing') if response_headers is not None else None
+        match = QUERIES_PATTERN.search(timing or '')
+        if match:
+            self.queries.append(int(match.group(1)))
+        return status, response_headers, data
+
+def login_storm(recorder, account, accounts, args, stop):
+    while not stop.is_set():
+        _, username, _ = random.choice(accounts)
+        recorder.request('POST', '/api/auth/login', {'username_or_email': username, 'password': PASSWORD})
+
+def deep_pages(recorder, account, accounts, args, stop):
+    headers = {'Authorization': f'Bearer {account[2]}'}
+    last_page = max(1, -(-args.tasks // PER_PAGE))
+    first_deep_page = max(1, last_page - last_page // 10)
+    while not stop.is_set():
+        page = random.randint(first_deep_page, last_page)
+        recorder.request('GET', f'/api/tasks?page={page}&per_page={PER_PAGE}', headers=headers)
+
+def cursor_walk(recorder, account, accounts, args, stop):
+    headers = {'Authorization': f'Bearer {account[2]}'}
+    cursor = ''
+    while not stop.is_set():
+        status, _, data = recorder.request('GET', f'/api/tasks?cursor={cursor}&per_page={PER_PAGE}', headers=headers)
+        next_cursor = json.loads(data)['pagination']['next_cursor'] if status == 200 else None
+        cursor = next_cursor or ''
+
+def stats_polling(recorder, account, accounts, args, stop):
+    headers = {'Authorization': f'Bearer {account[2]}'}
+    etag = None
+    while not stop.is_set():
+        request_headers = dict(headers)
+        if etag:
+            request_headers['If-None-Match'] = etag
+        _, response_headers, _ = recorder.request('GET', '/api/tasks/stats', headers=request_headers)
+        if response_headers is not None:
+            etag = response_headers.get('ETag') or etag
+
+def mixed_crud(recorder, account, accounts, args, stop):
+    headers = {'Authorization': f'Bearer {account[2]}'}
+    created = []
+    n = 0
+    while not stop.is_set():
+        roll = random.random()
+        if roll < 0.4:
+            recorder.request('GET', f'/api/tasks?per_page={PER_PAGE}', headers=headers)
+        elif roll < 0.6 and created:
+            recorder.request('GET', f'/api/tasks/{random.choice(created)}', headers=headers)
+        elif roll < 0.8 or not created:
+            status, _, data = recorder.request('POST', '/api/tasks', {'title': f'Load task {n}'}, headers=headers)
+            if status == 201:
+                created.append(json.loads(data)['task']['id'])
+            n += 1
+        elif roll < 0.9:
+            recorder.request('PUT', f'/api/tasks/{random.choice(created)}', {'completed': True}, headers=headers)
+        else:
+            recorder.request('DELETE', f'/api/tasks/{created.pop()}', headers=headers)
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+def run_scenario(scenario, make_client, accounts, args):
+    stop = threading.Event()
+    recorders = [Recorder(make_client()) for _ in range(args.clients)]
+    threads = [
+        threading.Thread(target=globals()[scenario], args=(recorder, accounts[i % len(accounts)], accounts, args, stop))
+        for i, recorder in enumerate(recorders)
+    ]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    time.sleep(args.duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    for recorder in recorders:
+        recorder.client.close()
+
+    latencies = [latency for recorder in recorders for latency in recorder.latencies]
+    queries = [count for recorder in recorders for count in recorder.queries]
+    statuses = {}
+    for recorder in recorders:
+        for status, count in recorder.statuses.items():
+            statuses[status] = statuses.get(status, 0) + count
+    if not latencies:
+        return {'requests': 0, 'statuses': statuses}
+    return {
+        'requests': len(latencies),
+        'requests_per_sec': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 2),
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 2),
+        'queries_per_request': round(sum(queries) / len(queries), 2) if queries else None,
+        'statuses': statuses,
+    }
+
+def wait_for_server(port, process, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError('gunicorn exited during startup')
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=2)
+            conn.request('GET', '/')
+            conn.getresponse().read()
+            conn.close()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError('gunicorn did not start in time')
+
+def run_target(target, accounts, args):
+    results = {}
+    if target == 'inprocess':
+        from app import app
+        for scenario in args.scenarios:
+            results[scenario] = run_scenario(scenario, lambda: InProcessClient(app), accounts, args)
+        return results
+
+    env = dict(os.environ, GUNICORN_BIND=f'127.0.0.1:{args.port}', WEB_CONCURRENCY=str(args.workers))
+    process = subprocess.Popen([sys.executable, '-m', 'gunicorn', '--config', 'gunicorn.conf.py', 'app:app'],
+                               cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_for_server(args.port, process)
+        for scenario in args.scenarios:
+            results[scenario] = run_scenario(scenario, lambda: HTTPClient(args.port), accounts, args)
+    finally:
+        process.terminate()
+        process.wait()
+    return results
+
+def compare(results, baseline, tolerance):
+    """
+    List metrics that regressed against the baseline beyond the tolerance
+
+    Returns:
+        list: One dict per regression with target, scenario, metric, baseline and current values
+    """
+    regressions = []
+    for target, scenarios in results['targets'].items():
+        for scenario, current in scenarios.items():
+            previous = baseline.get('targets', {}).get(target, {}).get(scenario)
+            if not previous or not current.get('requests') or not previous.get('requests'):
+                continue
+            checks = (
+                ('requests_per_sec', lambda new, old: new < old * (1 - tolerance)),
+                ('p95_ms', lambda new, old: new > old * (1 + tolerance)),
+                ('queries_per_request', lambda new, old: new > old * (1 + tolerance)),
+            )
+            for metric, regressed in checks:
+                if current.get(metric) is None or previous.get(metric) is None:
+                    continue
+                if regressed(current[metric], previous[metric]):
+                    regressions.append({'target': target, 'scenario': scenario, 'metric': metric,
+                                        'baseline': previous[metric], 'current': current[metric]})
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--tasks', type=int, default=200, help='tasks per user')
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=10, help='seconds per scenario')
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS))
+    parser.add_argument('--targets', default='inprocess,gunicorn')
+    parser.add_argument('--workers', type=int, default=4, help='gunicorn workers')
+    parser.add_argument('--port', type=int, default=8766)
+    parser.add_argument('--database-url', help='defaults to a fresh SQLite file')
+    parser.add_argument('--reset', action='store_true', help='drop and recreate the tables of --database-url')
+    parser.add_argument('--seed', type=int, default=1, help='random seed of the scenarios')
+    parser.add_argument('--save', help='write the results to this file')
+    parser.add_argument('--baseline', help='compare against results saved with --save')
+    parser.add_argument('--tolerance', type=float, default=0.10,
+                        help='allowed relative throughput drop and p95/statement growth against the baseline')
+    args = parser.parse_args()
+    args.scenarios = args.scenarios.split(',')
+    for scenario in args.scenarios:
+        if scenario not in SCENARIOS:
+            parser.error(f'unknown scenario: {scenario}')
+
+    database = None
+    if not args.database_url:
+        database = tempfile.NamedTemporaryFile(suffix='.db', delete=False)
+        database.close()
+        args.database_url = f'sqlite:///{database.name}'
+    configure_environment(args)
+    random.seed(args.seed)
+
+    try:
+        accounts = seed(args.users, args.tasks, args.reset)
+        results = {
+            'users': args.users,
+            'tasks_per_user': args.tasks,
+            'clients': args.clients,
+            'duration_s': args.duration,
+            'database': args.database_url.split(':', 1)[0],
+            'targets': {target: run_target(target, accounts, args) for target in args.targets.split(',')},
+        }
+    finally:
+        if database is not None:
+            for suffix in ('', '-wal', '-shm'):
+                if os.path.exists(database.name + suffix):
+                    os.remove(database.name + suffix)
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        results['regressions'] = regressions
+    print(json.dumps(results, indent=2))
+    if regressions:
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
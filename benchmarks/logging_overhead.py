@@ -0,0 +1,95 @@
+"""
+Time spent in logging calls by request threads
+
+Several threads log a write-path style INFO record (with structured extra
+fields) in a loop, first through a plain StreamHandler formatting and
+writing in the calling thread, as logging.basicConfig() does, then through
+the queue handler from logging_config. Output goes to a file opened with
+line buffering so every record costs a write, like stderr under a process
+manager. Reports calls/sec and p50/p99 latency of the logging call itself.
+
+Usage:
+    python -m benchmarks.logging_overhead [--threads 16] [--records 20000]
+"""
+import argparse
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from types import SimpleNamespace
+
+from logging_config import JSONFormatter, NonBlockingQueueHandler
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+def make_handler(mode, stream, queue_size):
+    stream_handler = logging.StreamHandler(stream)
+    stream_handler.setFormatter(JSONFormatter())
+    if mode == 'sync':
+        return stream_handler
+    return NonBlockingQueueHandler([stream_handler], queue_size)
+
+def run_mode(mode, args):
+    output = tempfile.NamedTemporaryFile('w', suffix='.log', buffering=1, delete=False)
+    handler = make_handler(mode, output, args.queue_size)
+    logger = logging.getLogger(f'benchmark.{mode}')
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    logger.addHandler(handler)
+
+    latencies = []
+    lock = threading.Lock()
+    task = SimpleNamespace(id=42, title='Write the quarterly report')
+
+    def log_loop(user_id):
+        local = []
+        for _ in range(args.records // args.threads):
+            started = time.perf_counter()
+            logger.info("New task created: %s by user %s", task.title, user_id,
+                        extra={'event': 'task_created', 'user_id': user_id, 'task_id': task.id})
+            local.append(time.perf_counter() - started)
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=log_loop, args=(n,)) for n in range(args.threads)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    if mode == 'queue':
+        handler.stop()
+        dropped = handler.dropped
+    else:
+        dropped = 0
+    logger.removeHandler(handler)
+    output.close()
+    os.remove(output.name)
+
+    return {
+        'calls_per_sec': round(len(latencies) / elapsed, 1),
+        'p50_us': round(percentile(latencies, 0.50) * 1e6, 2),
+        'p99_us': round(percentile(latencies, 0.99) * 1e6, 2),
+        'dropped': dropped,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--records', type=int, default=20000)
+    parser.add_argument('--queue-size', type=int, default=10000)
+    args = parser.parse_args()
+
+    results = {'threads': args.threads, 'records': args.records}
+    for mode in ('sync', 'queue'):
+        results[mode] = run_mode(mode, args)
+    print(json.dumps(results, indent=2))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,140 @@
+"""
+Full-text search vs LIKE '%q%' scan
+
+Seeds --tasks tasks spread over --users users into a fresh SQLite file
+(or --database-url), with titles and descriptions drawn from a fixed
+vocabulary, then runs the first page of GET /api/tasks?q= for one user
+with the full-text backend and with the LIKE fallback. Reports p50/p99 in
+ms per query and the seeding rate (tasks/sec, with the index triggers in
+place).
+
+Usage:
+    python -m benchmarks.search [--tasks 1000000] [--users 10] [--repeat 20]
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+
+SEED_CHUNK = 10000
+PER_PAGE = 20
+
+VOCABULARY = (
+    'report budget meeting review plan draft invoice client deploy release fix bug test design '
+    'call email schedule update groceries dentist renew insurance taxes backup server database '
+    'migrate refactor interview hire onboard train document publish blog newsletter order ship '
+    'return refund contract sign approve quarterly annual weekly daily sprint roadmap launch '
+    'campaign budgetary analytics dashboard metrics alert incident postmortem security audit '
+    'license vendor payment payroll expense travel flight hotel booking conference workshop'
+).split()
+
+# Label, ?q= value
+QUERIES = (
+    ('common_word', 'report'),
+    ('two_words', 'quarterly budget'),
+    ('prefix', 'inc'),
+    ('rare_word', 'zeppelin'),
+)
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+def seed(app, db, tasks, users):
+    from sqlalchemy import insert
+    from models import User, Task
+
+    rng = random.Random(1)
+    with app.app_context():
+        db.session.execute(insert(User), [
+            {'username': f'search{i}', 'email': f'search{i}@example.com', 'password_hash': 'unused'}
+            for i in range(users)
+        ])
+        db.session.commit()
+
+        started = time.perf_counter()
+        for offset in range(0, tasks, SEED_CHUNK):
+            rows = [
+                {
+                    'user_id': n % users + 1,
+                    'title': ' '.join(rng.sample(VOCABULARY, 3)),
+                    'description': ' '.join(rng.choices(VOCABULARY, k=12)),
+                    'completed': n % 3 == 0,
+                }
+                for n in range(offset, min(offset + SEED_CHUNK, tasks))
+            ]
+            # One task per chunk mentions the rare word
+            rows[0]['description'] += ' zeppelin'
+            db.session.execute(insert(Task), rows)
+            db.session.commit()
+        return tasks / (time.perf_counter() - started)
+
+def run_query(db, backend, user_id, q, repeat):
+    from models import Task
+    from tasks.search import search_terms, apply_search
+
+    latencies = []
+    for _ in range(repeat):
+        query, score = apply_search(Task.query.filter_by(user_id=user_id), backend, user_id, search_terms(q))
+        started = time.perf_counter()
+        rows = (query.with_entities(*Task.columns(), score.label('score'))
+                .order_by(score, Task.id).limit(PER_PAGE + 1).all())
+        latencies.append(time.perf_counter() - started)
+        db.session.rollback()
+    return {
+        'rows': len(rows),
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 2),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--tasks', type=int, default=1000000)
+    parser.add_argument('--users', type=int, default=10)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--database-url', help='empty database to use; defaults to a fresh SQLite file')
+    args = parser.parse_args()
+
+    database = None
+    if not args.database_url:
+        database = tempfile.NamedTemporaryFile(suffix='.db', delete=False)
+        database.close()
+        args.database_url = f'sqlite:///{database.name}'
+    # Config is read when app is imported
+    os.environ['DATABASE_URL'] = args.database_url
+    os.environ['FLASK_DEBUG'] = 'False'
+    os.environ.setdefault('LOG_LEVEL', 'WARNING')
+
+    try:
+        from app import app, db
+        from tasks.search import search_backend
+
+        seed_rate = seed(app, db, args.tasks, args.users)
+        with app.app_context():
+            backend = search_backend()
+            results = {
+                'tasks': args.tasks,
+                'users': args.users,
+                'tasks_per_user': args.tasks // args.users,
+                'backend': backend,
+                'seed_tasks_per_sec': round(seed_rate, 1),
+                'queries': {},
+            }
+            for label, q in QUERIES:
+                results['queries'][label] = {
+                    'q': q,
+                    backend: run_query(db, backend, 1, q, args.repeat),
+                    'like': run_query(db, 'like', 1, q, args.repeat),
+                }
+    finally:
+        if database is not None:
+            for suffix in ('', '-wal', '-shm'):
+                if os.path.exists(database.name + suffix):
+                    os.remove(database.name + suffix)
+
+    print(json.dumps(results, indent=2))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""
+Serialization benchmark for one 100-task page
+
+Compares the original list path (hydrated Task objects, to_dict() and
+indented, key-sorted stdlib JSON) with the current one (column rows,
+Task.row_to_dict() and FastJSONProvider). Reports response bytes and
+microseconds per page, including the page query.
+
+Usage:
+    python -m benchmarks.serialization [--iterations 2000] [--page-size 100]
+"""
+import argparse
+import json
+import os
+import time
+from datetime import date
+
+# In-memory database unless one is given explicitly
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+
+from app import app, db
+from models import User, Task, TaskCounter
+
+def seed(page_size):
+    user = User(username='bench', email='bench@example.com')
+    user.set_password('bench123')
+    db.session.add(user)
+    db.session.flush()
+    db.session.add(TaskCounter(user_id=user.id, total=page_size, completed=0, completion_seconds=0.0))
+    db.session.execute(db.insert(Task), [
+        {
+            'title': f'Benchmark task {i}',
+            'description': 'Lorem ipsum dolor sit amet, consectetur adipiscing elit.',
+            'due_date': None if i % 3 else date.today(),
+            'completed': i % 2 == 0,
+            'user_id': user.id
+        }
+        for i in range(page_size)
+    ])
+    db.session.commit()
+    return user.id
+
+def page_query(user_id, page_size):
+    return Task.query.filter_by(user_id=user_id).order_by(Task.created_at.desc()).limit(page_size)
+
+def before(user_id, page_size):
+    tasks = page_query(user_id, page_size).all()
+    body = json.dumps({'tasks': [task.to_dict() for task in tasks]}, indent=2, sort_keys=True) + '\n'
+    # Drop hydrated instances so every iteration pays for hydration
+    db.session.expunge_all()
+    return body.encode('utf-8')
+
+def after(user_id, page_size):
+    rows = page_query(user_id, page_size).with_entities(*Task.columns()).all()
+    return app.json.response({'tasks': [Task.row_to_dict(row) for row in rows]}).get_data()
+
+def measure(fn, user_id, page_size, iterations):
+    body = fn(user_id, page_size)
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn(user_id, page_size)
+    elapsed = time.perf_counter() - start
+    return {'bytes': len(body), 'us_per_page': round(elapsed / iterations * 1e6, 1)}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=2000)
+    parser.add_argument('--page-size', type=int, default=100)
+    args = parser.parse_args()
+
+    with app.app_context():
+        user_id = seed(args.page_size)
+        results = {
+            'page_size': args.page_size,
+            'iterations': args.iterations,
+            'before': measure(before, user_id, args.page_size, args.iterations),
+            'after': measure(after, user_id, args.page_size, args.iterations),
+        }
+
+    results['speedup'] = round(results['before']['us_per_page'] / results['after']['us_per_page'], 2)
+    results['bytes_saved'] = results['before']['bytes'] - results['after']['bytes']
+    print(json.dumps(results, indent=2))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,181 @@
+"""
+Load test of the WSGI (gunicorn app:app) and ASGI (uvicorn asgi:app) modes
+
+Starts each server on a fresh SQLite database, seeds users and tasks over
+HTTP, then drives concurrent keep-alive clients through a mix of
+conditional (If-None-Match) and plain reads of the task list and stats.
+Reports requests/sec, p50/p99 latency and status counts per mode.
+
+Usage:
+    python -m benchmarks.server_modes [--clients 200] [--duration 20] [--workers 4]
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODES = {
+    'wsgi': lambda port, workers: [
+        sys.executable, '-m', 'gunicorn', '--workers', str(workers),
+        '--bind', f'127.0.0.1:{port}', 'app:app'
+    ],
+    'asgi': lambda port, workers: [
+        sys.executable, '-m', 'uvicorn', '--workers', str(workers),
+        '--port', str(port), '--log-level', 'warning', 'asgi:app'
+    ],
+}
+
+READ_PATHS = ['/api/tasks?per_page=20', '/api/tasks/stats', '/api/tasks?cursor=&per_page=20']
+
+def request(conn, method, path, body=None, headers=None):
+    headers = dict(headers or {})
+    if body is not None:
+        body = json.dumps(body)
+        headers['Content-Type'] = 'application/json'
+    conn.request(method, path, body=body, headers=headers)
+    response = conn.getresponse()
+    return response.status, response.getheader('ETag'), response.read()
+
+def wait_for_server(port, process, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError('Server exited during startup')
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=2)
+            request(conn, 'GET', '/')
+            conn.close()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError('Server did not start in time')
+
+def seed(port, users, tasks_per_user):
+    """Register users, create their tasks and return one token per user"""
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    tokens = []
+    for i in range(users):
+        credentials = {'username': f'load{i}', 'email': f'load{i}@example.com', 'password': 'Load-test-1'}
+        request(conn, 'POST', '/api/auth/register', credentials)
+        status, _, body = request(conn, 'POST', '/api/auth/login', {
+            'username_or_email': credentials['username'],
+            'password': credentials['password']
+        })
+        token = json.loads(body)['access_token']
+        tasks = [{'title': f'Task {n}', 'completed': n % 3 == 0} for n in range(tasks_per_user)]
+        request(conn, 'POST', '/api/tasks/batch', {'tasks': tasks}, {'Authorization': f'Bearer {token}'})
+        tokens.append(token)
+    conn.close()
+    return tokens
+
+def client(port, token, conditional_ratio, stop, latencies, statuses, lock):
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    auth = {'Authorization': f'Bearer {token}'}
+    etags = {}
+    local_latencies = []
+    local_statuses = {}
+    while not stop.is_set():
+        path = random.choice(READ_PATHS)
+        headers = dict(auth)
+        if path in etags and random.random() < conditional_ratio:
+            headers['If-None-Match'] = etags[path]
+        start = time.perf_counter()
+        try:
+            status, etag, _ = request(conn, 'GET', path, headers=headers)
+        except (OSError, http.client.HTTPException):
+            conn.close()
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+            status, etag = 'error', None
+        local_latencies.append(time.perf_counter() - start)
+        local_statuses[status] = local_statuses.get(status, 0) + 1
+        if etag:
+            etags[path] = etag
+    conn.close()
+    with lock:
+        latencies.extend(local_latencies)
+        for status, count in local_statuses.items():
+            statuses[str(status)] = statuses.get(str(status), 0) + count
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+def run_mode(mode, args, port):
+    database = tempfile.NamedTemporaryFile(suffix='.db', delete=False)
+    database.close()
+    env = dict(os.environ, DATABASE_URL=f'sqlite:///{database.name}', FLASK_DEBUG='False',
+               PASSWORD_HASH_COST=str(args.hash_cost))
+
+    # Create the schema once so workers do not race on create_all()
+    subprocess.run([sys.executable, '-c', 'import app'], cwd=ROOT, env=env, check=True,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    process = subprocess.Popen(MODES[mode](port, args.workers), cwd=ROOT, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_for_server(port, process)
+        tokens = seed(port, args.users, args.tasks)
+
+        stop = threading.Event()
+        lock = threading.Lock()
+        latencies, statuses = [], {}
+        threads = [
+            threading.Thread(target=client, args=(port, tokens[i % len(tokens)], args.conditional_ratio,
+                                                  stop, latencies, statuses, lock))
+            for i in range(args.clients)
+        ]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        time.sleep(args.duration)
+        stop.set()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+    finally:
+        process.terminate()
+        process.wait()
+        os.remove(database.name)
+
+    return {
+        'requests': len(latencies),
+        'requests_per_sec': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 2),
+        'statuses': statuses,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--clients', type=int, default=200)
+    parser.add_argument('--duration', type=float, default=20)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--users', type=int, default=20)
+    parser.add_argument('--tasks', type=int, default=200, help='tasks per user')
+    parser.add_argument('--conditional-ratio', type=float, default=0.8,
+                        help='share of repeat reads sent with If-None-Match')
+    parser.add_argument('--hash-cost', type=int, default=16384, help='scrypt N used while seeding')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--modes', default='wsgi,asgi')
+    args = parser.parse_args()
+
+    results = {
+        'clients': args.clients,
+        'duration_s': args.duration,
+        'workers': args.workers,
+        'conditional_ratio': args.conditional_ratio,
+    }
+    for mode in args.modes.split(','):
+        results[mode] = run_mode(mode, args, args.port)
+    print(json.dumps(results, indent=2))
+
+if __name__ == '__main__':
+    main()
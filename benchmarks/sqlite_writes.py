@@ -0,0 +1,133 @@
+"""
+Multi-process SQLite write benchmark
+
+Runs POST /api/tasks from several processes (each with several threads,
+like gunicorn gthread workers) against one SQLite file, under three
+profiles: the driver defaults, the tuned PRAGMAs alone, and the tuned
+PRAGMAs with the write queue. Reports writes/sec, p50/p99 latency and
+failed writes (e.g. "database is locked") per profile.
+
+Usage:
+    python -m benchmarks.sqlite_writes [--processes 4] [--threads 8] [--duration 10]
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+
+PROFILES = {
+    'default': {'SQLITE_TUNING': 'False', 'SQLITE_WRITE_QUEUE': 'False'},
+    'tuned': {'SQLITE_TUNING': 'True', 'SQLITE_WRITE_QUEUE': 'False'},
+    'tuned_queue': {'SQLITE_TUNING': 'True', 'SQLITE_WRITE_QUEUE': 'True'},
+}
+
+def _load_app(env):
+    # Config is read at import time, so the environment must be set first
+    os.environ.update(env)
+    from app import app
+    logging.disable(logging.INFO)
+    return app
+
+def seed(env):
+    app = _load_app(env)
+    from app import db
+    from models import User, TaskCounter
+    from flask_jwt_extended import create_access_token
+
+    with app.app_context():
+        user = User(username='writer', email='writer@example.com')
+        user.password_hash = 'unused'
+        db.session.add(user)
+        db.session.flush()
+        db.session.add(TaskCounter(user_id=user.id, total=0, completed=0, completion_seconds=0.0))
+        db.session.commit()
+        return create_access_token(identity=str(user.id))
+
+def writer_process(env, token, threads, duration, results):
+    app = _load_app(env)
+    headers = {'Authorization': f'Bearer {token}'}
+    latencies, failures = [], []
+    lock = threading.Lock()
+    start_at = time.monotonic()
+    deadline = start_at + duration
+
+    def write_loop(n):
+        client = app.test_client()
+        local_latencies, local_failures, i = [], 0, 0
+        while time.monotonic() < deadline:
+            started = time.perf_counter()
+            response = client.post('/api/tasks', json={'title': f'Task {n}-{i}', 'completed': i % 3 == 0},
+                                   headers=headers)
+            local_latencies.append(time.perf_counter() - started)
+            if response.status_code != 201:
+                local_failures += 1
+            i += 1
+        with lock:
+            latencies.extend(local_latencies)
+            failures.append(local_failures)
+
+    workers = [threading.Thread(target=write_loop, args=(n,)) for n in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    results.put({'latencies': latencies, 'failures': sum(failures), 'elapsed': time.monotonic() - start_at})
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+def run_profile(profile, args):
+    database = tempfile.NamedTemporaryFile(suffix='.db', delete=False)
+    database.close()
+    env = dict(PROFILES[profile], DATABASE_URL=f'sqlite:///{database.name}')
+
+    context = multiprocessing.get_context('spawn')
+    with context.Pool(1) as pool:
+        token = pool.apply(seed, (env,))
+
+    results = context.Queue()
+    processes = [
+        context.Process(target=writer_process, args=(env, token, args.threads, args.duration, results))
+        for _ in range(args.processes)
+    ]
+    for process in processes:
+        process.start()
+    outcomes = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(database.name + suffix):
+            os.remove(database.name + suffix)
+
+    latencies = [latency for outcome in outcomes for latency in outcome['latencies']]
+    failures = sum(outcome['failures'] for outcome in outcomes)
+    elapsed = max(outcome['elapsed'] for outcome in outcomes)
+    return {
+        'writes': len(latencies) - failures,
+        'failed': failures,
+        'writes_per_sec': round((len(latencies) - failures) / elapsed, 1),
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 2),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--processes', type=int, default=4)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--profiles', default=','.join(PROFILES))
+    args = parser.parse_args()
+
+    results = {'processes': args.processes, 'threads': args.threads, 'duration_s': args.duration}
+    for profile in args.profiles.split(','):
+        results[profile] = run_profile(profile, args)
+    print(json.dumps(results, indent=2))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+"""
+Startup benchmark for gunicorn workers, with and without preload_app
+
+Starts gunicorn with gunicorn.conf.py on a fresh SQLite database and
+records, relative to process start, when each worker reports ready and
+when the first request is answered. Each configuration is started
+--runs times and the medians are reported in milliseconds.
+
+Usage:
+    python -m benchmarks.startup [--workers 4] [--runs 3]
+"""
+import argparse
+import http.client
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+READY_PATTERN = re.compile(r'Worker ready \(pid: (\d+)\)')
+
+def first_response(port, deadline):
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=2)
+            conn.request('GET', '/')
+            conn.getresponse().read()
+            conn.close()
+            return time.monotonic()
+        except OSError:
+            time.sleep(0.005)
+    raise RuntimeError('Server did not answer in time')
+
+def start_once(preload, workers, port, timeout=60):
+    database = tempfile.NamedTemporaryFile(suffix='.db', delete=False)
+    database.close()
+    env = dict(os.environ,
+               DATABASE_URL=f'sqlite:///{database.name}',
+               GUNICORN_BIND=f'127.0.0.1:{port}',
+               GUNICORN_PRELOAD=str(preload),
+               WEB_CONCURRENCY=str(workers),
+               FLASK_DEBUG='False')
+
+    ready_at = {}
+    all_ready = threading.Event()
+
+    def read_log(stream):
+        for line in stream:
+            match = READY_PATTERN.search(line)
+            if match:
+                ready_at[match.group(1)] = time.monotonic()
+                if len(ready_at) == workers:
+                    all_ready.set()
+
+    started = time.monotonic()
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '--config', 'gunicorn.conf.py', '--log-level', 'info', 'app:app'],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True
+    )
+    reader = threading.Thread(target=read_log, args=(process.stderr,), daemon=True)
+    reader.start()
+    try:
+        first = first_response(port, started + timeout)
+        if not all_ready.wait(timeout):
+            raise RuntimeError('Not every worker reported ready')
+    finally:
+        process.terminate()
+        process.wait()
+        os.remove(database.name)
+
+    ready = sorted(at - started for at in ready_at.values())
+    return {
+        'first_request_ms': (first - started) * 1000,
+        'first_worker_ready_ms': ready[0] * 1000,
+        'all_workers_ready_ms': ready[-1] * 1000,
+        'mean_worker_ready_ms': statistics.mean(ready) * 1000,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--port', type=int, default=8766)
+    args = parser.parse_args()
+
+    results = {'workers': args.workers, 'runs': args.runs}
+    for preload in (False, True):
+        runs = [start_once(preload, args.workers, args.port) for _ in range(args.runs)]
+        results['preload' if preload else 'no_preload'] = {
+            key: round(statistics.median(run[key] for run in runs), 1) for key in runs[0]
+        }
+    print(json.dumps(results, indent=2))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,362 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from functools import wraps
+from flask import request, make_response, current_app
+from flask_jwt_extended import get_jwt_identity
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+import logging
+
+logger = logging.getLogger(__name__)
+
+class CacheBackend:
+    """
+    Interface for response cache storage
+
+    Entries are grouped in namespaces (one per user) so that all of a user's
+    entries can be dropped at once when their tasks change. Values are dicts
+    of JSON-serializable data.
+    """
+
+    def get(self, namespace, key):
+        """Return the stored value or None if missing or expired"""
+        raise NotImplementedError
+
+    def generation(self, namespace):
+        """Return a token that changes whenever the namespace is invalidated"""
+        raise NotImplementedError
+
+    def set(self, namespace, key, value, ttl, generation=None):
+        """
+        Store a value for ttl seconds
+
+        With a generation from generation(), the value is only kept if the
+        namespace was not invalidated since, so a response computed from
+        data read before a write cannot outlive that write's invalidation.
+        """
+        raise NotImplementedError
+
+    def invalidate(self, namespace):
+        """Drop every entry in a namespace"""
+        raise NotImplementedError
+
+    def stats(self):
+        """Return hit/miss/eviction counters"""
+        raise NotImplementedError
+
+class _CounterMixin:
+    """Thread-safe hit/miss/eviction/invalidation counters"""
+
+    def _init_counters(self):
+        self._counter_lock = threading.Lock()
+        self._counters = {'hits': 0, 'misses': 0, 'evictions': 0, 'invalidations': 0}
+
+    def _count(self, name, amount=1):
+        with self._counter_lock:
+            self._counters[name] += amount
+
+    def stats(self):
+        with self._counter_lock:
+            return dict(self._counters)
+
+class NullCacheBackend(_CounterMixin, CacheBackend):
+    """Backend that stores nothing, used when caching is disabled; its counters stay at zero"""
+
+    def __init__(self):
+        self._init_counters()
+
+    def get(self, namespace, key):
+        return None
+
+    def generation(self, namespace):
+        return None
+
+    def set(self, namespace, key, value, ttl, generation=None):
+        pass
+
+    def invalidate(self, namespace):
+        pass
+
+class MemoryCacheBackend(_CounterMixin, CacheBackend):
+    """
+    Bounded in-process LRU cache with per-entry TTL
+
+    Entries live in one worker process only, so invalidations in one gunicorn
+    worker are not seen by the others; entries there expire after their TTL.
+    """
+
+    def __init__(self, max_entries=10000):
+        self._init_counters()
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._namespaces = {}
+        # Invalidation count per namespace (one integer per user who wrote)
+        self._generations = {}
+
+    def _remove(self, entry_key):
+        self._entries.pop(entry_key, None)
+        keys = self._namespaces.get(entry_key[0])
+        if keys is not None:
+            keys.discard(entry_key[1])
+            if not keys:
+                del self._namespaces[entry_key[0]]
+
+    def get(self, namespace, key):
+        entry_key = (namespace, key)
+        with self._lock:
+            entry = self._entries.get(entry_key)
+            if entry is not None and entry[0] < time.monotonic():
+                self._remove(entry_key)
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(entry_key)
+        self._count('hits' if entry is not None else 'misses')
+        return entry[1] if entry is not None else None
+
+    def generation(self, namespace):
+        with self._lock:
+            return self._generations.get(namespace, 0)
+
+    def set(self, namespace, key, value, ttl, generation=None):
+        entry_key = (namespace, key)
+        evicted = 0
+        with self._lock:
+            if generation is not None and self._generations.get(namespace, 0) != generation:
+                return
+            self._entries[entry_key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(entry_key)
+            self._namespaces.setdefault(namespace, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                evicted += 1
+        if evicted:
+            self._count('evictions', evicted)
+
+    def invalidate(self, namespace):
+        with self._lock:
+            self._generations[namespace] = self._generations.get(namespace, 0) + 1
+            for key in list(self._namespaces.get(namespace, ())):
+                self._remove((namespace, key))
+        self._count('invalidations')
+
+class FileCacheBackend(_CounterMixin, CacheBackend):
+    """
+    Cache stored as files in a directory shared by all workers on a host
+
+    Each namespace is a subdirectory, so invalidation is a rename plus
+    delete and is seen by every worker immediately. A namespace's generation
+    is a token in a file beside its subdirectory, replaced before the
+    subdirectory is dropped. Entry files carry their expiry time as mtime;
+    every max_entries / 10 writes a process deletes expired entries and then
+    those expiring soonest until at most max_entries are left, so the
+    directory stays bounded (each worker may overshoot by one interval).
+    """
+
+    def __init__(self, directory, max_entries=10000):
+        self._init_counters()
+        self.directory = directory
+        self.max_entries = max_entries
+        self.sweep_interval = max(1, max_entries // 10)
+        self._writes = 0
+        self._sweep_lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _namespace_dir(self, namespace):
+        return os.path.join(self.directory, str(namespace))
+
+    def _generation_path(self, namespace):
+        return os.path.join(self.directory, f'{namespace}.generation')
+
+    def _path(self, namespace, key):
+        digest = hashlib.sha1(key.encode('utf-8')).hexdigest()
+        return os.path.join(self._namespace_dir(namespace), digest)
+
+    def _write(self, path, data, mtime=None):
+        # Write then rename so readers never see a partial file
+        fd, temp_path = tempfile.mkstemp(dir=self.directory)
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as handle:
+                handle.write(data)
+            if mtime is not None:
+                os.utime(temp_path, (mtime, mtime))
+            os.replace(temp_path, path)
+            return True
+        except OSError as e:
+            logger.warning("Cache write failed: %s", e)
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            return False
+
+    def get(self, namespace, key):
+        path = self._path(namespace, key)
+        try:
+            with open(path, 'r', encoding='utf-8') as handle:
+                entry = json.load(handle)
+        except (OSError, ValueError):
+            entry = None
+        if entry is not None and entry['expires_at'] < time.time():
+            entry = None
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        self._count('hits' if entry is not None else 'misses')
+        return entry['value'] if entry is not None else None
+
+    def generation(self, namespace):
+        try:
+            with open(self._generation_path(namespace), 'r', encoding='utf-8') as handle:
+                return handle.read()
+        except OSError:
+            return ''
+
+    def set(self, namespace, key, value, ttl, generation=None):
+        directory = self._namespace_dir(namespace)
+        os.makedirs(directory, exist_ok=True)
+        path = self._path(namespace, key)
+        expires_at = time.time() + ttl
+        if not self._write(path, json.dumps({'expires_at': expires_at, 'value': value}), expires_at):
+            return
+
+        # Checked after writing: an invalidation replaces the generation
+        # before dropping the directory, so either it removes this entry or
+        # the new generation is seen here
+        if generation is not None and self.generation(namespace) != generation:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+        with self._sweep_lock:
+            self._writes += 1
+            sweep = self._writes % self.sweep_interval == 0
+        if sweep:
+            self._sweep()
+
+    def _sweep(self):
+        """Delete expired entries, then the ones expiring soonest beyond max_entries"""
+        now = time.time()
+        entries = []
+        for namespace in os.scandir(self.directory):
+            if namespace.name.endswith('.deleted') or not namespace.is_dir():
+                continue
+            try:
+                entries.extend((entry.stat().st_mtime, entry.path) for entry in os.scandir(namespace.path))
+            except OSError:
+                continue
+
+        entries.sort()
+        doomed = [path for expires_at, path in entries if expires_at < now]
+        live = len(entries) - len(doomed)
+        if live > self.max_entries:
+            doomed += [path for _, path in entries[len(doomed):len(doomed) + live - self.max_entries]]
+
+        evicted = 0
+        for path in doomed:
+            try:
+                os.remove(path)
+                evicted += 1
+            except OSError:
+                pass
+        if evicted:
+            self._count('evictions', evicted)
+
+    def invalidate(self, namespace):
+        self._write(self._generation_path(namespace), uuid.uuid4().hex)
+        directory = self._namespace_dir(namespace)
+        doomed = f'{directory}.{os.getpid()}.{threading.get_ident()}.deleted'
+        try:
+            os.rename(directory, doomed)
+        except OSError:
+            pass
+        else:
+            shutil.rmtree(doomed, ignore_errors=True)
+        self._count('invalidations')
+
+class ResponseCache:
+    """Per-user cache of read endpoint responses, invalidated on task writes"""
+
+    def __init__(self, app=None):
+        self.backend = NullCacheBackend()
+        self.ttl = 30
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        backend = app.config.get('CACHE_BACKEND', 'none')
+        self.ttl = app.config.get('CACHE_TTL', 30)
+
+        if backend == 'memory':
+            self.backend = MemoryCacheBackend(app.config.get('CACHE_MAX_ENTRIES', 10000))
+        elif backend == 'file':
+            self.backend = FileCacheBackend(app.config['CACHE_DIR'], app.config.get('CACHE_MAX_ENTRIES', 10000))
+        elif backend == 'none':
+            self.backend = NullCacheBackend()
+        else:
+            raise ValueError(f"Unknown CACHE_BACKEND: {backend}")
+
+        app.extensions['response_cache'] = self
+
+    def invalidate_user(self, user_id):
+        """Drop every cached response of a user"""
+        self.backend.invalidate(user_id)
+
+    def stats(self):
+        """Return the backend's hit/miss/eviction counters"""
+        return self.backend.stats()
+
+    def cached(self, endpoint):
+        """
+        Cache a JSON view's successful responses per user and query string
+
+        Must be applied below @jwt_required(). Views are expected to set
+        an ETag, which is replayed on hits and checked against If-None-Match.
+        """
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                user_id = get_jwt_identity()
+                # Overdue lists and stats change at midnight without a write
+                key = f"{endpoint}:{datetime.utcnow().date()}:{request.full_path}:{kwargs}"
+
+                entry = self.backend.get(user_id, key)
+                if entry is not None:
+                    headers = {'ETag': entry['etag'], 'Cache-Control': 'private, no-cache', 'X-Cache': 'HIT'}
+                    if request.if_none_match.contains_weak(entry['etag'].strip('"')):
+                        return '', 304, headers
+                    return current_app.response_class(entry['body'], 200, headers, mimetype='application/json')
+
+                # Read before the view reads the database, so a write committing
+                # while the view runs keeps its stale response out of the cache
+                generation = self.backend.generation(user_id)
+                response = make_response(view(*args, **kwargs))
+                if response.status_code == 200 and response.headers.get('ETag'):
+                    self.backend.set(user_id, key, {
+                        'body': response.get_data(as_text=True),
+                        'etag': response.headers['ETag']
+                    }, self.ttl, generation)
+                response.headers['X-Cache'] = 'MISS'
+                return response
+            return wrapper
+        return decorator
+
+response_cache = ResponseCache()
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_changed_users(session):
+    """Drop cached responses of users whose tasks changed in the committed transaction"""
+    for user_id in session.info.pop('changed_users', ()):
+        response_cache.invalidate_user(str(user_id))
+
+@event.listens_for(Session, 'after_rollback')
+def _forget_changed_users(session):
+    session.info.pop('changed_users', None)
@@ -0,0 +1,179 @@
+import sys
+import click
+
+def register_commands(app):
+    """Register maintenance CLI commands with the app"""
+
+    @app.cli.command('migrate-schema')
+    def migrate_schema():
+        """Add declared columns and indexes that are missing from the database"""
+        from migrations import ensure_schema
+
+        created = ensure_schema()
+        if created:
+            for name in created:
+                click.echo(f"Created {name}")
+        else:
+            click.echo("Schema is up to date")
+
+    @app.cli.command('rebuild-search-index')
+    def rebuild_search_index_command():
+        """Create the full-text search index if needed and re-index every task"""
+        from tasks.search import rebuild_search_index
+
+        backend = rebuild_search_index()
+        if backend == 'like':
+            click.echo("This database has no full-text search support; ?q= uses LIKE")
+        else:
+            click.echo(f"Rebuilt the {backend} search index")
+
+    @app.cli.command('check-indexes')
+    def check_indexes():
+        """Fail if any hot task query is not served by an index"""
+        from indexes import check_query_plans
+
+        failures = 0
+        for label, (indexed, plan) in check_query_plans().items():
+            click.echo(f"{'ok  ' if indexed else 'FAIL'} {label}")
+            for line in plan:
+                click.echo(f"       {line}")
+            if not indexed:
+                failures += 1
+
+        if failures:
+            click.echo(f"{failures} queries are not index-backed")
+            sys.exit(1)
+
+    @app.cli.command('check-query-budgets')
+    def check_query_budgets():
+        """Call every budgeted view as a throwaway user and fail if one goes over budget"""
+        from flask_jwt_extended import create_access_token
+        from sqlalchemy import delete
+        from app import db
+        from models import User, Task, TaskCounter, TaskDueCounter, TaskTombstone
+        from query_guard import query_guard, QueryBudgetExceeded
+
+        # Extra query strings exercising other code paths of a view
+        variants = {
+            'get_tasks': ['', '?completed=true', '?page=2&per_page=5', '?cursor=&per_page=5', '?q=task&per_page=5',
+                          '?sort=due_date&completed=false', '?due_from=2020-01-01&due_to=2030-01-01', '?overdue=true'],
+            'get_task_stats': ['', '?breakdown=due_week,completion_day'],
+            # since=MQ is the sync token for version 1
+            'get_task_changes': ['', '?per_page=5', '?since=MQ&per_page=5'],
+        }
+
+        client = app.test_client()
+        credentials = {'username': 'query_budget_check', 'email': 'query-budget-check@example.com',
+                       'password': 'Budget-check-1'}
+        response = client.post('/api/auth/register', json=credentials)
+        if response.status_code != 201:
+            click.echo(f"Could not create the check user: {response.get_json()}")
+            sys.exit(1)
+        user_id = response.get_json()['user']['id']
+        headers = {'Authorization': f'Bearer {create_access_token(identity=str(user_id))}'}
+        tasks = [{'title': f'Task {i}', 'due_date': '2020-01-01' if i % 2 else None, 'completed': i % 3 == 0}
+                 for i in range(20)]
+        client.post('/api/tasks/batch', json={'tasks': tasks}, headers=headers)
+        task_id = db.session.scalar(db.select(Task.id).where(Task.user_id == user_id).limit(1))
+
+        previous_mode = query_guard.mode
+        query_guard.mode = 'raise'
+        query_guard.install()
+        failures = 0
+        try:
+            for rule in app.url_map.iter_rules():
+                view_name = rule.endpoint.rsplit('.', 1)[-1]
+                if view_name not in query_guard.budgets or 'GET' not in rule.methods:
+                    continue
+                path = rule.rule.replace('<int:task_id>', str(task_id))
+                for query in variants.get(view_name, ['']):
+                    try:
+                        status = client.get(path + query, headers=headers).status_code
+                        click.echo(f"ok   {path}{query} ({status})")
+                    except QueryBudgetExceeded as e:
+                        failures += 1
+                        click.echo(f"FAIL {e}")
+        finally:
+            query_guard.mode = previous_mode
+            db.session.rollback()
+            for model in (Task, TaskTombstone, TaskDueCounter, TaskCounter, User):
+                column = model.id if model is User else model.user_id
+                db.session.execute(delete(model).where(column == user_id))
+            db.session.commit()
+
+        if failures:
+            click.echo(f"{failures} requests went over their query budget")
+            sys.exit(1)
+
+    @app.cli.command('reconcile-counters')
+    @click.option('--user-id', type=int, default=None, help='Only reconcile this user')
+    @click.option('--dry-run', is_flag=True, help='Report drift without rewriting counters')
+    def reconcile_counters_command(user_id, dry_run):
+        """Rebuild per-user task counters from the tasks table and report drift"""
+        from app import db
+        from tasks.counters import reconcile_counters
+
+        drift = reconcile_counters(user_id=user_id, fix=not dry_run)
+        for entry in drift:
+            click.echo(f"user {entry['user_id']} {entry['field']}: stored={entry['stored']} actual={entry['actual']}")
+
+        if dry_run:
+            db.session.rollback()
+            click.echo(f"{len(drift)} drifted fields found")
+            if drift:
+                sys.exit(1)
+        else:
+            db.session.commit()
+            click.echo(f"{len(drift)} drifted fields rebuilt")
+
+    @app.cli.command('purge-tombstones')
+    @click.option('--days', type=int, default=None, help='Retention in days (defaults to TOMBSTONE_RETENTION_DAYS)')
+    def purge_tombstones_command(days):
+        """Delete deleted-task tombstones older than the retention period"""
+        from tasks.changes import purge_tombstones
+
+        days = app.config['TOMBSTONE_RETENTION_DAYS'] if days is None else days
+        purged = purge_tombstones(days)
+        click.echo(f"{purged} tombstones older than {days} days purged")
+
+    @app.cli.command('jobs')
+    def list_jobs():
+        """Show the schedule and last outcome of every background job"""
+        from app import db
+        from jobs import job_scheduler
+        from models import Job
+
+        job_scheduler.ensure_jobs()
+        for job in db.session.scalars(db.select(Job).order_by(Job.name)):
+            duration = f'{job.last_duration:.3f}s' if job.last_duration is not None else '-'
+            click.echo(f"{job.name:20} next={job.next_run_at:%Y-%m-%d %H:%M} last={job.last_status or '-'} "
+                       f"duration={duration} locked_by={job.locked_by or '-'}")
+            if job.last_error:
+                click.echo(f"{'':20} error: {job.last_error}")
+
+    @app.cli.command('run-job')
+    @click.argument('name')
+    def run_job(name):
+        """Run a background job now, unless another worker is running it"""
+        from jobs import job_scheduler
+
+        job = job_scheduler.jobs.get(name)
+        if job is None:
+            click.echo(f"Unknown job {name}. Choose from: {', '.join(job_scheduler.jobs)}")
+            sys.exit(1)
+        job_scheduler.ensure_jobs()
+        if not job_scheduler.claim(job, due_only=False):
+            click.echo(f"{name} is running in another worker")
+            sys.exit(1)
+        if not job_scheduler.run(job):
+            click.echo(f"{name} failed; see `flask jobs`")
+            sys.exit(1)
+        click.echo(f"{name} finished")
+
+    @app.cli.command('run-jobs')
+    def run_jobs():
+        """Run due background jobs in this process until interrupted"""
+        from jobs import job_scheduler
+
+        click.echo(f"Running {', '.join(job_scheduler.jobs)} every {job_scheduler.poll_seconds:g}s poll")
+        job_scheduler.serve()
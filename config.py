@@ -1,5 +1,7 @@
 import os
+import tempfile
 from datetime import timedelta
+from logging_config import parse_levels
 
 class Config:
     """Application configuration"""
@@ -12,22 +14,159 @@ class Config:
         # Default to SQLite for development
         SQLALCHEMY_DATABASE_URI = 'sqlite:///task_tracker.db'
     
-    SQLALCHEMY_ENGINE_OPTIONS = {
-        "pool_recycle": 300,
-        "pool_pre_ping": True,
-    }
+    # Connection pool, applied to the primary and the replica. Pre-ping
+    # 'always' tests each connection on checkout (one extra round trip);
+    # 'never' relies on DB_POOL_RECYCLE and on SQLAlchemy invalidating the
+    # pool when a disconnect error is raised.
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 5))
+    DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', 10))
+    DB_POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT', 30))
+    DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE', 300))
+    DB_POOL_PRE_PING = os.environ.get('DB_POOL_PRE_PING', 'always')
+    
+    # Optional read replica for task list, detail and stats reads. Users who
+    # wrote within REPLICA_STICKY_SECONDS keep reading from the primary;
+    # recent writers are tracked per process ('memory') or in CACHE_DIR ('file').
+    REPLICA_DATABASE_URL = os.environ.get('REPLICA_DATABASE_URL')
+    REPLICA_STICKY_SECONDS = int(os.environ.get('REPLICA_STICKY_SECONDS', 5))
+    REPLICA_STICKY_BACKEND = os.environ.get('REPLICA_STICKY_BACKEND', 'memory')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     
+    # SQLite file databases: PRAGMAs applied on connect (WAL lets readers run
+    # alongside the writer; busy_timeout is in ms, negative cache_size in KiB)
+    SQLITE_TUNING = os.environ.get('SQLITE_TUNING', 'True').lower() == 'true'
+    SQLITE_PRAGMAS = {
+        'journal_mode': os.environ.get('SQLITE_JOURNAL_MODE', 'wal'),
+        'synchronous': os.environ.get('SQLITE_SYNCHRONOUS', 'normal'),
+        'busy_timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT', 5000)),
+        'cache_size': int(os.environ.get('SQLITE_CACHE_SIZE', -64000)),
+        'mmap_size': int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024)),
+    }
+    # Single-task writes go through one writer thread per process, which
+    # commits up to SQLITE_WRITE_QUEUE_BATCH queued writes together; a write
+    # still queued after SQLITE_WRITE_QUEUE_TIMEOUT seconds is dropped with 503
+    SQLITE_WRITE_QUEUE = os.environ.get('SQLITE_WRITE_QUEUE', 'True').lower() == 'true'
+    SQLITE_WRITE_QUEUE_BATCH = int(os.environ.get('SQLITE_WRITE_QUEUE_BATCH', 64))
+    SQLITE_WRITE_QUEUE_TIMEOUT = float(os.environ.get('SQLITE_WRITE_QUEUE_TIMEOUT', 10))
+    
     # JWT configuration
     JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY', 'jwt-secret-string')
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=24)
     JWT_ALGORITHM = 'HS256'
     JWT_CSRF_IN_COOKIES = False
     
+    # Per-process cache of user records resolved from tokens
+    USER_CACHE_TTL = int(os.environ.get('USER_CACHE_TTL', 60))
+    USER_CACHE_MAX_ENTRIES = int(os.environ.get('USER_CACHE_MAX_ENTRIES', 10000))
+    
     # Flask configuration
     SECRET_KEY = os.environ.get('SECRET_KEY', 'dev-secret-key')
     DEBUG = os.environ.get('FLASK_DEBUG', 'True').lower() == 'true'
     
+    # Logging: records go through a queue to a listener thread, as JSON
+    # lines ('json') or plain text ('text'). LOG_LEVELS and LOG_SAMPLE_RATES
+    # are 'logger=value' lists; sample rates keep that share of a logger's
+    # INFO/DEBUG records (warnings and errors are never sampled). Records
+    # arriving while LOG_QUEUE_SIZE records are pending are dropped.
+    LOG_LEVEL = os.environ.get('LOG_LEVEL', 'DEBUG' if DEBUG else 'INFO').upper()
+    LOG_LEVELS = parse_levels(os.environ.get(
+        'LOG_LEVELS', 'sqlalchemy=WARNING,werkzeug=INFO,urllib3=WARNING,asyncio=WARNING'))
+    LOG_FORMAT = os.environ.get('LOG_FORMAT', 'json')
+    LOG_SAMPLE_RATES = {name: float(rate) for name, rate in parse_levels(os.environ.get('LOG_SAMPLE_RATES', '')).items()}
+    LOG_QUEUE_SIZE = int(os.environ.get('LOG_QUEUE_SIZE', 10000))
+    
+    # SQL statement budgets of views ('off', 'warn' or 'raise') and the
+    # threshold above which statements are logged with their plan (0 disables)
+    QUERY_BUDGET_MODE = os.environ.get('QUERY_BUDGET_MODE', 'warn' if DEBUG else 'off')
+    SLOW_QUERY_MS = float(os.environ.get('SLOW_QUERY_MS', 100 if DEBUG else 0))
+    
     # API configuration
     JSON_SORT_KEYS = False
-    JSONIFY_PRETTYPRINT_REGULAR = True
+    JSONIFY_PRETTYPRINT_REGULAR = os.environ.get('JSON_PRETTYPRINT', 'False').lower() == 'true'
+    
+    # Prometheus metrics at METRICS_PATH and Server-Timing response headers
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'True').lower() == 'true'
+    METRICS_PATH = os.environ.get('METRICS_PATH', '/metrics')
+    SERVER_TIMING_HEADER = os.environ.get('SERVER_TIMING_HEADER', 'True').lower() == 'true'
+    
+    # Batch endpoint limits (POST/PATCH/DELETE /api/tasks/batch)
+    BATCH_MAX_ITEMS = int(os.environ.get('BATCH_MAX_ITEMS', 1000))
+    BATCH_MAX_BYTES = int(os.environ.get('BATCH_MAX_BYTES', 2 * 1024 * 1024))
+    
+    # Streaming import (POST /api/tasks/import): rows per INSERT/commit and
+    # the maximum number of rejected rows described in the summary
+    IMPORT_BATCH_SIZE = int(os.environ.get('IMPORT_BATCH_SIZE', 1000))
+    IMPORT_MAX_ERRORS = int(os.environ.get('IMPORT_MAX_ERRORS', 1000))
+    
+    # Delta sync (GET /api/tasks/changes): days deleted task ids are kept for
+    # clients to pick up, and the maximum number of entries per page
+    TOMBSTONE_RETENTION_DAYS = int(os.environ.get('TOMBSTONE_RETENTION_DAYS', 30))
+    CHANGES_MAX_PAGE = int(os.environ.get('CHANGES_MAX_PAGE', 500))
+    
+    # Background jobs (jobs.py): each gunicorn or uvicorn worker polls the
+    # jobs table every JOBS_POLL_SECONDS and runs the due jobs it claims on
+    # JOBS_WORKERS threads; CLI commands and scripts importing the app never
+    # start them. Failed runs are retried after JOBS_RETRY_SECONDS, doubling
+    # up to JOBS_MAX_RETRIES times. Set JOBS_ENABLED=False in the web workers
+    # when a dedicated `flask run-jobs` process runs them instead.
+    JOBS_ENABLED = os.environ.get('JOBS_ENABLED', 'True').lower() == 'true'
+    JOBS_POLL_SECONDS = float(os.environ.get('JOBS_POLL_SECONDS', 30))
+    JOBS_WORKERS = int(os.environ.get('JOBS_WORKERS', 2))
+    JOBS_RETRY_SECONDS = float(os.environ.get('JOBS_RETRY_SECONDS', 60))
+    JOBS_MAX_RETRIES = int(os.environ.get('JOBS_MAX_RETRIES', 5))
+    
+    # Response cache for task reads: 'none', 'memory' (per-process LRU) or
+    # 'file' (directory shared by the workers on one host). The memory backend
+    # cannot see writes made in other workers, so with several workers cached
+    # responses may be stale for up to CACHE_TTL seconds.
+    CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'none')
+    CACHE_TTL = int(os.environ.get('CACHE_TTL', 30))
+    CACHE_MAX_ENTRIES = int(os.environ.get('CACHE_MAX_ENTRIES', 10000))
+    CACHE_DIR = os.environ.get('CACHE_DIR', os.path.join(tempfile.gettempdir(), 'task_tracker_cache'))
+    
+    # Password hashing: algorithm ('scrypt', 'pbkdf2' or 'bcrypt') and cost
+    # (scrypt N, PBKDF2 iterations or bcrypt rounds; empty for the default).
+    # Hashes run on a bounded pool; requests beyond workers + queue limit get 503.
+    PASSWORD_HASH_ALGORITHM = os.environ.get('PASSWORD_HASH_ALGORITHM', 'scrypt')
+    PASSWORD_HASH_COST = int(os.environ.get('PASSWORD_HASH_COST', 0)) or None
+    PASSWORD_HASH_EXECUTOR = os.environ.get('PASSWORD_HASH_EXECUTOR', 'thread')
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', 0)) or None
+    PASSWORD_HASH_QUEUE_LIMIT = int(os.environ.get('PASSWORD_HASH_QUEUE_LIMIT', 32))
+    PASSWORD_HASH_TIMEOUT = float(os.environ.get('PASSWORD_HASH_TIMEOUT', 10))
+    
+    # ASGI mode (uvicorn asgi:app): threads running the sync Flask handlers
+    ASGI_WORKER_THREADS = int(os.environ.get('ASGI_WORKER_THREADS', 32))
+    
+    # Gunicorn (gunicorn.conf.py). Worker class 'gthread' runs GUNICORN_THREADS
+    # requests per worker; 'gevent' runs GUNICORN_WORKER_CONNECTIONS greenlets
+    # (requires gevent); 'sync' handles one request at a time.
+    GUNICORN_BIND = os.environ.get('GUNICORN_BIND', f"0.0.0.0:{os.environ.get('PORT', 5000)}")
+    GUNICORN_WORKERS = int(os.environ.get('WEB_CONCURRENCY', 0)) or (os.cpu_count() or 1) * 2 + 1
+    GUNICORN_WORKER_CLASS = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+    GUNICORN_THREADS = int(os.environ.get('GUNICORN_THREADS', 4))
+    GUNICORN_WORKER_CONNECTIONS = int(os.environ.get('GUNICORN_WORKER_CONNECTIONS', 1000))
+    GUNICORN_PRELOAD = os.environ.get('GUNICORN_PRELOAD', 'True').lower() == 'true'
+    GUNICORN_TIMEOUT = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+    GUNICORN_GRACEFUL_TIMEOUT = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30))
+    GUNICORN_KEEPALIVE = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+    # Recycle workers after this many requests (0 disables), staggered by up to the jitter
+    GUNICORN_MAX_REQUESTS = int(os.environ.get('GUNICORN_MAX_REQUESTS', 1000))
+    GUNICORN_MAX_REQUESTS_JITTER = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', 100))
+    
+    # Server-Sent Events (GET /api/tasks/stream). STREAM_BACKEND 'database'
+    # polls the counter versions of streaming users every STREAM_POLL_INTERVAL
+    # seconds so writes in any worker reach every stream; 'local' only reaches
+    # streams of the worker that committed the write (one process, tests).
+    # Each open stream holds its request's thread or greenlet for its whole
+    # life, so serve streams from gevent workers (GUNICORN_WORKER_CLASS=gevent)
+    # or uvicorn asgi:app with ASGI_WORKER_THREADS raised to match; gthread
+    # workers with a handful of threads run out of threads for other requests.
+    # At most STREAM_MAX_CONNECTIONS streams per process are accepted. Streams
+    # close after STREAM_MAX_SECONDS and the client reconnects with
+    # Last-Event-ID, which also re-checks its token.
+    STREAM_BACKEND = os.environ.get('STREAM_BACKEND', 'database')
+    STREAM_POLL_INTERVAL = float(os.environ.get('STREAM_POLL_INTERVAL', 1.0))
+    STREAM_HEARTBEAT_SECONDS = float(os.environ.get('STREAM_HEARTBEAT_SECONDS', 15))
+    STREAM_MAX_SECONDS = float(os.environ.get('STREAM_MAX_SECONDS', 300))
+    STREAM_BUFFER_SIZE = int(os.environ.get('STREAM_BUFFER_SIZE', 100))
+    STREAM_MAX_CONNECTIONS = int(os.environ.get('STREAM_MAX_CONNECTIONS', 100))
@@ -0,0 +1,234 @@
+import os
+from contextlib import contextmanager
+from functools import wraps
+from flask_jwt_extended import get_jwt_identity
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session as SessionBase
+from sqlalchemy.sql.dml import UpdateBase
+from cache import MemoryCacheBackend, FileCacheBackend
+import logging
+
+logger = logging.getLogger(__name__)
+
+# SQLALCHEMY_BINDS key of the read replica engine
+REPLICA_BIND_KEY = 'replica'
+
+def is_sqlite_file(url):
+    """
+    Check whether a database URL points at an SQLite file (not an in-memory database)
+
+    Args:
+        url (sqlalchemy.engine.URL): Database URL
+
+    Returns:
+        bool: True for file-backed SQLite databases
+    """
+    if url.get_backend_name() != 'sqlite':
+        return False
+    database = url.database or ''
+    return database not in ('', ':memory:') and 'mode=memory' not in database and not database.startswith('file::memory:')
+
+def engine_options(url, pool_size, max_overflow, pool_timeout, pool_recycle, pre_ping):
+    """
+    Pool options for an engine, leaving out sizing that in-memory SQLite's
+    single shared connection (StaticPool) does not accept
+
+    Args:
+        url (str): Database URL
+        pool_size (int): Connections kept open
+        max_overflow (int): Extra connections opened under load
+        pool_timeout (float): Seconds to wait for a free connection
+        pool_recycle (int): Seconds after which connections are replaced
+        pre_ping (str): 'always' to test connections on checkout, 'never' to rely
+            on pool_recycle and on invalidation when a disconnect error is raised
+
+    Returns:
+        dict: Keyword arguments for create_engine()
+    """
+    if pre_ping not in ('always', 'never'):
+        raise ValueError(f"Unknown pre-ping strategy: {pre_ping}")
+
+    options = {
+        'pool_recycle': pool_recycle,
+        'pool_pre_ping': pre_ping == 'always',
+    }
+    url = make_url(url)
+    if url.get_backend_name() != 'sqlite' or is_sqlite_file(url):
+        options.update(pool_size=pool_size, max_overflow=max_overflow, pool_timeout=pool_timeout)
+    return options
+
+def configure_engines(app):
+    """
+    Build SQLALCHEMY_ENGINE_OPTIONS and the replica bind from the DB_POOL_* settings
+
+    Must run before db.init_app().
+
+    Args:
+        app (flask.Flask): Application
+    """
+    config = app.config
+    pool = {
+        'pool_size': config['DB_POOL_SIZE'],
+        'max_overflow': config['DB_MAX_OVERFLOW'],
+        'pool_timeout': config['DB_POOL_TIMEOUT'],
+        'pool_recycle': config['DB_POOL_RECYCLE'],
+        'pre_ping': config['DB_POOL_PRE_PING'],
+    }
+    config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(config['SQLALCHEMY_DATABASE_URI'], **pool)
+
+    replica_url = config.get('REPLICA_DATABASE_URL')
+    if replica_url:
+        binds = dict(config.get('SQLALCHEMY_BINDS') or {})
+        binds[REPLICA_BIND_KEY] = {'url': replica_url, **engine_options(replica_url, **pool)}
+        config['SQLALCHEMY_BINDS'] = binds
+
+def tune_sqlite(engine, pragmas):
+    """
+    Apply PRAGMAs to every new SQLite connection and support explicit BEGIN modes
+
+    pysqlite opens transactions itself, lazily before the first write, so
+    ordinary sessions never hold a read snapshot that would have to be
+    upgraded to a write lock (which fails at once instead of waiting on
+    busy_timeout). A connection with the 'sqlite_begin' execution option
+    (e.g. 'IMMEDIATE' for the write queue) is switched to autocommit mode
+    and gets that BEGIN at transaction start instead, which also makes
+    savepoints nest properly inside it; the pool switches it back on checkin.
+
+    Args:
+        engine (sqlalchemy.engine.Engine): SQLite engine
+        pragmas (dict): PRAGMA names and values, e.g. {'journal_mode': 'wal'}
+    """
+    @event.listens_for(engine, 'connect')
+    def _on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+
+    @event.listens_for(engine, 'begin')
+    def _on_begin(connection):
+        mode = connection.get_execution_options().get('sqlite_begin')
+        if mode:
+            connection.connection.driver_connection.isolation_level = None
+            connection.exec_driver_sql(f"BEGIN {mode}")
+
+    @event.listens_for(engine, 'checkin')
+    def _on_checkin(dbapi_connection, connection_record):
+        if dbapi_connection is not None:
+            dbapi_connection.isolation_level = ''
+
+def init_database(app, db):
+    """
+    Apply the SQLite tuning profile to the app's engines when enabled
+
+    Args:
+        app (flask.Flask): Application
+        db (flask_sqlalchemy.SQLAlchemy): Extension owning the engines
+    """
+    if not app.config.get('SQLITE_TUNING', True):
+        return
+    with app.app_context():
+        for engine in db.engines.values():
+            if is_sqlite_file(engine.url):
+                tune_sqlite(engine, app.config.get('SQLITE_PRAGMAS', {}))
+                logger.info("SQLite tuning applied to %s", engine.url.database)
+
+class RoutingSession(Session):
+    """
+    Session sending reads to the read replica while the 'read_replica' flag
+    is set in session.info; flushes and INSERT/UPDATE/DELETE use the primary
+
+    Reads are recognized by elimination because ORM statements such as a
+    UNION of entity columns reach get_bind() without a clause.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (bind is None and self.info.get('read_replica') and not self._flushing
+                and not isinstance(clause, UpdateBase)):
+            replica = self._db.engines.get(REPLICA_BIND_KEY)
+            if replica is not None:
+                return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+@contextmanager
+def primary_reads(session):
+    """Read from the primary inside the block, e.g. before writing derived data"""
+    previous = session.info.pop('read_replica', None)
+    try:
+        yield
+    finally:
+        if previous is not None:
+            session.info['read_replica'] = previous
+
+class ReplicaRouter:
+    """
+    Sends reads of decorated views to the read replica, except for users who
+    wrote within the last REPLICA_STICKY_SECONDS, who read their own writes
+    from the primary
+
+    Recent writers are tracked per process ('memory') or in a directory shared
+    by the workers on one host ('file'), like the response cache.
+    """
+
+    def __init__(self, app=None):
+        self.enabled = False
+        self.sticky_seconds = 5
+        self.backend = MemoryCacheBackend()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.enabled = REPLICA_BIND_KEY in app.config.get('SQLALCHEMY_BINDS', {})
+        self.sticky_seconds = app.config.get('REPLICA_STICKY_SECONDS', self.sticky_seconds)
+
+        backend = app.config.get('REPLICA_STICKY_BACKEND', 'memory')
+        if backend == 'memory':
+            self.backend = MemoryCacheBackend(app.config.get('CACHE_MAX_ENTRIES', 10000))
+        elif backend == 'file':
+            self.backend = FileCacheBackend(os.path.join(app.config['CACHE_DIR'], 'replica_sticky'),
+                                            app.config.get('CACHE_MAX_ENTRIES', 10000))
+        else:
+            raise ValueError(f"Unknown REPLICA_STICKY_BACKEND: {backend}")
+
+        app.extensions['replica_router'] = self
+
+    def mark_written(self, user_id):
+        """Route the user's reads to the primary for the sticky window"""
+        if self.enabled:
+            self.backend.set(str(user_id), 'written', True, self.sticky_seconds)
+
+    def use_replica(self, user_id):
+        """Check whether the user's reads may go to the replica"""
+        return self.enabled and self.backend.get(str(user_id), 'written') is None
+
+    def prefer_replica(self, view):
+        """
+        Run a view's SELECTs on the replica unless the user wrote recently
+
+        Must be applied below @jwt_required().
+        """
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            from app import db
+
+            if not self.use_replica(get_jwt_identity()):
+                return view(*args, **kwargs)
+
+            db.session.info['read_replica'] = True
+            try:
+                return view(*args, **kwargs)
+            finally:
+                db.session.info.pop('read_replica', None)
+        return wrapper
+
+replica_router = ReplicaRouter()
+
+@event.listens_for(SessionBase, 'before_commit')
+def _mark_changed_users(session):
+    """Make users whose tasks change read from the primary while the replica catches up"""
+    for user_id in session.info.get('changed_users', ()):
+        replica_router.mark_written(user_id)
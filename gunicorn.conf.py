@@ -0,0 +1,50 @@
+"""
+Gunicorn settings, read from Config (and so from the environment)
+
+Pass it explicitly, as the Procfile does:
+
+    gunicorn --config gunicorn.conf.py app:app
+
+With preload_app the application, its schema check and create_all() run
+once in the master before forking. Connections opened there must not be
+shared with the workers, so the master closes its pool once the app is
+loaded and each worker drops the inherited pool state after fork.
+
+Background jobs (jobs.py) are started here, in each worker once it has
+loaded the app, and not by create_app() itself.
+"""
+from config import Config
+
+bind = Config.GUNICORN_BIND
+workers = Config.GUNICORN_WORKERS
+worker_class = Config.GUNICORN_WORKER_CLASS
+threads = Config.GUNICORN_THREADS
+worker_connections = Config.GUNICORN_WORKER_CONNECTIONS
+preload_app = Config.GUNICORN_PRELOAD
+timeout = Config.GUNICORN_TIMEOUT
+graceful_timeout = Config.GUNICORN_GRACEFUL_TIMEOUT
+keepalive = Config.GUNICORN_KEEPALIVE
+max_requests = Config.GUNICORN_MAX_REQUESTS
+max_requests_jitter = Config.GUNICORN_MAX_REQUESTS_JITTER
+
+def _dispose_engines(close):
+    from app import app, db
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=close)
+
+def when_ready(server):
+    # Close the master's connections before any worker is forked
+    if server.cfg.preload_app:
+        _dispose_engines(close=True)
+
+def post_fork(server, worker):
+    # Replace the inherited pool without closing connections the master may own
+    if server.cfg.preload_app:
+        _dispose_engines(close=False)
+
+def post_worker_init(worker):
+    # Threads do not survive fork, so each worker starts its own job scheduler
+    from jobs import job_scheduler
+    job_scheduler.ensure_started()
+    worker.log.info(f"Worker ready (pid: {worker.pid})")
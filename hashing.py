@@ -0,0 +1,154 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+import bcrypt as _bcrypt
+from werkzeug.security import generate_password_hash, check_password_hash
+
+# bcrypt only uses the first 72 bytes of a password and newer releases
+# reject longer input, so truncate explicitly
+BCRYPT_MAX_BYTES = 72
+
+# Default cost per algorithm: PBKDF2 iterations, scrypt N, bcrypt log2 rounds
+DEFAULT_COSTS = {
+    'pbkdf2': 600000,
+    'scrypt': 32768,
+    'bcrypt': 12,
+}
+
+class HashingBusyError(Exception):
+    """Raised when the hashing pool is saturated or too slow to answer"""
+
+def hash_password(password, algorithm, cost):
+    """
+    Hash a password with the given algorithm and cost
+
+    Args:
+        password (str): Plain-text password
+        algorithm (str): 'pbkdf2', 'scrypt' or 'bcrypt'
+        cost (int): PBKDF2 iterations, scrypt N or bcrypt rounds
+
+    Returns:
+        str: Encoded hash including algorithm and parameters
+    """
+    if algorithm == 'bcrypt':
+        secret = password.encode('utf-8')[:BCRYPT_MAX_BYTES]
+        return _bcrypt.hashpw(secret, _bcrypt.gensalt(rounds=cost)).decode('ascii')
+    if algorithm == 'scrypt':
+        return generate_password_hash(password, method=f'scrypt:{cost}:8:1')
+    if algorithm == 'pbkdf2':
+        return generate_password_hash(password, method=f'pbkdf2:sha256:{cost}')
+    raise ValueError(f"Unknown password hash algorithm: {algorithm}")
+
+def verify_password(password_hash, password):
+    """
+    Check a password against a hash produced by any supported algorithm
+
+    Args:
+        password_hash (str): Stored hash
+        password (str): Plain-text password
+
+    Returns:
+        bool: True if the password matches
+    """
+    if password_hash.startswith('$2'):
+        secret = password.encode('utf-8')[:BCRYPT_MAX_BYTES]
+        return _bcrypt.checkpw(secret, password_hash.encode('ascii'))
+    return check_password_hash(password_hash, password)
+
+def hash_parameters(password_hash):
+    """
+    Extract the algorithm and cost encoded in a stored hash
+
+    Args:
+        password_hash (str): Stored hash
+
+    Returns:
+        tuple: (algorithm, cost); cost is None when it cannot be determined
+    """
+    try:
+        if password_hash.startswith('$2'):
+            return 'bcrypt', int(password_hash.split('$')[2])
+        method = password_hash.split('$', 1)[0].split(':')
+        if method[0] == 'scrypt':
+            return 'scrypt', int(method[1])
+        if method[0] == 'pbkdf2':
+            return 'pbkdf2', int(method[2])
+        return method[0], None
+    except (IndexError, ValueError):
+        return None, None
+
+class PasswordHasher:
+    """
+    Password hashing on a bounded worker pool
+
+    At most PASSWORD_HASH_WORKERS hashes run at once and at most
+    PASSWORD_HASH_QUEUE_LIMIT more wait; beyond that HashingBusyError is
+    raised immediately so callers can answer 503 instead of queueing.
+    """
+
+    def __init__(self, app=None):
+        self.algorithm = 'scrypt'
+        self.cost = DEFAULT_COSTS['scrypt']
+        self.workers = os.cpu_count() or 2
+        self.queue_limit = 32
+        self.timeout = 10.0
+        self.executor_type = 'thread'
+        self._executor = None
+        self._executor_pid = None
+        self._slots = None
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.algorithm = app.config.get('PASSWORD_HASH_ALGORITHM', self.algorithm)
+        if self.algorithm not in DEFAULT_COSTS:
+            raise ValueError(f"Unknown PASSWORD_HASH_ALGORITHM: {self.algorithm}")
+        self.cost = app.config.get('PASSWORD_HASH_COST') or DEFAULT_COSTS[self.algorithm]
+        self.workers = app.config.get('PASSWORD_HASH_WORKERS') or self.workers
+        self.queue_limit = app.config.get('PASSWORD_HASH_QUEUE_LIMIT', self.queue_limit)
+        self.timeout = app.config.get('PASSWORD_HASH_TIMEOUT', self.timeout)
+        self.executor_type = app.config.get('PASSWORD_HASH_EXECUTOR', self.executor_type)
+        app.extensions['password_hasher'] = self
+
+    def _get_executor(self):
+        # Pools do not survive fork, so each (gunicorn) worker process builds its own
+        with self._lock:
+            if self._executor is None or self._executor_pid != os.getpid():
+                executor_class = ProcessPoolExecutor if self.executor_type == 'process' else ThreadPoolExecutor
+                self._executor = executor_class(max_workers=self.workers)
+                self._executor_pid = os.getpid()
+                self._slots = threading.BoundedSemaphore(self.workers + self.queue_limit)
+            return self._executor
+
+    def _run(self, fn, *args):
+        executor = self._get_executor()
+        slots = self._slots
+        if not slots.acquire(blocking=False):
+            raise HashingBusyError('Password hashing pool is saturated')
+
+        try:
+            future = executor.submit(fn, *args)
+        except Exception:
+            slots.release()
+            raise
+        future.add_done_callback(lambda _: slots.release())
+
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            raise HashingBusyError('Password hashing timed out')
+
+    def hash(self, password):
+        """Hash a password with the configured algorithm and cost"""
+        return self._run(hash_password, password, self.algorithm, self.cost)
+
+    def verify(self, password_hash, password):
+        """Check a password against a stored hash of any supported algorithm"""
+        return self._run(verify_password, password_hash, password)
+
+    def needs_rehash(self, password_hash):
+        """Check whether a stored hash uses a different algorithm or cost than configured"""
+        return hash_parameters(password_hash) != (self.algorithm, self.cost)
+
+password_hasher = PasswordHasher()
@@ -0,0 +1,121 @@
+from datetime import date, datetime, timezone
+from sqlalchemy import select, tuple_
+from app import db
+from models import Task, TaskTombstone
+from tasks.stats import build_stats_query, BREAKDOWNS
+from tasks.filters import filter_tasks, task_order
+
+# Representative filter/sort combinations accepted by TaskListQuerySchema
+FILTERED_LISTS = {
+    'sort=due_date': {'sort': 'due_date'},
+    'sort=-title': {'sort': '-title'},
+    'sort=updated_at&completed': {'sort': 'updated_at', 'completed': False},
+    'due_from&due_to': {'due_from': date(2024, 1, 1), 'due_to': date(2024, 1, 31)},
+    'overdue&sort=-due_date': {'overdue': True, 'sort': '-due_date'},
+    'updated_since': {'updated_since': datetime(2024, 1, 1, tzinfo=timezone.utc)},
+}
+
+def hot_queries(user_id):
+    """
+    Representative statements issued by the task endpoints
+
+    Args:
+        user_id (int): User whose rows the statements select
+
+    Returns:
+        dict: Statement label mapped to a SQLAlchemy select
+    """
+    now = datetime.utcnow()
+    user_tasks = select(Task).where(Task.user_id == user_id)
+
+    return {
+        'get_tasks': user_tasks.order_by(Task.created_at.desc()).limit(10),
+        'get_tasks?completed': user_tasks.where(Task.completed == True)
+            .order_by(Task.created_at.desc()).limit(10),
+        'get_tasks?cursor': user_tasks.where(tuple_(Task.created_at, Task.id) < (now, 0))
+            .order_by(Task.created_at.desc(), Task.id.desc()).limit(11),
+        'get_task': user_tasks.where(Task.id == 1),
+        **{
+            f'get_tasks?{label}': filter_tasks(user_tasks, filters, now.date()).order_by(*task_order(filters)).limit(11)
+            for label, filters in FILTERED_LISTS.items()
+        },
+        'get_task_changes': user_tasks.where(Task.change_version > 0)
+            .order_by(Task.change_version, Task.id).limit(101),
+        'get_task_changes?deleted': select(TaskTombstone.version, TaskTombstone.task_id)
+            .where(TaskTombstone.user_id == user_id, TaskTombstone.version > 0)
+            .order_by(TaskTombstone.version, TaskTombstone.task_id).limit(101),
+        'get_task_stats': build_stats_query(user_id),
+        'get_task_stats?breakdown': build_stats_query(user_id, breakdowns=BREAKDOWNS),
+    }
+
+def plan_statement(dialect_name, sql):
+    """
+    EXPLAIN form of a SQL string for a dialect
+
+    Args:
+        dialect_name (str): 'sqlite', 'postgresql', ...
+        sql (str): Statement to explain
+
+    Returns:
+        tuple: (EXPLAIN statement, index of the plan text column in each row)
+    """
+    if dialect_name == 'sqlite':
+        return f'EXPLAIN QUERY PLAN {sql}', -1
+    return f'EXPLAIN {sql}', 0
+
+def explain(statement, engine=None):
+    """
+    Return the query plan lines for a statement
+
+    Args:
+        statement: SQLAlchemy selectable to explain
+        engine (sqlalchemy.engine.Engine): Engine to explain against (defaults to db.engine)
+
+    Returns:
+        list: Plan lines as strings
+    """
+    engine = engine or db.engine
+    sql = str(statement.compile(dialect=engine.dialect, compile_kwargs={'literal_binds': True}))
+
+    plan_sql, column = plan_statement(engine.dialect.name, sql)
+
+    with engine.connect() as connection:
+        # Small tables make Postgres prefer sequential scans, so rule them
+        # out to see whether a usable index exists at all
+        if engine.dialect.name == 'postgresql':
+            connection.exec_driver_sql('SET LOCAL enable_seqscan = off')
+        rows = connection.exec_driver_sql(plan_sql).all()
+        return [row[column] for row in rows]
+
+def uses_index(plan_lines):
+    """
+    Check whether a query plan reads tasks through an index
+
+    Args:
+        plan_lines (list): Output of explain()
+
+    Returns:
+        bool: False if the plan scans the tasks table or sorts rows for ORDER BY
+    """
+    for line in plan_lines:
+        if line.startswith('SCAN tasks') and 'INDEX' not in line:
+            return False
+        if ('TEMP B-TREE' in line and 'ORDER BY' in line) or 'Seq Scan on tasks' in line:
+            return False
+    return True
+
+def check_query_plans(engine=None):
+    """
+    Explain every hot query and report whether it is index-backed
+
+    Args:
+        engine (sqlalchemy.engine.Engine): Engine to explain against (defaults to db.engine)
+
+    Returns:
+        dict: Statement label mapped to (uses_index, plan_lines)
+    """
+    results = {}
+    for label, statement in hot_queries(user_id=1).items():
+        plan = explain(statement, engine)
+        results[label] = (uses_index(plan), plan)
+    return results
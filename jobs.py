@@ -0,0 +1,276 @@
+import os
+import random
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from sqlalchemy import select, update, insert, or_
+from sqlalchemy.exc import IntegrityError
+from app import db
+from metrics import Histogram
+from models import Job
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Job durations in seconds, from sub-second sweeps to full reconciles
+DURATION_BUCKETS = (0.1, 0.5, 1, 5, 15, 60, 300, 900, 3600)
+
+# Longest error message kept in jobs.last_error
+MAX_ERROR_LENGTH = 2000
+
+class JobDefinition:
+    """
+    A job function and its schedule
+
+    Runs are aligned to multiples of interval since the Unix epoch, shifted
+    by offset: a daily job with a three hour offset runs at 03:00 UTC.
+    """
+
+    def __init__(self, name, fn, interval, offset=timedelta(0), lease=timedelta(hours=1), run_on_create=False):
+        self.name = name
+        self.fn = fn
+        self.interval = interval
+        self.offset = offset
+        self.lease = lease
+        self.run_on_create = run_on_create
+
+    def next_run_after(self, moment):
+        """First scheduled run strictly after moment"""
+        epoch = datetime(1970, 1, 1) + self.offset
+        slots = (moment - epoch) // self.interval + 1
+        return epoch + slots * self.interval
+
+class JobScheduler:
+    """
+    Runs registered jobs in background threads of the web workers
+
+    Schedules live in the jobs table, so they survive restarts and are shared
+    by every worker and host. Each process polls the table every
+    JOBS_POLL_SECONDS; a due job is claimed with a conditional UPDATE that
+    only one process can win, and the claim is a lease that expires if its
+    holder dies mid-run. Claimed jobs run on a small thread pool, never on a
+    request thread. A failed run is retried with exponential backoff (plus
+    jitter) up to JOBS_MAX_RETRIES times before the job waits for its next
+    scheduled run.
+
+    Creating the app starts nothing, so CLI commands, scripts and tests that
+    import it run no jobs. The server entry points (gunicorn.conf.py after
+    each worker loads the app, asgi.py in each uvicorn worker) call
+    ensure_started() when JOBS_ENABLED is set; `flask run-jobs` serves them
+    in a dedicated process instead.
+    """
+
+    def __init__(self, app=None):
+        self.enabled = False
+        self.poll_seconds = 30.0
+        self.max_retries = 5
+        self.retry_seconds = 60.0
+        self.workers = 2
+        self.jobs = {}
+        self.durations = Histogram(
+            'job_duration_seconds', 'Background job run time by job and outcome',
+            ('job', 'status'), DURATION_BUCKETS)
+        self._app = None
+        self._lock = threading.Lock()
+        self._thread = None
+        self._thread_pid = None
+        self._executor = None
+        self._running = set()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self._app = app
+        self.enabled = app.config.get('JOBS_ENABLED', True)
+        self.poll_seconds = app.config.get('JOBS_POLL_SECONDS', self.poll_seconds)
+        self.max_retries = app.config.get('JOBS_MAX_RETRIES', self.max_retries)
+        self.retry_seconds = app.config.get('JOBS_RETRY_SECONDS', self.retry_seconds)
+        self.workers = app.config.get('JOBS_WORKERS', self.workers)
+        app.extensions['job_scheduler'] = self
+
+    def job(self, name, interval, **options):
+        """
+        Register a job function
+
+        Args:
+            name (str): Unique job name, the key of its jobs row
+            interval (datetime.timedelta): Time between scheduled runs
+            **options: offset, lease and run_on_create for JobDefinition
+
+        Returns:
+            callable: Decorator returning the function unchanged
+        """
+        def decorator(fn):
+            self.jobs[name] = JobDefinition(name, fn, interval, **options)
+            return fn
+        return decorator
+
+    @property
+    def worker_id(self):
+        """Identifies this process in jobs.locked_by"""
+        return f'{socket.gethostname()}:{os.getpid()}'
+
+    def ensure_started(self):
+        """Start this process's polling thread and pool if jobs are enabled and they are not running"""
+        if not self.enabled or self._thread_pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread_pid == os.getpid():
+                return
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='job')
+            self._running = set()
+            self._thread = threading.Thread(target=self.serve, name='job-scheduler', daemon=True)
+            self._thread_pid = os.getpid()
+            self._thread.start()
+
+    def serve(self):
+        """Poll for due jobs forever, e.g. in a dedicated process (flask run-jobs)"""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='job')
+        while True:
+            try:
+                with self._app.app_context():
+                    for job in self.claim_due_jobs():
+                        self._running.add(job.name)
+                        self._executor.submit(self._run_in_context, job)
+            except Exception as e:
+                logger.warning("Job poll failed: %s", e)
+            time.sleep(self.poll_seconds)
+
+    def _run_in_context(self, job):
+        try:
+            with self._app.app_context():
+                self.run(job)
+        finally:
+            self._running.discard(job.name)
+
+    def ensure_jobs(self):
+        """Create the jobs rows of registered jobs that have none yet"""
+        existing = set(db.session.scalars(select(Job.name)))
+        now = datetime.utcnow()
+        for job in self.jobs.values():
+            if job.name in existing:
+                continue
+            try:
+                db.session.execute(insert(Job).values(
+                    name=job.name,
+                    next_run_at=now if job.run_on_create else job.next_run_after(now)
+                ))
+                db.session.commit()
+            except IntegrityError:
+                # Another worker created it first
+                db.session.rollback()
+
+    def claim(self, job, now=None, due_only=True):
+        """
+        Take the lease of a job if it is due and nobody holds it
+
+        Args:
+            job (JobDefinition): Job to claim
+            now (datetime.datetime): Current UTC time (defaults to now)
+            due_only (bool): Only claim if next_run_at has passed
+
+        Returns:
+            bool: True if this process now holds the job
+        """
+        now = now or datetime.utcnow()
+        conditions = [Job.name == job.name, or_(Job.locked_until.is_(None), Job.locked_until < now)]
+        if due_only:
+            conditions.append(Job.next_run_at <= now)
+        result = db.session.execute(
+            update(Job)
+            .where(*conditions)
+            .values(locked_by=self.worker_id, locked_until=now + job.lease, last_started_at=now)
+        )
+        db.session.commit()
+        return result.rowcount == 1
+
+    def claim_due_jobs(self):
+        """
+        Claim every registered job that is due and not running elsewhere
+
+        Returns:
+            list: JobDefinitions this process now holds
+        """
+        self.ensure_jobs()
+        now = datetime.utcnow()
+        due = db.session.scalars(
+            select(Job.name).where(Job.next_run_at <= now, or_(Job.locked_until.is_(None), Job.locked_until < now))
+        ).all()
+        db.session.rollback()
+        return [self.jobs[name] for name in due
+                if name in self.jobs and name not in self._running and self.claim(self.jobs[name], now)]
+
+    def run(self, job):
+        """
+        Run a claimed job, record its outcome and schedule its next run
+
+        Args:
+            job (JobDefinition): Job this process holds the lease of
+
+        Returns:
+            bool: True if the job succeeded
+        """
+        started = time.perf_counter()
+        error = None
+        try:
+            result = job.fn()
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            error = e
+        duration = time.perf_counter() - started
+
+        now = datetime.utcnow()
+        attempts = db.session.scalar(select(Job.attempts).where(Job.name == job.name)) or 0
+        if error is None:
+            self.durations.observe((job.name, 'ok'), duration)
+            logger.info("Job %s finished in %.3fs: %s", job.name, duration, result,
+                        extra={'event': 'job_finished', 'job': job.name, 'duration': duration})
+            values = {'attempts': 0, 'next_run_at': job.next_run_after(now), 'last_status': 'ok', 'last_error': None}
+        elif attempts < self.max_retries:
+            self.durations.observe((job.name, 'failed'), duration)
+            delay = self.retry_seconds * 2 ** attempts * random.uniform(0.8, 1.2)
+            logger.warning("Job %s failed (attempt %s), retrying in %.0fs: %s", job.name, attempts + 1, delay, error,
+                           extra={'event': 'job_failed', 'job': job.name, 'duration': duration})
+            values = {'attempts': attempts + 1, 'next_run_at': now + timedelta(seconds=delay),
+                      'last_status': 'retrying', 'last_error': str(error)[:MAX_ERROR_LENGTH]}
+        else:
+            self.durations.observe((job.name, 'failed'), duration)
+            logger.error("Job %s failed %s times, giving up until its next run: %s", job.name, attempts + 1, error,
+                         extra={'event': 'job_failed', 'job': job.name, 'duration': duration})
+            values = {'attempts': 0, 'next_run_at': job.next_run_after(now),
+                      'last_status': 'failed', 'last_error': str(error)[:MAX_ERROR_LENGTH]}
+
+        # Only the lease holder records the outcome; a run that outlived its
+        # lease may have been taken over by another worker
+        db.session.execute(
+            update(Job)
+            .where(Job.name == job.name, Job.locked_by == self.worker_id)
+            .values(locked_by=None, locked_until=None, last_finished_at=now, last_duration=duration, **values)
+        )
+        db.session.commit()
+        return error is None
+
+job_scheduler = JobScheduler()
+
+@job_scheduler.job('overdue_sweep', timedelta(days=1), run_on_create=True)
+def overdue_sweep():
+    """Materialize today's overdue counts right after midnight UTC"""
+    from tasks.counters import sweep_overdue
+    return f'{sweep_overdue()} users swept'
+
+@job_scheduler.job('purge_tombstones', timedelta(days=1), offset=timedelta(hours=3))
+def purge_tombstones_job():
+    """Delete tombstones older than TOMBSTONE_RETENTION_DAYS"""
+    from flask import current_app
+    from tasks.changes import purge_tombstones
+    return f"{purge_tombstones(current_app.config['TOMBSTONE_RETENTION_DAYS'])} tombstones purged"
+
+@job_scheduler.job('reconcile_counters', timedelta(days=7), offset=timedelta(hours=4), lease=timedelta(hours=4))
+def reconcile_counters_job():
+    """Rebuild counters that drifted from the tasks table"""
+    from tasks.counters import reconcile_counters
+    return f'{len(reconcile_counters())} drifted fields rebuilt'
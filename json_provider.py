@@ -0,0 +1,60 @@
+import time
+from datetime import date
+from flask.json.provider import DefaultJSONProvider
+from metrics import record_serialization
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional
+    orjson = None
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    JSON provider using orjson when available
+
+    Dates and datetimes are written in ISO 8601 (orjson does this natively;
+    the stdlib fallback converts them in default()). Output is compact unless
+    JSONIFY_PRETTYPRINT_REGULAR is set, and keys keep their insertion order
+    unless JSON_SORT_KEYS is set.
+    """
+
+    def __init__(self, app):
+        super().__init__(app)
+        self.sort_keys = app.config.get('JSON_SORT_KEYS', False)
+        self.compact = not app.config.get('JSONIFY_PRETTYPRINT_REGULAR', False)
+
+        self._orjson_options = 0
+        if orjson is not None:
+            self._orjson_options = orjson.OPT_NON_STR_KEYS
+            if self.sort_keys:
+                self._orjson_options |= orjson.OPT_SORT_KEYS
+            if not self.compact:
+                self._orjson_options |= orjson.OPT_INDENT_2
+
+    @staticmethod
+    def default(o):
+        if isinstance(o, date):
+            return o.isoformat()
+        return DefaultJSONProvider.default(o)
+
+    def dumps(self, obj, **kwargs):
+        if orjson is not None and not kwargs:
+            return orjson.dumps(obj, default=self.default, option=self._orjson_options).decode('utf-8')
+        return super().dumps(obj, **kwargs)
+
+    def loads(self, s, **kwargs):
+        if orjson is not None and not kwargs:
+            return orjson.loads(s)
+        return super().loads(s, **kwargs)
+
+    def response(self, *args, **kwargs):
+        started = time.perf_counter()
+        if orjson is None:
+            response = super().response(*args, **kwargs)
+        else:
+            # Hand the encoded bytes straight to the response, skipping str round trips
+            obj = self._prepare_response_obj(args, kwargs)
+            body = orjson.dumps(obj, default=self.default, option=self._orjson_options) + b'\n'
+            response = self._app.response_class(body, mimetype=self.mimetype)
+        record_serialization(time.perf_counter() - started)
+        return response
@@ -0,0 +1,203 @@
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+import sys
+import threading
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from flask import request, has_request_context
+
+# Arguments that cannot change between the logging call and formatting on
+# the listener thread; records with other arguments are rendered on enqueue
+IMMUTABLE_ARG_TYPES = (str, int, float, bool, type(None), BaseException)
+
+# LogRecord attributes that are not user supplied extra={...} fields
+RESERVED_ATTRS = frozenset(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {'message', 'asctime'}
+
+class JSONFormatter(logging.Formatter):
+    """
+    One JSON object per line
+
+    Carries the timestamp, level, logger name and message, the request
+    endpoint and method when logged during a request, the sample rate of
+    sampled records (so counts can be scaled back up), any extra={...}
+    fields and the formatted traceback.
+    """
+
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in RESERVED_ATTRS and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_info:
+            entry['exc_info'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+class RequestContextFilter(logging.Filter):
+    """Attach the endpoint and method while still on the request thread"""
+
+    def filter(self, record):
+        if has_request_context():
+            record.endpoint = request.endpoint
+            record.method = request.method
+        return True
+
+class SamplingFilter(logging.Filter):
+    """
+    Keep a share of INFO and DEBUG records of chosen loggers
+
+    Warnings and errors are always kept.
+
+    Args:
+        rates (dict): Logger name (or parent name) to the fraction of records kept
+    """
+
+    def __init__(self, rates):
+        super().__init__()
+        self.rates = rates
+        self.sampled_out = 0
+
+    def _rate(self, name):
+        while name:
+            if name in self.rates:
+                return self.rates[name]
+            name = name.rpartition('.')[0]
+        return None
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self._rate(record.name)
+        if rate is None or rate >= 1:
+            return True
+        if random.random() < rate:
+            record.sample_rate = rate
+            return True
+        self.sampled_out += 1
+        return False
+
+class _Listener(QueueListener):
+    # The stop sentinel must get through even when the queue is full
+    def enqueue_sentinel(self):
+        self.queue.put(self._sentinel)
+
+class NonBlockingQueueHandler(QueueHandler):
+    """
+    QueueHandler that never blocks or formats in the logging thread
+
+    Records are put on a bounded queue and dropped (and counted) when it is
+    full. Messages are formatted by the listener thread, unless an argument
+    is mutable and could change before then. The listener thread is started
+    lazily and again after fork, since threads do not survive it (gunicorn
+    preload).
+    """
+
+    def __init__(self, handlers, maxsize):
+        super().__init__(queue.Queue(maxsize))
+        self.handlers = handlers
+        self.listener = None
+        self.dropped = 0
+        self._listener_pid = None
+        self._lock = threading.Lock()
+
+    def _ensure_listener(self):
+        if self._listener_pid == os.getpid():
+            return
+        with self._lock:
+            if self._listener_pid != os.getpid():
+                # Records queued before fork belong to the parent's listener
+                self.queue = queue.Queue(self.queue.maxsize)
+                self.listener = _Listener(self.queue, *self.handlers, respect_handler_level=True)
+                self.listener.start()
+                self._listener_pid = os.getpid()
+
+    def prepare(self, record):
+        args = record.args
+        if args:
+            values = args.values() if isinstance(args, dict) else args
+            if not all(isinstance(value, IMMUTABLE_ARG_TYPES) for value in values):
+                record.msg = record.getMessage()
+                record.args = None
+        return record
+
+    def enqueue(self, record):
+        self._ensure_listener()
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def stop(self):
+        """Flush queued records and stop the listener thread"""
+        with self._lock:
+            if self.listener is not None and self._listener_pid == os.getpid():
+                self.listener.stop()
+            self.listener = None
+            self._listener_pid = None
+
+def parse_levels(value):
+    """
+    Parse 'name=LEVEL,name=LEVEL' into a dict
+
+    Args:
+        value (str): Comma separated logger=value pairs
+
+    Returns:
+        dict: Logger name to value
+    """
+    levels = {}
+    for item in value.split(','):
+        if '=' in item:
+            name, level = item.split('=', 1)
+            levels[name.strip()] = level.strip()
+    return levels
+
+def configure_logging(config):
+    """
+    Route all logging through a queue to a stderr handler on a listener thread
+
+    Args:
+        config: Config class, read for LOG_LEVEL, LOG_LEVELS, LOG_FORMAT,
+            LOG_SAMPLE_RATES and LOG_QUEUE_SIZE
+
+    Returns:
+        NonBlockingQueueHandler: The handler installed on the root logger
+    """
+    stream_handler = logging.StreamHandler(sys.stderr)
+    if config.LOG_FORMAT == 'json':
+        stream_handler.setFormatter(JSONFormatter())
+    else:
+        stream_handler.setFormatter(logging.Formatter('%(levelname)s:%(name)s:%(message)s'))
+
+    handler = NonBlockingQueueHandler([stream_handler], config.LOG_QUEUE_SIZE)
+    handler.addFilter(SamplingFilter(config.LOG_SAMPLE_RATES))
+    handler.addFilter(RequestContextFilter())
+
+    root = logging.getLogger()
+    for existing in root.handlers[:]:
+        root.removeHandler(existing)
+        if isinstance(existing, NonBlockingQueueHandler):
+            existing.stop()
+    root.addHandler(handler)
+    root.setLevel(config.LOG_LEVEL)
+    for name, level in config.LOG_LEVELS.items():
+        logging.getLogger(name).setLevel(level.upper())
+
+    atexit.register(handler.stop)
+    return handler
+
+def logging_stats():
+    """Dropped and sampled-out record counts of the installed queue handler"""
+    for handler in logging.getLogger().handlers:
+        if isinstance(handler, NonBlockingQueueHandler):
+            sampled_out = sum(f.sampled_out for f in handler.filters if isinstance(f, SamplingFilter))
+            return {'dropped': handler.dropped, 'sampled_out': sampled_out}
+    return {'dropped': 0, 'sampled_out': 0}
@@ -0,0 +1,207 @@
+import threading
+import time
+from flask import g, request, has_request_context, Response
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Histogram upper bounds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 25, 50, 100)
+BYTES_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels) + '}'
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Histogram:
+    """
+    Prometheus histogram with labels
+
+    Args:
+        name (str): Metric name
+        documentation (str): HELP text
+        labelnames (tuple): Label names, in the order values are passed to observe()
+        buckets (tuple): Upper bounds of the buckets (+Inf is added)
+    """
+
+    def __init__(self, name, documentation, labelnames, buckets):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = tuple(buckets) + (float('inf'),)
+        self._lock = threading.Lock()
+        self._series = {}
+
+    def observe(self, labelvalues, value):
+        """Record one observation for the label values"""
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                series = self._series[labelvalues] = {'buckets': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series['buckets'][i] += 1
+                    break
+            series['sum'] += value
+            series['count'] += 1
+
+    def expose(self):
+        """Return the metric in the Prometheus text format"""
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            series = {labelvalues: {'buckets': list(data['buckets']), 'sum': data['sum'], 'count': data['count']}
+                      for labelvalues, data in self._series.items()}
+
+        for labelvalues, data in sorted(series.items()):
+            labels = list(zip(self.labelnames, labelvalues))
+            cumulative = 0
+            for bound, count in zip(self.buckets, data['buckets']):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_format_labels(labels + [('le', _format_value(bound))])} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {_format_value(data['sum'])}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {data['count']}")
+        return lines
+
+def stats_collector(name, documentation, stats, exclude=()):
+    """
+    Build a collector exposing a stats() dict of counters as one labeled metric
+
+    Args:
+        name (str): Metric name
+        documentation (str): HELP text
+        stats (callable): Returns a dict of counter name to value, e.g. cache hits/misses
+        exclude (tuple): Keys that are not counters (e.g. derived ratios)
+
+    Returns:
+        callable: Collector for RequestMetrics.add_collector()
+    """
+    def collect():
+        lines = [f'# HELP {name} {documentation}', f'# TYPE {name} counter']
+        for key, value in sorted(stats().items()):
+            if key not in exclude:
+                lines.append(f"{name}{_format_labels([('event', key)])} {_format_value(value)}")
+        return lines
+    return collect
+
+def record_serialization(seconds):
+    """Add JSON encoding time to the current request's metrics"""
+    if has_request_context():
+        timings = g.get('_request_metrics')
+        if timings is not None:
+            timings['serialize_seconds'] += seconds
+
+class RequestMetrics:
+    """
+    Per-endpoint request metrics exposed at /metrics in the Prometheus format
+
+    Records latency, SQL query count and time (from SQLAlchemy cursor events),
+    JSON serialization time and response bytes for every request, and adds a
+    Server-Timing header so the same numbers show up in browser dev tools.
+    Metrics live in one worker process, like the memory cache backend.
+    """
+
+    def __init__(self, app=None):
+        self.server_timing = True
+        self.latency = Histogram(
+            'http_request_duration_seconds', 'Time spent handling the request',
+            ('endpoint', 'method', 'status'), LATENCY_BUCKETS)
+        self.sql_queries = Histogram(
+            'http_request_sql_queries', 'SQL statements executed per request',
+            ('endpoint',), QUERY_COUNT_BUCKETS)
+        self.sql_seconds = Histogram(
+            'http_request_sql_seconds', 'Time spent in SQL statements per request',
+            ('endpoint',), LATENCY_BUCKETS)
+        self.serialize_seconds = Histogram(
+            'http_response_serialization_seconds', 'Time spent encoding JSON responses',
+            ('endpoint',), LATENCY_BUCKETS)
+        self.response_bytes = Histogram(
+            'http_response_bytes', 'Response body size (streamed responses excluded)',
+            ('endpoint',), BYTES_BUCKETS)
+        self._collectors = []
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.server_timing = app.config.get('SERVER_TIMING_HEADER', True)
+        app.before_request(self._start_request)
+        app.after_request(self._finish_request)
+        app.add_url_rule(app.config.get('METRICS_PATH', '/metrics'), 'metrics', self.metrics_view)
+        app.extensions['request_metrics'] = self
+
+    def add_collector(self, collector):
+        """Register a callable returning extra exposition lines on each scrape"""
+        self._collectors.append(collector)
+
+    def _start_request(self):
+        g._request_metrics = {
+            'start': time.perf_counter(),
+            'sql_queries': 0,
+            'sql_seconds': 0.0,
+            'serialize_seconds': 0.0,
+        }
+
+    def _finish_request(self, response):
+        timings = g.pop('_request_metrics', None)
+        if timings is None or request.endpoint == 'metrics':
+            return response
+
+        duration = time.perf_counter() - timings['start']
+        endpoint = request.endpoint or 'unmatched'
+
+        self.latency.observe((endpoint, request.method, str(response.status_code)), duration)
+        self.sql_queries.observe((endpoint,), timings['sql_queries'])
+        self.sql_seconds.observe((endpoint,), timings['sql_seconds'])
+        self.serialize_seconds.observe((endpoint,), timings['serialize_seconds'])
+        if not response.is_streamed:
+            self.response_bytes.observe((endpoint,), response.calculate_content_length() or 0)
+
+        if self.server_timing:
+            response.headers['Server-Timing'] = ', '.join((
+                f"db;dur={timings['sql_seconds'] * 1000:.2f};desc=\"{timings['sql_queries']} queries\"",
+                f"serialize;dur={timings['serialize_seconds'] * 1000:.2f}",
+                f"total;dur={duration * 1000:.2f}",
+            ))
+        return response
+
+    def expose(self):
+        """Return every metric in the Prometheus text format"""
+        lines = []
+        for histogram in (self.latency, self.sql_queries, self.sql_seconds, self.serialize_seconds, self.response_bytes):
+            lines.extend(histogram.expose())
+        for collector in self._collectors:
+            lines.extend(collector())
+        return '\n'.join(lines) + '\n'
+
+    def metrics_view(self):
+        return Response(self.expose(), mimetype='text/plain; version=0.0.4')
+
+request_metrics = RequestMetrics()
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info['query_start'].pop()
+    # SQL run outside a request (CLI commands, the write queue thread) is not attributed
+    if has_request_context():
+        timings = g.get('_request_metrics')
+        if timings is not None:
+            timings['sql_queries'] += 1
+            timings['sql_seconds'] += elapsed
+
+@event.listens_for(Engine, 'handle_error')
+def _handle_error(exception_context):
+    connection = exception_context.connection
+    if connection is not None and connection.info.get('query_start'):
+        connection.info['query_start'].pop()
@@ -0,0 +1,80 @@
+from sqlalchemy import inspect
+from sqlalchemy.schema import CreateColumn
+from app import db
+import logging
+
+logger = logging.getLogger(__name__)
+
+def ensure_columns(engine=None):
+    """
+    Add declared columns that are missing from existing tables
+
+    Only columns that are nullable or have a server default can be added
+    to a populated table; others are logged and skipped.
+
+    Args:
+        engine (sqlalchemy.engine.Engine): Engine to migrate (defaults to db.engine)
+
+    Returns:
+        list: "table.column" names of the columns that were added
+    """
+    engine = engine or db.engine
+    inspector = inspect(engine)
+    added = []
+
+    for table in db.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {column['name'] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            if not column.nullable and column.server_default is None:
+                logger.warning("Cannot add non-nullable column %s.%s without a server default", table.name, column.name)
+                continue
+            ddl = CreateColumn(column).compile(dialect=engine.dialect)
+            with engine.begin() as connection:
+                connection.exec_driver_sql(f'ALTER TABLE {table.name} ADD COLUMN {ddl}')
+            added.append(f'{table.name}.{column.name}')
+            logger.info("Added column %s to %s", column.name, table.name)
+
+    return added
+
+def ensure_indexes(engine=None):
+    """
+    Create declared indexes that are missing from an existing database
+
+    db.create_all() only creates indexes together with new tables, so
+    databases created before an index was declared never receive it.
+
+    Args:
+        engine (sqlalchemy.engine.Engine): Engine to migrate (defaults to db.engine)
+
+    Returns:
+        list: Names of the indexes that were created
+    """
+    engine = engine or db.engine
+    created = []
+
+    for table in db.metadata.sorted_tables:
+        existing = {index['name'] for index in inspect(engine).get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name in existing:
+                continue
+            index.create(bind=engine)
+            created.append(index.name)
+            logger.info("Created index %s on %s", index.name, table.name)
+
+    return created
+
+def ensure_schema(engine=None):
+    """
+    Bring an existing database up to the declared schema
+
+    Args:
+        engine (sqlalchemy.engine.Engine): Engine to migrate (defaults to db.engine)
+
+    Returns:
+        list: Names of the columns and indexes that were created
+    """
+    return ensure_columns(engine) + ensure_indexes(engine)
@@ -1,6 +1,6 @@
 from datetime import datetime
 from app import db
-from werkzeug.security import generate_password_hash, check_password_hash
+from hashing import password_hasher
 
 class User(db.Model):
     """User model for authentication"""
@@ -17,11 +17,22 @@ class User(db.Model):
     
     def set_password(self, password):
         """Hash and Set password"""
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = password_hasher.hash(password)
     
     def check_password(self, password):
         """Check if provided password matches hash"""
-        return check_password_hash(self.password_hash, password)
+        return password_hasher.verify(self.password_hash, password)
+    
+    def rehash_password_if_needed(self, password):
+        """Re-hash a verified password if its stored hash uses outdated parameters
+        
+        Returns:
+            bool: True if the hash was replaced (caller must commit)
+        """
+        if not password_hasher.needs_rehash(self.password_hash):
+            return False
+        self.set_password(password)
+        return True
     
     def to_dict(self):
         """Convert user to dictionary (excluding sensitive data)"""
@@ -46,6 +57,8 @@ class Task(db.Model):
     completed = db.Column(db.Boolean, default=False, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Owner's TaskCounter.version of the last write, for GET /api/tasks/changes
+    change_version = db.Column(db.Integer, default=0, server_default='0', nullable=False)
     
     # Foreign key to user
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -63,5 +76,115 @@ class Task(db.Model):
             'user_id': self.user_id
         }
     
+    @classmethod
+    def columns(cls):
+        """Columns selected for list responses, in to_dict() order"""
+        return (
+            cls.id,
+            cls.title,
+            cls.description,
+            cls.due_date,
+            cls.completed,
+            cls.created_at,
+            cls.updated_at,
+            cls.user_id
+        )
+    
+    @staticmethod
+    def row_to_dict(row):
+        """Convert a row of Task.columns() to a dictionary without hydrating a Task
+        
+        Dates are left as date/datetime objects for the JSON provider to encode.
+        """
+        return {
+            'id': row.id,
+            'title': row.title,
+            'description': row.description,
+            'due_date': row.due_date,
+            'completed': row.completed,
+            'created_at': row.created_at,
+            'updated_at': row.updated_at,
+            'user_id': row.user_id
+        }
+    
     def __repr__(self):
         return f'<Task {self.title}>'
+
+class TaskCounter(db.Model):
+    """Per-user task counters maintained on every task write"""
+    __tablename__ = 'task_counters'
+    
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    total = db.Column(db.Integer, default=0, nullable=False)
+    completed = db.Column(db.Integer, default=0, nullable=False)
+    # Sum of (updated_at - created_at) over completed tasks, for average time-to-complete
+    completion_seconds = db.Column(db.Float, default=0.0, nullable=False)
+    # Bumped by every task write; identifies the state of the user's task list
+    version = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    # Highest version whose tombstones were purged; older sync tokens cannot be served
+    purged_version = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    # Pending tasks due before overdue_as_of, set by the daily overdue sweep (jobs.py)
+    overdue = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    overdue_as_of = db.Column(db.Date, nullable=True)
+    
+    def __repr__(self):
+        return f'<TaskCounter user={self.user_id} total={self.total}>'
+
+class TaskTombstone(db.Model):
+    """Deleted task ids, kept for TOMBSTONE_RETENTION_DAYS so clients can sync deletions"""
+    __tablename__ = 'task_tombstones'
+    
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    version = db.Column(db.Integer, primary_key=True)
+    task_id = db.Column(db.Integer, primary_key=True)
+    deleted_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
+    
+    def __repr__(self):
+        return f'<TaskTombstone user={self.user_id} task={self.task_id} version={self.version}>'
+
+class Job(db.Model):
+    """Schedule, lease and last outcome of a background job, shared by all workers"""
+    __tablename__ = 'jobs'
+    
+    name = db.Column(db.String(80), primary_key=True)
+    next_run_at = db.Column(db.DateTime, nullable=False)
+    # Consecutive failures of the current run, for retry backoff
+    attempts = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    # Worker running the job and when its claim expires
+    locked_by = db.Column(db.String(120), nullable=True)
+    locked_until = db.Column(db.DateTime, nullable=True)
+    last_started_at = db.Column(db.DateTime, nullable=True)
+    last_finished_at = db.Column(db.DateTime, nullable=True)
+    last_duration = db.Column(db.Float, nullable=True)
+    last_status = db.Column(db.String(20), nullable=True)
+    last_error = db.Column(db.Text, nullable=True)
+    
+    def __repr__(self):
+        return f'<Job {self.name} next={self.next_run_at}>'
+
+class TaskDueCounter(db.Model):
+    """Per-user count of pending tasks for each due date (overdue candidates)"""
+    __tablename__ = 'task_due_counters'
+    
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    due_date = db.Column(db.Date, primary_key=True)
+    pending = db.Column(db.Integer, default=0, nullable=False)
+    
+    def __repr__(self):
+        return f'<TaskDueCounter user={self.user_id} due={self.due_date} pending={self.pending}>'
+
+# Composite indexes backing the per-user task queries in tasks/routes.py
+db.Index('ix_tasks_user_id_created_at', Task.user_id, Task.created_at.desc(), Task.id.desc())
+db.Index('ix_tasks_user_id_completed', Task.user_id, Task.completed)
+db.Index('ix_tasks_user_id_change_version', Task.user_id, Task.change_version, Task.id)
+# Filtered and sorted lists (tasks/filters.py): one index per range/sort column
+db.Index('ix_tasks_user_id_due_date', Task.user_id, Task.due_date, Task.id)
+db.Index('ix_tasks_user_id_updated_at', Task.user_id, Task.updated_at, Task.id)
+db.Index('ix_tasks_user_id_title', Task.user_id, Task.title, Task.id)
+db.Index(
+    'ix_tasks_user_id_due_date_pending',
+    Task.user_id,
+    Task.due_date,
+    sqlite_where=db.text('completed = 0'),
+    postgresql_where=db.text('NOT completed')
+)
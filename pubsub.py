@@ -0,0 +1,236 @@
+import os
+import queue
+import threading
+import time
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+import logging
+
+logger = logging.getLogger(__name__)
+
+class PubSubBackend:
+    """
+    Interface for carrying task change notifications between worker processes
+
+    A notification is a (user_id, version) pair: the user's TaskCounter.version
+    after a committed write. Streams read the changes themselves, so a backend
+    may deliver a version twice or coalesce several into the newest one.
+    """
+
+    def start(self, hub):
+        """Begin calling hub.deliver() for writes committed in other processes"""
+        raise NotImplementedError
+
+    def publish(self, user_id, version):
+        """Announce a write committed in this process to the other processes"""
+        raise NotImplementedError
+
+class LocalPubSubBackend(PubSubBackend):
+    """
+    Notifications stay in the process that committed the write
+
+    Enough for a single worker process and for tests; with several gunicorn
+    workers a stream only sees writes handled by its own worker.
+    """
+
+    def start(self, hub):
+        pass
+
+    def publish(self, user_id, version):
+        pass
+
+class DatabasePubSubBackend(PubSubBackend):
+    """
+    Poll the counter versions of users with open streams
+
+    One thread per worker process reads the TaskCounter rows of the users it
+    has streams for every poll interval (one query, none while no stream is
+    open), so writes from any worker or host reach every stream without
+    extra infrastructure. Delivery lags by up to the interval.
+    """
+
+    # Users per IN (...) list
+    CHUNK_SIZE = 500
+
+    def __init__(self, app, interval=1.0):
+        self.app = app
+        self.interval = interval
+
+    def start(self, hub):
+        thread = threading.Thread(target=self._poll, args=(hub,), name='pubsub-poller', daemon=True)
+        thread.start()
+
+    def publish(self, user_id, version):
+        # Other workers pick the new version up on their next poll
+        pass
+
+    def _poll(self, hub):
+        from app import db
+        from models import TaskCounter
+
+        polled = {}
+        while True:
+            time.sleep(self.interval)
+            user_ids = hub.subscribed_users()
+            if not user_ids:
+                polled.clear()
+                continue
+            try:
+                with self.app.app_context():
+                    versions = {}
+                    for start in range(0, len(user_ids), self.CHUNK_SIZE):
+                        versions.update(db.session.execute(
+                            select(TaskCounter.user_id, TaskCounter.version)
+                            .where(TaskCounter.user_id.in_(user_ids[start:start + self.CHUNK_SIZE]))
+                        ).all())
+            except Exception as e:
+                logger.warning("Task version poll failed: %s", e)
+                continue
+
+            # Announce a user's first poll too: a write may have landed
+            # between the stream's catch-up read and this poll
+            for user_id, version in versions.items():
+                if polled.get(user_id) != version:
+                    hub.deliver(user_id, version)
+            polled = versions
+
+class Subscription:
+    """
+    Notifications for one stream connection
+
+    The buffer is bounded. Dropping a notification on a full buffer loses
+    nothing: the stream reads every change up to the latest committed version
+    once it takes the notifications that are already queued.
+    """
+
+    def __init__(self, user_id, buffer_size):
+        self.user_id = user_id
+        self._buffer = queue.Queue(maxsize=buffer_size)
+
+    def notify(self, version):
+        """Queue a notification; returns False if the buffer was full"""
+        try:
+            self._buffer.put_nowait(version)
+            return True
+        except queue.Full:
+            return False
+
+    def wait(self, timeout):
+        """
+        Wait for notifications
+
+        Returns:
+            int or None: Newest notified version, or None after timeout seconds without one
+        """
+        try:
+            newest = self._buffer.get(timeout=timeout)
+        except queue.Empty:
+            return None
+        while True:
+            try:
+                newest = max(newest, self._buffer.get_nowait())
+            except queue.Empty:
+                return newest
+
+class PubSub:
+    """Fans task change notifications out to the open streams of each user in this process"""
+
+    def __init__(self, app=None):
+        self.backend = LocalPubSubBackend()
+        self.buffer_size = 100
+        self.max_connections = 100
+        self._lock = threading.Lock()
+        self._subscriptions = {}
+        self._backend_pid = None
+        self._counters = {'opened': 0, 'closed': 0, 'rejected': 0, 'notifications': 0, 'dropped': 0}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        backend = app.config.get('STREAM_BACKEND', 'database')
+        self.buffer_size = app.config.get('STREAM_BUFFER_SIZE', self.buffer_size)
+        self.max_connections = app.config.get('STREAM_MAX_CONNECTIONS', self.max_connections)
+
+        if backend == 'database':
+            self.backend = DatabasePubSubBackend(app, app.config.get('STREAM_POLL_INTERVAL', 1.0))
+        elif backend == 'local':
+            self.backend = LocalPubSubBackend()
+        else:
+            raise ValueError(f"Unknown STREAM_BACKEND: {backend}")
+
+        app.extensions['pubsub'] = self
+
+    def _count(self, name, amount=1):
+        self._counters[name] += amount
+
+    def subscribe(self, user_id):
+        """
+        Open a subscription for a stream connection
+
+        Args:
+            user_id (int): User whose task changes are streamed
+
+        Returns:
+            Subscription or None: None when this process already serves
+            STREAM_MAX_CONNECTIONS streams
+        """
+        with self._lock:
+            if sum(len(subscriptions) for subscriptions in self._subscriptions.values()) >= self.max_connections:
+                self._count('rejected')
+                return None
+            # Threads do not survive fork, so each (gunicorn) worker process starts its own
+            if self._backend_pid != os.getpid():
+                self._backend_pid = os.getpid()
+                self.backend.start(self)
+            subscription = Subscription(user_id, self.buffer_size)
+            self._subscriptions.setdefault(user_id, set()).add(subscription)
+            self._count('opened')
+        return subscription
+
+    def unsubscribe(self, subscription):
+        """Close a subscription when its stream ends"""
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.user_id)
+            if subscriptions is not None and subscription in subscriptions:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscriptions[subscription.user_id]
+                self._count('closed')
+
+    def subscribed_users(self):
+        """Users with at least one open stream in this process"""
+        with self._lock:
+            return list(self._subscriptions)
+
+    def publish(self, user_id, version):
+        """Notify streams in this process and, through the backend, in the others"""
+        self.deliver(user_id, version)
+        try:
+            self.backend.publish(user_id, version)
+        except Exception as e:
+            logger.warning("Publishing task version of user %s failed: %s", user_id, e)
+
+    def deliver(self, user_id, version):
+        """Notify this process's streams of a user"""
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(user_id, ()))
+            dropped = sum(not subscription.notify(version) for subscription in subscriptions)
+            self._count('notifications', len(subscriptions))
+            self._count('dropped', dropped)
+
+    def stats(self):
+        """Return stream connection and notification counters"""
+        with self._lock:
+            return dict(self._counters)
+
+pubsub = PubSub()
+
+@event.listens_for(Session, 'after_commit')
+def _publish_task_versions(session):
+    """Announce the new versions of users whose tasks changed in the committed transaction"""
+    for user_id, version in session.info.pop('task_versions', {}).items():
+        pubsub.publish(user_id, version)
+
+@event.listens_for(Session, 'after_rollback')
+def _forget_task_versions(session):
+    session.info.pop('task_versions', None)
@@ -0,0 +1,140 @@
+import time
+from functools import wraps
+from flask import g, request, has_request_context
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Statements kept per request for the budget report
+MAX_RECORDED_STATEMENTS = 50
+
+class QueryBudgetExceeded(Exception):
+    """Raised in 'raise' mode when a view issues more SQL statements than its budget"""
+
+class QueryGuard:
+    """
+    Per-view SQL statement budgets and a slow query log
+
+    Views declare how many statements they may issue with @query_guard.budget(n).
+    A view going over budget, typically an N+1 from a lazy relationship touched
+    while serializing, is logged with its statements ('warn') or fails the
+    request ('raise', for tests and CI). Statements slower than SLOW_QUERY_MS
+    are logged with their query plan.
+    """
+
+    def __init__(self, app=None):
+        self.mode = 'off'
+        self.slow_query_seconds = None
+        self.budgets = {}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.mode = app.config.get('QUERY_BUDGET_MODE', 'off')
+        if self.mode not in ('off', 'warn', 'raise'):
+            raise ValueError(f"Unknown QUERY_BUDGET_MODE: {self.mode}")
+        slow_query_ms = app.config.get('SLOW_QUERY_MS', 0)
+        self.slow_query_seconds = slow_query_ms / 1000 if slow_query_ms else None
+
+        if self.mode != 'off' or self.slow_query_seconds is not None:
+            self.install()
+        app.extensions['query_guard'] = self
+
+    def install(self):
+        """Start observing statements on every engine"""
+        for name, listener in (('before_cursor_execute', _before_cursor_execute),
+                               ('after_cursor_execute', _after_cursor_execute)):
+            if not event.contains(Engine, name, listener):
+                event.listen(Engine, name, listener)
+
+    def budget(self, limit):
+        """
+        Declare the maximum number of SQL statements a view may issue
+
+        Must be applied below @jwt_required() and any response cache, so only
+        the view's own statements are counted.
+
+        Args:
+            limit (int or callable): Statement budget, or a function of no
+                arguments returning it for the current request
+        """
+        def decorator(view):
+            self.budgets[view.__name__] = limit
+
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                if self.mode == 'off':
+                    return view(*args, **kwargs)
+
+                # A budgeted function called from another one counts towards both
+                outer = g.get('_query_budget')
+                g._query_budget = issued = {'count': 0, 'statements': [], 'outer': outer}
+                try:
+                    response = view(*args, **kwargs)
+                finally:
+                    g._query_budget = outer
+                self._check(view.__name__, limit() if callable(limit) else limit, issued)
+                return response
+            return wrapper
+        return decorator
+
+    def _check(self, name, limit, issued):
+        if issued['count'] <= limit:
+            return
+
+        message = f"{name} issued {issued['count']} SQL statements, budget is {limit} ({request.full_path})"
+        listing = '\n'.join(f"  {i + 1}. {statement}" for i, statement in enumerate(issued['statements']))
+        if self.mode == 'raise':
+            raise QueryBudgetExceeded(f"{message}\n{listing}")
+        logger.warning("%s\n%s", message, listing)
+
+    def report_slow_query(self, connection, statement, parameters, elapsed):
+        """Log a slow statement with its query plan"""
+        plan = []
+        if statement.lstrip().upper().startswith(('SELECT', 'WITH')):
+            from indexes import plan_statement
+
+            plan_sql, column = plan_statement(connection.dialect.name, statement)
+            cursor = connection.connection.cursor()
+            try:
+                cursor.execute(plan_sql, parameters)
+                plan = [str(row[column]) for row in cursor.fetchall()]
+            except Exception as e:
+                plan = [f"EXPLAIN failed: {str(e)}"]
+            finally:
+                cursor.close()
+
+        endpoint = request.endpoint if has_request_context() else None
+        lines = '\n'.join(f"  {line}" for line in plan)
+        logger.warning("Slow query (%.1f ms, endpoint %s): %s\n%s", elapsed * 1000, endpoint, statement, lines)
+
+query_guard = QueryGuard()
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('guard_query_start', []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get('guard_query_start')
+    if not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+
+    if has_request_context():
+        issued = g.get('_query_budget')
+        while issued is not None:
+            issued['count'] += 1
+            if len(issued['statements']) < MAX_RECORDED_STATEMENTS:
+                issued['statements'].append(statement)
+            issued = issued['outer']
+
+    threshold = query_guard.slow_query_seconds
+    if threshold is not None and elapsed >= threshold and not executemany:
+        query_guard.report_slow_query(conn, statement, parameters, elapsed)
+
+@event.listens_for(Engine, 'handle_error')
+def _handle_error(exception_context):
+    connection = exception_context.connection
+    if connection is not None and connection.info.get('guard_query_start'):
+        connection.info['guard_query_start'].pop()
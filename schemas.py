@@ -1,5 +1,6 @@
-from marshmallow import Schema, fields, validate, validates, ValidationError
+from marshmallow import Schema, fields, validate, validates, validates_schema, ValidationError, EXCLUDE
 import re
+from datetime import timezone
 
 class UserRegistrationSchema(Schema):
     """Schema for user registration validation"""
@@ -61,6 +62,65 @@ class TaskCreateSchema(Schema):
     )
     completed = fields.Bool(load_default=False)
 
+# Columns GET /api/tasks can be sorted by, and the order used without ?sort
+TASK_SORT_FIELDS = ('created_at', 'updated_at', 'due_date', 'title')
+DEFAULT_TASK_SORT = '-created_at'
+
+def task_range_columns(filters):
+    """Columns constrained to a range by loaded TaskListQuerySchema filters"""
+    columns = []
+    if 'due_from' in filters or 'due_to' in filters or filters.get('overdue'):
+        columns.append('due_date')
+    if 'updated_since' in filters:
+        columns.append('updated_at')
+    return columns
+
+class TaskListQuerySchema(Schema):
+    """Schema for the filter and sort parameters of GET /api/tasks
+    
+    Every accepted combination is served by one (user_id, column, id) index:
+    range filters (due_from/due_to/overdue on due_date, updated_since on
+    updated_at) can only be combined with sorting on the same column, and
+    without an explicit sort the results are ordered by the filtered column.
+    """
+    class Meta:
+        unknown = EXCLUDE
+    
+    completed = fields.Bool()
+    due_from = fields.Date()
+    due_to = fields.Date()
+    overdue = fields.Bool()
+    updated_since = fields.AwareDateTime(default_timezone=timezone.utc)
+    sort = fields.Str(validate=validate.OneOf(
+        [f'{direction}{name}' for name in TASK_SORT_FIELDS for direction in ('', '-')],
+        error="Sort must be one of created_at, updated_at, due_date or title, prefixed with - for descending"
+    ))
+    q = fields.Str()
+    cursor = fields.Str()
+    
+    @validates_schema
+    def validate_combination(self, data, **kwargs):
+        """Reject filter and sort combinations that no single index can serve"""
+        if data.get('overdue') and data.get('completed'):
+            raise ValidationError('overdue cannot be combined with completed=true', 'overdue')
+        if 'due_from' in data and 'due_to' in data and data['due_from'] > data['due_to']:
+            raise ValidationError('due_from must not be after due_to', 'due_from')
+        
+        ranges = task_range_columns(data)
+        if len(ranges) > 1:
+            raise ValidationError('Filter on either due dates or updated_since, not both', 'updated_since')
+        sort_column = data['sort'].lstrip('-') if 'sort' in data else None
+        if ranges and sort_column and sort_column not in ranges:
+            raise ValidationError(
+                f"Results filtered on {ranges[0]} can only be sorted by {ranges[0]} or -{ranges[0]}", 'sort'
+            )
+        if 'q' in data and 'sort' in data:
+            raise ValidationError('Search results are ordered by relevance and cannot be sorted', 'sort')
+        if 'q' in data and 'cursor' in data:
+            raise ValidationError('Search results are paged with page and per_page, not a cursor', 'cursor')
+        if 'cursor' in data and (ranges or data.get('sort', DEFAULT_TASK_SORT) != DEFAULT_TASK_SORT):
+            raise ValidationError('Cursor pagination only supports the default sort and no range filters', 'cursor')
+
 class TaskUpdateSchema(Schema):
     """Schema for task update validation"""
     title = fields.Str(
@@ -77,3 +137,15 @@ class TaskUpdateSchema(Schema):
         )
     )
     completed = fields.Bool()
+
+class TaskBatchUpdateSchema(TaskUpdateSchema):
+    """Schema for one item of a batch task update"""
+    id = fields.Int(required=True, strict=True)
+
+class TaskBatchDeleteSchema(Schema):
+    """Schema for batch task deletion"""
+    ids = fields.List(
+        fields.Int(strict=True),
+        required=True,
+        validate=validate.Length(min=1, error="At least one task id is required")
+    )
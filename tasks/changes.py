@@ -0,0 +1,133 @@
+from datetime import datetime, timedelta
+from sqlalchemy import select, update, delete, exists, func, tuple_
+from app import db
+from models import Task, TaskCounter, TaskTombstone
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Every task write stamps the rows it touched with the owner's new
+# TaskCounter.version (tasks/counters.py), and deletes leave a tombstone under
+# that version. A client that has caught up to version V only needs tasks and
+# tombstones with a version above V. Pages are keyed on (version, id), so a
+# version with more rows than fit on a page is split across pages.
+#
+# SQLite may give a new task the id of a deleted one. A tombstone whose id
+# belongs to a live task written later (up to the version read) is dropped:
+# the live row replaces the client's copy anyway, so a page never lists an id
+# both as changed and as deleted.
+
+def read_changes(user_id, since, limit):
+    """
+    Read one page of a user's task changes after a sync position
+
+    Tasks and tombstones are read up to the counter version seen first, so a
+    write committing in between shows up whole on the next sync instead of
+    half on this one.
+
+    Args:
+        user_id (int): Owner of the tasks
+        since (tuple): (version, task_id or None) from decode_sync_token(),
+            or None for a full sync
+        limit (int): Maximum number of changed and deleted tasks on the page
+
+    Returns:
+        dict or None: 'entries' as (version, task_id, task dict or None for
+        a deleted task) in sync order, 'version' and 'task_id' of the next
+        position and 'has_more', or None if tombstones after since have
+        already been purged
+    """
+    counter = db.session.execute(
+        select(TaskCounter.version, TaskCounter.purged_version).where(TaskCounter.user_id == user_id)
+    ).first()
+    current, purged = counter if counter else (0, 0)
+
+    if since is not None:
+        version, task_id = since
+        if version < purged:
+            return None
+        if (version >= current and task_id is None) or version > current:
+            # Nothing new (or a replica behind the primary that issued the token)
+            return {'entries': [], 'version': version, 'task_id': task_id, 'has_more': False}
+
+    tasks = Task.query.with_entities(*Task.columns(), Task.change_version).filter(
+        Task.user_id == user_id, Task.change_version <= current)
+    superseded = exists().where(
+        Task.user_id == user_id,
+        Task.id == TaskTombstone.task_id,
+        Task.change_version > TaskTombstone.version,
+        Task.change_version <= current
+    )
+    tombstones = select(TaskTombstone.version, TaskTombstone.task_id).where(
+        TaskTombstone.user_id == user_id, TaskTombstone.version <= current, ~superseded)
+    if since is not None:
+        version, task_id = since
+        if task_id is None:
+            tasks = tasks.filter(Task.change_version > version)
+            tombstones = tombstones.where(TaskTombstone.version > version)
+        else:
+            tasks = tasks.filter(tuple_(Task.change_version, Task.id) > (version, task_id))
+            tombstones = tombstones.where(tuple_(TaskTombstone.version, TaskTombstone.task_id) > (version, task_id))
+
+    # Fetch one extra entry to learn whether another page exists
+    entries = [(row.change_version, row.id, row) for row in
+               tasks.order_by(Task.change_version, Task.id).limit(limit + 1).all()]
+    if since is not None:
+        # A full sync starts from the live rows, so there is nothing to delete
+        entries += [(row.version, row.task_id, None) for row in db.session.execute(
+            tombstones.order_by(TaskTombstone.version, TaskTombstone.task_id).limit(limit + 1))]
+    entries.sort(key=lambda entry: entry[:2])
+
+    has_more = len(entries) > limit
+    entries = entries[:limit]
+    if has_more:
+        version, task_id = entries[-1][:2]
+    else:
+        version, task_id = current, None
+
+    return {
+        'entries': [(entry_version, entry_id, Task.row_to_dict(row) if row is not None else None)
+                    for entry_version, entry_id, row in entries],
+        'version': version,
+        'task_id': task_id,
+        'has_more': has_more
+    }
+
+def purge_tombstones(retention_days, now=None):
+    """
+    Delete tombstones older than the retention period
+
+    Each user's TaskCounter.purged_version is raised to the newest purged
+    version, so sync tokens from before it are answered with 410 Gone
+    instead of silently missing deletions.
+
+    Args:
+        retention_days (int): Days tombstones are kept
+        now (datetime.datetime): Current UTC time (defaults to now)
+
+    Returns:
+        int: Number of tombstones deleted
+    """
+    cutoff = (now or datetime.utcnow()) - timedelta(days=retention_days)
+    expired = db.session.execute(
+        select(TaskTombstone.user_id, func.max(TaskTombstone.version))
+        .where(TaskTombstone.deleted_at < cutoff)
+        .group_by(TaskTombstone.user_id)
+    ).all()
+
+    purged = 0
+    for user_id, version in expired:
+        db.session.execute(
+            update(TaskCounter)
+            .where(TaskCounter.user_id == user_id, TaskCounter.purged_version < version)
+            .values(purged_version=version)
+        )
+        result = db.session.execute(
+            delete(TaskTombstone)
+            .where(TaskTombstone.user_id == user_id, TaskTombstone.version <= version)
+        )
+        purged += result.rowcount
+    db.session.commit()
+
+    logger.info("Purged %s tombstones older than %s days for %s users", purged, retention_days, len(expired))
+    return purged
@@ -0,0 +1,374 @@
+from datetime import datetime
+from sqlalchemy import select, insert, update, delete, func, case, or_
+from app import db
+from database import primary_reads
+from models import User, Task, TaskCounter, TaskDueCounter, TaskTombstone
+from tasks.stats import seconds_between
+
+# Float sums of completion time accumulate rounding error; ignore drift below
+# this many seconds per completed task (with a floor of one second)
+COMPLETION_SECONDS_TOLERANCE = 0.001
+
+def task_state(task):
+    """
+    Snapshot the task fields that feed the counters
+
+    Args:
+        task (Task): Task to snapshot, or None if it does not exist
+
+    Returns:
+        dict or None: id, completed flag, due_date and completion time in seconds
+    """
+    if task is None:
+        return None
+
+    completion_seconds = 0.0
+    if task.completed and task.created_at and task.updated_at:
+        completion_seconds = (task.updated_at - task.created_at).total_seconds()
+
+    return {
+        'id': task.id,
+        'completed': bool(task.completed),
+        'due_date': task.due_date,
+        'completion_seconds': completion_seconds
+    }
+
+def _pending_by_due_date(state):
+    """Overdue-candidate contribution of one task state"""
+    if state is None or state['completed'] or state['due_date'] is None:
+        return {}
+    return {state['due_date']: 1}
+
+def _upsert(table):
+    """Dialect-specific INSERT supporting ON CONFLICT DO UPDATE"""
+    if db.session.get_bind().dialect.name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    return dialect_insert(table)
+
+def _increment_due_counter(user_id, due_date, delta):
+    statement = _upsert(TaskDueCounter.__table__).values(
+        user_id=user_id, due_date=due_date, pending=delta
+    )
+    statement = statement.on_conflict_do_update(
+        index_elements=['user_id', 'due_date'],
+        set_={'pending': TaskDueCounter.__table__.c.pending + delta}
+    )
+    db.session.execute(statement)
+
+def apply_task_change(user_id, before, after):
+    """
+    Update a user's counters for one task write, inside the current transaction
+
+    Args:
+        user_id (int): Owner of the task
+        before (dict or None): task_state() before the write (None for a create)
+        after (dict or None): task_state() after the write (None for a delete)
+    """
+    apply_task_changes(user_id, [(before, after)])
+
+def apply_task_changes(user_id, changes):
+    """
+    Update a user's counters for a batch of task writes with one delta
+
+    Args:
+        user_id (int): Owner of the tasks
+        changes (list): (before, after) task_state() pairs, as for apply_task_change()
+    """
+    # Make the task changes visible to a rebuild, should one be needed
+    db.session.flush()
+    
+    # Picked up after commit, e.g. to invalidate cached responses
+    db.session.info.setdefault('changed_users', set()).add(user_id)
+
+    def value(state, key):
+        if state is None:
+            return 0
+        return state[key] if key == 'completion_seconds' else int(state[key])
+
+    total = completed = 0
+    seconds = 0.0
+    pending = {}
+    for before, after in changes:
+        total += (after is not None) - (before is not None)
+        completed += value(after, 'completed') - value(before, 'completed')
+        seconds += value(after, 'completion_seconds') - value(before, 'completion_seconds')
+        for due_date, count in _pending_by_due_date(after).items():
+            pending[due_date] = pending.get(due_date, 0) + count
+        for due_date, count in _pending_by_due_date(before).items():
+            pending[due_date] = pending.get(due_date, 0) - count
+
+    values = {
+        'total': TaskCounter.total + total,
+        'completed': TaskCounter.completed + completed,
+        'completion_seconds': TaskCounter.completion_seconds + seconds,
+        'version': TaskCounter.version + 1
+    }
+    # Keep today's materialized overdue count in step with writes to past-due tasks
+    today = datetime.utcnow().date()
+    past_due = sum(delta for due_date, delta in pending.items() if due_date < today)
+    if past_due:
+        values['overdue'] = TaskCounter.overdue + case((TaskCounter.overdue_as_of == today, past_due), else_=0)
+
+    # The counter row stays locked until commit, so versions of one user's
+    # writes are handed out in commit order
+    version = db.session.execute(
+        update(TaskCounter)
+        .where(TaskCounter.user_id == user_id)
+        .values(**values)
+        .returning(TaskCounter.version)
+    ).scalar()
+    if version is None:
+        # Users created before counters existed are backfilled on first write
+        reconcile_counters(user_id=user_id)
+        version = db.session.scalar(select(TaskCounter.version).where(TaskCounter.user_id == user_id))
+    else:
+        for due_date, delta in pending.items():
+            if delta:
+                _increment_due_counter(user_id, due_date, delta)
+
+    _record_changes(user_id, version, changes)
+    # Announced to open task streams once the transaction commits (pubsub.py)
+    db.session.info.setdefault('task_versions', {})[user_id] = version
+
+def _record_changes(user_id, version, changes):
+    """Stamp written tasks with the change version and leave tombstones for deleted ones"""
+    written = [after['id'] for before, after in changes if after is not None]
+    deleted = [before['id'] for before, after in changes if after is None and before is not None]
+
+    if written:
+        db.session.execute(
+            update(Task)
+            .where(Task.id.in_(written))
+            # Setting updated_at to itself keeps its onupdate default from firing
+            .values(change_version=version, updated_at=Task.updated_at)
+            .execution_options(synchronize_session=False)
+        )
+    if deleted:
+        now = datetime.utcnow()
+        db.session.execute(insert(TaskTombstone), [
+            {'user_id': user_id, 'version': version, 'task_id': task_id, 'deleted_at': now}
+            for task_id in deleted
+        ])
+
+def read_counters(user_id, today=None):
+    """
+    Read a user's counters and current overdue count in one query
+
+    Args:
+        user_id (int): Owner of the counters
+        today (datetime.date): Reference date for overdue checks (defaults to UTC today)
+
+    Returns:
+        dict or None: total, completed, completion_seconds, version and overdue, or None if missing
+    """
+    today = today or datetime.utcnow().date()
+    # Summed from the per-date counters until the overdue sweep has run today
+    overdue = case(
+        (TaskCounter.overdue_as_of == today, TaskCounter.overdue),
+        else_=_overdue_sum(TaskDueCounter.user_id == user_id, today)
+    )
+    row = db.session.execute(
+        select(
+            TaskCounter.total,
+            TaskCounter.completed,
+            TaskCounter.completion_seconds,
+            TaskCounter.version,
+            overdue.label('overdue')
+        ).where(TaskCounter.user_id == user_id)
+    ).first()
+
+    if row is None:
+        return None
+    return {
+        'total': row.total,
+        'completed': row.completed,
+        'completion_seconds': row.completion_seconds,
+        'version': row.version,
+        'overdue': int(row.overdue)
+    }
+
+def _overdue_sum(owner, today):
+    """Pending tasks due before today, from the per-date counters"""
+    return (
+        select(func.coalesce(func.sum(TaskDueCounter.pending), 0))
+        .where(owner, TaskDueCounter.due_date < today)
+        .scalar_subquery()
+    )
+
+def sweep_overdue(today=None, chunk_size=1000):
+    """
+    Materialize every user's overdue count for today and drop empty due-date rows
+
+    Counter rows are locked before the count is read, so a write in flight
+    either commits first and is counted, or waits and then adjusts the new
+    value itself (apply_task_changes). Users are swept in chunks, each in
+    its own transaction, to keep those locks short.
+
+    Args:
+        today (datetime.date): Date to compute overdue for (defaults to UTC today)
+        chunk_size (int): Users per transaction
+
+    Returns:
+        int: Number of users swept
+    """
+    today = today or datetime.utcnow().date()
+    swept = 0
+    while True:
+        user_ids = db.session.scalars(
+            select(TaskCounter.user_id)
+            .where(or_(TaskCounter.overdue_as_of.is_(None), TaskCounter.overdue_as_of < today))
+            .order_by(TaskCounter.user_id)
+            .limit(chunk_size)
+            .with_for_update()
+        ).all()
+        if not user_ids:
+            break
+        db.session.execute(
+            update(TaskCounter)
+            .where(TaskCounter.user_id.in_(user_ids))
+            .values(overdue=_overdue_sum(TaskDueCounter.user_id == TaskCounter.user_id, today), overdue_as_of=today)
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+        swept += len(user_ids)
+
+    # Dates whose tasks were all completed, moved or deleted
+    db.session.execute(delete(TaskDueCounter).where(TaskDueCounter.pending == 0))
+    db.session.commit()
+    return swept
+
+def get_counters(user_id):
+    """
+    Read a user's counters, rebuilding them first if the user has none yet
+
+    Args:
+        user_id (int): Owner of the counters
+
+    Returns:
+        dict: Same as read_counters()
+    """
+    counters = read_counters(user_id)
+    if counters is None:
+        # Rebuild from the primary; a lagging replica would persist stale totals
+        with primary_reads(db.session):
+            reconcile_counters(user_id=user_id)
+            db.session.commit()
+            counters = read_counters(user_id)
+    return counters
+
+def _actual_counters(user_id=None):
+    """Recompute counters from the tasks table"""
+    completed = func.coalesce(func.sum(case((Task.completed == True, 1), else_=0)), 0)
+    seconds = func.coalesce(
+        func.sum(case((Task.completed == True, seconds_between(Task.created_at, Task.updated_at)), else_=0.0)),
+        0.0
+    )
+    query = (
+        select(User.id, func.count(Task.id), completed, seconds)
+        .select_from(User)
+        .outerjoin(Task, Task.user_id == User.id)
+        .group_by(User.id)
+    )
+    due_query = (
+        select(Task.user_id, Task.due_date, func.count(Task.id))
+        .where(Task.completed == False, Task.due_date.isnot(None))
+        .group_by(Task.user_id, Task.due_date)
+    )
+    if user_id is not None:
+        query = query.where(User.id == user_id)
+        due_query = due_query.where(Task.user_id == user_id)
+
+    counters = {
+        uid: {'total': total, 'completed': int(done), 'completion_seconds': float(secs)}
+        for uid, total, done, secs in db.session.execute(query)
+    }
+    due = {}
+    for uid, due_date, pending in db.session.execute(due_query):
+        due.setdefault(uid, {})[due_date] = pending
+    return counters, due
+
+def _stored_counters(user_id=None):
+    """Load the materialized counters"""
+    query = select(
+        TaskCounter.user_id,
+        TaskCounter.total,
+        TaskCounter.completed,
+        TaskCounter.completion_seconds,
+        TaskCounter.version,
+        TaskCounter.purged_version
+    )
+    due_query = select(TaskDueCounter.user_id, TaskDueCounter.due_date, TaskDueCounter.pending).where(
+        TaskDueCounter.pending != 0
+    )
+    if user_id is not None:
+        query = query.where(TaskCounter.user_id == user_id)
+        due_query = due_query.where(TaskDueCounter.user_id == user_id)
+
+    counters = {
+        uid: {'total': total, 'completed': done, 'completion_seconds': secs, 'version': version, 'purged_version': purged}
+        for uid, total, done, secs, version, purged in db.session.execute(query)
+    }
+    due = {}
+    for uid, due_date, pending in db.session.execute(due_query):
+        due.setdefault(uid, {})[due_date] = pending
+    return counters, due
+
+def reconcile_counters(user_id=None, fix=True):
+    """
+    Compare materialized counters with the tasks table and rebuild drifted users
+
+    Args:
+        user_id (int): Limit the check to one user (defaults to all users)
+        fix (bool): Rewrite the counters of users that drifted
+
+    Returns:
+        list: One dict per drifted field with user_id, field, stored and actual values
+    """
+    actual, actual_due = _actual_counters(user_id)
+    stored, stored_due = _stored_counters(user_id)
+
+    drift = []
+    for uid, expected in actual.items():
+        current = stored.get(uid)
+        if current is None:
+            drift.append({'user_id': uid, 'field': 'counters', 'stored': None, 'actual': expected})
+        else:
+            for field, value in expected.items():
+                tolerance = 0
+                if field == 'completion_seconds':
+                    tolerance = max(1.0, COMPLETION_SECONDS_TOLERANCE * expected['completed'])
+                if abs(current[field] - value) > tolerance:
+                    drift.append({'user_id': uid, 'field': field, 'stored': current[field], 'actual': value})
+
+        expected_due = actual_due.get(uid, {})
+        current_due = stored_due.get(uid, {})
+        for due_date in sorted(set(expected_due) | set(current_due)):
+            if expected_due.get(due_date, 0) != current_due.get(due_date, 0):
+                drift.append({
+                    'user_id': uid,
+                    'field': f'pending[{due_date.isoformat()}]',
+                    'stored': current_due.get(due_date, 0),
+                    'actual': expected_due.get(due_date, 0)
+                })
+
+    if fix:
+        for uid in {entry['user_id'] for entry in drift}:
+            db.session.info.setdefault('changed_users', set()).add(uid)
+            db.session.execute(delete(TaskCounter).where(TaskCounter.user_id == uid))
+            db.session.execute(delete(TaskDueCounter).where(TaskDueCounter.user_id == uid))
+            # Keep the version moving forward so cached ETags are invalidated, and
+            # keep purged_version so sync tokens from before a purge stay expired
+            version = stored[uid]['version'] + 1 if uid in stored else 1
+            purged_version = stored[uid]['purged_version'] if uid in stored else 0
+            db.session.execute(insert(TaskCounter).values(
+                user_id=uid, version=version, purged_version=purged_version, **actual[uid]))
+            due_rows = [
+                {'user_id': uid, 'due_date': due_date, 'pending': pending}
+                for due_date, pending in actual_due.get(uid, {}).items()
+            ]
+            if due_rows:
+                db.session.execute(insert(TaskDueCounter), due_rows)
+
+    return drift
@@ -0,0 +1,48 @@
+import hashlib
+from flask import request
+from werkzeug.http import quote_etag
+
+def make_etag(*parts):
+    """
+    Build a strong ETag value from the parts identifying a representation
+
+    Args:
+        *parts: Values that change whenever the representation changes
+
+    Returns:
+        str: Unquoted ETag value
+    """
+    return hashlib.sha1(':'.join(str(part) for part in parts).encode('utf-8')).hexdigest()
+
+def args_key(args):
+    """Stable representation of query arguments (a MultiDict), for list/stats ETags"""
+    return '&'.join(f'{key}={value}' for key, value in sorted(args.items(multi=True)))
+
+# List filters whose matches change with the date, not only with the tasks
+DATE_RELATIVE_ARGS = ('overdue',)
+
+def list_etag(user_id, version, args, today):
+    """ETag of a task list page; lists filtered on overdue also change with the date"""
+    if not any(name in args for name in DATE_RELATIVE_ARGS):
+        today = None
+    return make_etag('tasks', user_id, version, today, args_key(args))
+
+def stats_etag(user_id, version, args, today):
+    """ETag of task stats; overdue counts also change with the date"""
+    return make_etag('stats', user_id, version, today, args_key(args))
+
+def etag_headers(etag):
+    """Headers attached to every response carrying an ETag"""
+    return {
+        'ETag': quote_etag(etag),
+        # Clients may store the response but must revalidate before reuse
+        'Cache-Control': 'private, no-cache'
+    }
+
+def is_not_modified(etag):
+    """Check the request's If-None-Match header against an ETag"""
+    return request.if_none_match.contains_weak(etag)
+
+def not_modified(etag):
+    """Empty 304 response for a matching If-None-Match"""
+    return '', 304, etag_headers(etag)
@@ -0,0 +1,107 @@
+import csv
+import io
+import json
+from sqlalchemy import select
+from app import db
+from models import Task
+
+# Exported columns, in the same order and with the same names as Task.to_dict()
+EXPORT_COLUMNS = Task.columns()
+EXPORT_FIELDS = tuple(column.key for column in EXPORT_COLUMNS)
+
+# Rows fetched from the server-side cursor, and lines emitted, per chunk
+EXPORT_CHUNK_SIZE = 1000
+
+EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+def iter_task_rows(user_id, completed=None):
+    """
+    Stream a user's tasks as plain row tuples through a server-side cursor
+
+    Args:
+        user_id (int): Owner of the tasks
+        completed (bool): Only export tasks with this completion status (defaults to all)
+
+    Yields:
+        Row: One tuple per task, ordered like EXPORT_FIELDS
+    """
+    query = (
+        select(*EXPORT_COLUMNS)
+        .where(Task.user_id == user_id)
+        .order_by(Task.created_at.desc(), Task.id.desc())
+        .execution_options(yield_per=EXPORT_CHUNK_SIZE)
+    )
+    if completed is not None:
+        query = query.where(Task.completed == completed)
+
+    yield from db.session.execute(query)
+
+def _isoformat(value):
+    return value.isoformat() if value is not None else None
+
+def ndjson_chunks(rows):
+    """
+    Serialize rows as newline-delimited JSON
+
+    Args:
+        rows (iterable): Row tuples from iter_task_rows()
+
+    Yields:
+        str: Chunks of up to EXPORT_CHUNK_SIZE lines
+    """
+    dumps = json.JSONEncoder(separators=(',', ':')).encode
+    lines = []
+    for id_, title, description, due_date, completed, created_at, updated_at, user_id in rows:
+        lines.append(dumps({
+            'id': id_,
+            'title': title,
+            'description': description,
+            'due_date': _isoformat(due_date),
+            'completed': completed,
+            'created_at': _isoformat(created_at),
+            'updated_at': _isoformat(updated_at),
+            'user_id': user_id
+        }))
+        if len(lines) >= EXPORT_CHUNK_SIZE:
+            yield '\n'.join(lines) + '\n'
+            lines = []
+    if lines:
+        yield '\n'.join(lines) + '\n'
+
+def csv_chunks(rows):
+    """
+    Serialize rows as CSV with a header line
+
+    Args:
+        rows (iterable): Row tuples from iter_task_rows()
+
+    Yields:
+        str: Chunks of up to EXPORT_CHUNK_SIZE lines
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_FIELDS)
+
+    pending = 0
+    for id_, title, description, due_date, completed, created_at, updated_at, user_id in rows:
+        writer.writerow((
+            id_,
+            title,
+            description,
+            _isoformat(due_date),
+            'true' if completed else 'false',
+            _isoformat(created_at),
+            _isoformat(updated_at),
+            user_id
+        ))
+        pending += 1
+        if pending >= EXPORT_CHUNK_SIZE:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+
+    yield buffer.getvalue()
@@ -0,0 +1,71 @@
+from datetime import timezone
+from models import Task
+from schemas import task_range_columns, DEFAULT_TASK_SORT
+
+# Sort name to column; each has a (user_id, column, id) index
+SORT_COLUMNS = {
+    'created_at': Task.created_at,
+    'updated_at': Task.updated_at,
+    'due_date': Task.due_date,
+    'title': Task.title,
+}
+
+def task_sort(filters):
+    """
+    Sort applied to a task list
+
+    Without ?sort, lists filtered on a range are ordered by that column
+    (ascending) so the same index serves the filter and the order.
+
+    Args:
+        filters (dict): Output of TaskListQuerySchema().load()
+
+    Returns:
+        str: Sort name, prefixed with - when descending
+    """
+    if 'sort' in filters:
+        return filters['sort']
+    ranges = task_range_columns(filters)
+    return ranges[0] if ranges else DEFAULT_TASK_SORT
+
+def filter_tasks(query, filters, today):
+    """
+    Apply validated list filters to a task query or select
+
+    Args:
+        query: Task query or select already limited to one user
+        filters (dict): Output of TaskListQuerySchema().load()
+        today (datetime.date): Reference date for overdue
+
+    Returns:
+        The filtered query
+    """
+    if 'completed' in filters:
+        query = query.filter(Task.completed == filters['completed'])
+    if 'due_from' in filters:
+        query = query.filter(Task.due_date >= filters['due_from'])
+    if 'due_to' in filters:
+        query = query.filter(Task.due_date <= filters['due_to'])
+    if filters.get('overdue'):
+        query = query.filter(Task.due_date < today, Task.completed == False)
+    if 'updated_since' in filters:
+        # Timestamps are stored as naive UTC
+        since = filters['updated_since'].astimezone(timezone.utc).replace(tzinfo=None)
+        query = query.filter(Task.updated_at >= since)
+    return query
+
+def task_order(filters):
+    """
+    ORDER BY clauses for a task list, with id as the tie breaker in the same direction
+
+    Args:
+        filters (dict): Output of TaskListQuerySchema().load()
+
+    Returns:
+        list: Column ordering expressions
+    """
+    sort = task_sort(filters)
+    column = SORT_COLUMNS[sort.lstrip('-')]
+    if sort.startswith('-'):
+        return [column.desc(), Task.id.desc()]
+    return [column.asc(), Task.id.asc()]
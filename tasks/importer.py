@@ -0,0 +1,148 @@
+import csv
+import io
+import json
+from datetime import datetime
+from marshmallow import ValidationError
+from sqlalchemy import insert
+from app import db
+from models import Task
+from schemas import TaskCreateSchema
+from tasks.counters import apply_task_changes
+from utils import parse_date
+import logging
+
+logger = logging.getLogger(__name__)
+
+task_create_schema = TaskCreateSchema()
+
+# Columns read from imported records; anything else (e.g. id or timestamps
+# from an export file) is ignored
+IMPORT_FIELDS = ('title', 'description', 'due_date', 'completed')
+
+IMPORT_FORMATS = ('ndjson', 'csv')
+
+def _ndjson_records(text):
+    for line_number, line in enumerate(text, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield line_number, None, f'Invalid JSON: {str(e)}'
+            continue
+        if not isinstance(record, dict):
+            yield line_number, None, 'Each line must be a JSON object'
+            continue
+        yield line_number, record, None
+
+def _csv_records(text):
+    reader = csv.DictReader(text)
+    for record in reader:
+        # Blank cells mean "not provided" rather than an empty value
+        record = {key: value for key, value in record.items() if key and value not in ('', None)}
+        yield reader.line_num, record, None
+
+def read_records(stream, import_format):
+    """
+    Incrementally parse an uploaded task file
+
+    Args:
+        stream: Binary file-like object (e.g. request.stream)
+        import_format (str): One of IMPORT_FORMATS
+
+    Yields:
+        tuple: (line_number, record dict or None, parse error or None)
+    """
+    text = io.TextIOWrapper(io.BufferedReader(stream), encoding='utf-8', newline='')
+    if import_format == 'csv':
+        yield from _csv_records(text)
+    else:
+        yield from _ndjson_records(text)
+
+def _validate(record):
+    """Validate one record against TaskCreateSchema and return insertable values"""
+    values = {
+        field: record[field]
+        for field in IMPORT_FIELDS
+        if field in record and (record[field] is not None or field == 'due_date')
+    }
+    data = task_create_schema.load(values)
+
+    due_date = None
+    if data.get('due_date'):
+        due_date = parse_date(data['due_date'])
+        if not due_date:
+            raise ValidationError({'due_date': ['Invalid due_date format. Use YYYY-MM-DD']})
+
+    return {
+        'title': data['title'],
+        'description': data.get('description', ''),
+        'due_date': due_date,
+        'completed': data.get('completed', False)
+    }
+
+def _flush_chunk(user_id, rows):
+    """Insert one chunk with a single executemany and commit it"""
+    now = datetime.utcnow()
+    for row in rows:
+        row['user_id'] = user_id
+        row['created_at'] = now
+        row['updated_at'] = now
+
+    ids = db.session.execute(insert(Task).returning(Task.id, sort_by_parameter_order=True), rows).scalars().all()
+    apply_task_changes(user_id, [
+        (None, {'id': task_id, 'completed': row['completed'], 'due_date': row['due_date'], 'completion_seconds': 0.0})
+        for task_id, row in zip(ids, rows)
+    ])
+    db.session.commit()
+
+def import_tasks(user_id, records, batch_size=1000, max_errors=1000):
+    """
+    Insert parsed records for a user in chunked, separately committed batches
+
+    Args:
+        user_id (int): Owner of the imported tasks
+        records (iterable): Output of read_records()
+        batch_size (int): Rows per INSERT and commit
+        max_errors (int): Maximum number of rejected rows to describe in the summary
+
+    Returns:
+        dict: inserted and rejected counts plus per-line errors
+    """
+    inserted = 0
+    rejected = 0
+    errors = []
+    chunk = []
+
+    def reject(line_number, messages):
+        nonlocal rejected
+        rejected += 1
+        if len(errors) < max_errors:
+            errors.append({'line': line_number, 'messages': messages})
+
+    for line_number, record, parse_error in records:
+        if parse_error:
+            reject(line_number, parse_error)
+            continue
+        try:
+            chunk.append(_validate(record))
+        except ValidationError as err:
+            reject(line_number, err.messages)
+            continue
+
+        if len(chunk) >= batch_size:
+            _flush_chunk(user_id, chunk)
+            inserted += len(chunk)
+            chunk = []
+            logger.debug("Imported %s tasks for user %s", inserted, user_id)
+
+    if chunk:
+        _flush_chunk(user_id, chunk)
+        inserted += len(chunk)
+
+    return {
+        'inserted': inserted,
+        'rejected': rejected,
+        'errors': errors,
+        'errors_truncated': rejected > len(errors)
+    }
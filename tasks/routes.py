@@ -1,20 +1,49 @@
-from flask import request, jsonify
+from flask import request, jsonify, current_app, Response, stream_with_context, abort
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from marshmallow import ValidationError
 from datetime import datetime
+from functools import partial
+from sqlalchemy import select, insert, delete, tuple_
+from werkzeug.exceptions import RequestEntityTooLarge
 from tasks import tasks_bp
 from app import db
+from cache import response_cache
+from database import replica_router
+from query_guard import query_guard
+from write_queue import write_queue, WriteQueueBusyError
 from models import Task, User
-from schemas import TaskCreateSchema, TaskUpdateSchema
-from utils import parse_date
+from schemas import (TaskCreateSchema, TaskUpdateSchema, TaskBatchUpdateSchema, TaskBatchDeleteSchema,
+                     TaskListQuerySchema, task_range_columns)
+from tasks.stats import compute_stats, stats_from_counters, BREAKDOWNS
+from tasks.export import iter_task_rows, ndjson_chunks, csv_chunks, EXPORT_FORMATS
+from tasks.importer import read_records, import_tasks, IMPORT_FORMATS
+from tasks.etags import make_etag, list_etag, stats_etag, etag_headers, is_not_modified, not_modified
+from tasks.counters import task_state, apply_task_change, apply_task_changes, get_counters
+from tasks.filters import filter_tasks, task_order
+from tasks.search import search_terms, search_backend, apply_search
+from tasks.changes import read_changes
+from tasks.stream import stream_changes
+from pubsub import pubsub
+from utils import (parse_date, encode_cursor, decode_cursor,
+                   encode_sync_token, decode_sync_token)
 import logging
 
+logger = logging.getLogger(__name__)
+
 # Initialize schemas
 task_create_schema = TaskCreateSchema()
 task_update_schema = TaskUpdateSchema()
+task_create_many_schema = TaskCreateSchema(many=True)
+task_batch_update_schema = TaskBatchUpdateSchema(many=True)
+task_batch_delete_schema = TaskBatchDeleteSchema()
+task_list_query_schema = TaskListQuerySchema()
 
 @tasks_bp.route('', methods=['GET'])
 @jwt_required()
+@response_cache.cached('tasks')
+@replica_router.prefer_replica
+# Counters, then one page of rows
+@query_guard.budget(2)
 def get_tasks():
     """Get all tasks for the current user"""
     try:
@@ -23,29 +52,55 @@ def get_tasks():
         # Query parameters for filtering and pagination
         page = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 10, type=int)
-        completed = request.args.get('completed', type=str)
-        
-        # Build query
-        query = Task.query.filter_by(user_id=current_user_id)
+        cursor = request.args.get('cursor', type=str)
+        q = request.args.get('q', type=str)
+        filters = task_list_query_schema.load(request.args)
         
-        # Filter by completion status if provided
-        if completed is not None:
-            if completed.lower() == 'true':
-                query = query.filter_by(completed=True)
-            elif completed.lower() == 'false':
-                query = query.filter_by(completed=False)
-        
-        # Order by creation date (newest first)
-        query = query.order_by(Task.created_at.desc())
+        # The per-user counters identify the list version and give its total,
+        # so an unchanged list is answered without touching the tasks table
+        today = datetime.utcnow().date()
+        counters = get_counters(current_user_id)
+        etag = list_etag(current_user_id, counters['version'], request.args, today)
+        if is_not_modified(etag):
+            return not_modified(etag)
         
-        # Paginate results
-        pagination = query.paginate(
+        # Build query
+        query = filter_tasks(Task.query.filter_by(user_id=current_user_id), filters, today)
+        
+        # The counters give the total when filtering on completion status only
+        total = None
+        if not task_range_columns(filters):
+            total = counters['total']
+            if filters.get('completed') is True:
+                total = counters['completed']
+            elif filters.get('completed') is False:
+                total = counters['total'] - counters['completed']
+        
+        # Full-text search results come in rank order with offset pagination
+        if q is not None:
+            return _search_tasks(query, current_user_id, q, page, per_page, etag)
+        
+        # Keyset pagination is opt-in: passing ?cursor (empty for the first page)
+        if cursor is not None:
+            return _get_tasks_by_cursor(query, cursor, per_page, total, etag)
+        
+        # Newest first unless ?sort or a range filter picks another indexed order
+        query = query.order_by(*task_order(filters))
+        
+        if total is None:
+            return _get_tasks_page_uncounted(query, page, per_page, etag)
+        
+        # Paginate plain column rows, taking the total from the per-user
+        # counters instead of a COUNT(*) over the user's tasks
+        pagination = query.with_entities(*Task.columns()).paginate(
             page=page, 
             per_page=min(per_page, 100),  # Limit max per_page to 100
-            error_out=False
+            error_out=False,
+            count=False
         )
+        pagination.total = total
         
-        tasks = [task.to_dict() for task in pagination.items]
+        tasks = [Task.row_to_dict(row) for row in pagination.items]
         
         return jsonify({
             'tasks': tasks,
@@ -57,12 +112,127 @@ def get_tasks():
                 'has_next': pagination.has_next,
                 'has_prev': pagination.has_prev
             }
-        }), 200
+        }), 200, etag_headers(etag)
         
+    except ValidationError as e:
+        return jsonify({
+            'error': 'Validation failed',
+            'messages': e.messages
+        }), 400
     except Exception as e:
-        logging.error(f"Get tasks error: {str(e)}")
+        logger.error("Get tasks error: %s", e)
         return jsonify({'error': 'Failed to retrieve tasks'}), 500
 
+def _get_tasks_page_uncounted(query, page, per_page, etag):
+    """Return one offset page of a filtered list whose total the counters do not know
+    
+    Fetches one extra row to learn whether another page exists instead of
+    counting the matches, so total and pages are null.
+    """
+    page = max(page, 1)
+    per_page = max(1, min(per_page, 100))
+    rows = query.with_entities(*Task.columns()).limit(per_page + 1).offset((page - 1) * per_page).all()
+    has_next = len(rows) > per_page
+    
+    return jsonify({
+        'tasks': [Task.row_to_dict(row) for row in rows[:per_page]],
+        'pagination': {
+            'page': page,
+            'pages': None,
+            'per_page': per_page,
+            'total': None,
+            'has_next': has_next,
+            'has_prev': page > 1
+        }
+    }), 200, etag_headers(etag)
+
+def _get_tasks_by_cursor(query, cursor, per_page, total, etag):
+    """Return one page of tasks positioned after an opaque (created_at, id) cursor"""
+    per_page = max(1, min(per_page, 100))
+    include_total = request.args.get('include_total', 'false').lower() == 'true'
+    
+    if cursor:
+        position = decode_cursor(cursor)
+        if not position:
+            return jsonify({'error': 'Invalid cursor'}), 400
+        query = query.filter(tuple_(Task.created_at, Task.id) < position)
+    
+    # Fetch one extra row to learn whether another page exists
+    rows = (
+        query.with_entities(*Task.columns())
+        .order_by(Task.created_at.desc(), Task.id.desc())
+        .limit(per_page + 1)
+        .all()
+    )
+    has_next = len(rows) > per_page
+    rows = rows[:per_page]
+    
+    next_cursor = None
+    if has_next:
+        last = rows[-1]
+        next_cursor = encode_cursor(last.created_at, last.id)
+    
+    pagination = {
+        'per_page': per_page,
+        'next_cursor': next_cursor,
+        'has_next': has_next
+    }
+    if include_total:
+        pagination['total'] = total
+    
+    return jsonify({
+        'tasks': [Task.row_to_dict(row) for row in rows],
+        'pagination': pagination
+    }), 200, etag_headers(etag)
+
+def _search_tasks(query, user_id, q, page, per_page, etag):
+    """Return one offset page of tasks matching ?q=, best matches first
+    
+    Ranks (FTS5 bm25, ts_rank) depend on statistics of the whole index, so
+    any write can reorder results and no (score, id) position stays valid
+    between requests. Offset pages at least never fail; a task may show up
+    on two pages, or on none, when ranks shift in between.
+    """
+    terms = search_terms(q)
+    if not terms:
+        return jsonify({'error': 'Search query must contain at least one word'}), 400
+    
+    query, score = apply_search(query, search_backend(), user_id, terms)
+    return _get_tasks_page_uncounted(query.order_by(score, Task.id), page, per_page, etag)
+
+def _insert_task(user_id, fields):
+    """Insert a task and update the owner's counters; returns the task as a dict"""
+    task = Task(user_id=user_id, **fields)
+    db.session.add(task)
+    db.session.flush()
+    apply_task_change(user_id, None, task_state(task))
+    return task.to_dict()
+
+def _update_task(user_id, task_id, changes):
+    """Apply field changes to a task; returns the task as a dict, or None if not found"""
+    task = Task.query.filter_by(id=task_id, user_id=user_id).first()
+    if not task:
+        return None
+    
+    before = task_state(task)
+    for field, value in changes.items():
+        setattr(task, field, value)
+    task.updated_at = datetime.utcnow()
+    
+    apply_task_change(user_id, before, task_state(task))
+    return task.to_dict()
+
+def _delete_task(user_id, task_id):
+    """Delete a task; returns its title, or None if not found"""
+    task = Task.query.filter_by(id=task_id, user_id=user_id).first()
+    if not task:
+        return None
+    
+    before = task_state(task)
+    db.session.delete(task)
+    apply_task_change(user_id, before, None)
+    return task.title
+
 @tasks_bp.route('', methods=['POST'])
 @jwt_required()
 def create_task():
@@ -85,35 +255,137 @@ def create_task():
             if not due_date:
                 return jsonify({'error': 'Invalid due_date format. Use YYYY-MM-DD'}), 400
         
-        # Create new task
-        task = Task(
-            title=data['title'],
-            description=data.get('description', ''),
-            due_date=due_date,
-            completed=data.get('completed', False),
-            user_id=current_user_id
-        )
-        
-        # Save to database
-        db.session.add(task)
-        db.session.commit()
+        # Save through the write queue, updating counters in the same transaction
+        task = write_queue.run(_insert_task, current_user_id, {
+            'title': data['title'],
+            'description': data.get('description', ''),
+            'due_date': due_date,
+            'completed': data.get('completed', False)
+        })
         
-        logging.info(f"New task created: {task.title} by user {current_user_id}")
+        logger.info("New task created: %s by user %s", task['title'], current_user_id,
+                    extra={'event': 'task_created', 'user_id': current_user_id, 'task_id': task['id']})
         
         return jsonify({
             'message': 'Task created successfully',
-            'task': task.to_dict()
+            'task': task
         }), 201
         
     except ValidationError as err:
         return jsonify({'error': 'Validation failed', 'messages': err.messages}), 400
+    except WriteQueueBusyError:
+        db.session.rollback()
+        abort(503)
     except Exception as e:
         db.session.rollback()
-        logging.error(f"Create task error: {str(e)}")
+        logger.error("Create task error: %s", e)
         return jsonify({'error': 'Failed to create task', 'message': str(e)}), 500
 
+@tasks_bp.route('/changes', methods=['GET'])
+@jwt_required()
+@replica_router.prefer_replica
+# Counter version, changed tasks and tombstones
+@query_guard.budget(3)
+def get_task_changes():
+    """Get tasks created, updated or deleted since a sync token"""
+    try:
+        current_user_id = int(get_jwt_identity())
+        
+        # Without ?since= every live task is returned (full sync)
+        since = request.args.get('since', type=str)
+        position = None
+        if since:
+            position = decode_sync_token(since)
+            if not position:
+                return jsonify({'error': 'Invalid sync token'}), 400
+        
+        per_page = request.args.get('per_page', 100, type=int)
+        per_page = max(1, min(per_page, current_app.config['CHANGES_MAX_PAGE']))
+        
+        page = read_changes(current_user_id, position, per_page)
+        if page is None:
+            return jsonify({
+                'error': 'Sync token expired',
+                'message': 'Deleted tasks after this token were purged; sync again without since'
+            }), 410
+        
+        return jsonify({
+            'changes': [task for _, _, task in page['entries'] if task is not None],
+            'deleted': [task_id for _, task_id, task in page['entries'] if task is None],
+            'next_token': encode_sync_token(page['version'], page['task_id']),
+            'has_more': page['has_more']
+        }), 200
+        
+    except Exception as e:
+        logger.error("Get task changes error: %s", e)
+        return jsonify({'error': 'Failed to retrieve task changes'}), 500
+
+@tasks_bp.route('/stream', methods=['GET'])
+# EventSource cannot set headers, so browsers may pass the token as ?jwt=
+@jwt_required(locations=['headers', 'query_string'])
+def stream_task_changes():
+    """Push task changes of the current user as Server-Sent Events"""
+    subscription = None
+    try:
+        current_user_id = int(get_jwt_identity())
+        
+        # Resume after the last event received (sent back by EventSource on
+        # reconnect), or after a next_token from /changes; otherwise start now
+        resume = request.headers.get('Last-Event-ID') or request.args.get('since', type=str)
+        if resume:
+            position = decode_sync_token(resume)
+            if not position:
+                return jsonify({'error': 'Invalid sync token'}), 400
+        else:
+            position = (get_counters(current_user_id)['version'], None)
+        
+        # Subscribe before reading so a write committing in between is announced
+        subscription = pubsub.subscribe(current_user_id)
+        if subscription is None:
+            return jsonify({
+                'error': 'Too many streams',
+                'message': 'This server has no free stream slots, please retry'
+            }), 503, {'Retry-After': '5'}
+        
+        config = current_app.config
+        page = read_changes(current_user_id, position, config['CHANGES_MAX_PAGE'])
+        db.session.close()
+        if page is None:
+            return jsonify({
+                'error': 'Sync token expired',
+                'message': 'Deleted tasks after this token were purged; sync again with /changes'
+            }), 410
+        
+        def generate(subscription):
+            try:
+                yield from stream_changes(current_user_id, position, page, subscription,
+                                          config['STREAM_HEARTBEAT_SECONDS'], config['STREAM_MAX_SECONDS'],
+                                          config['CHANGES_MAX_PAGE'])
+            except Exception as e:
+                # Headers are already sent, so the stream can only be cut short
+                logger.error("Task stream error: %s", e)
+                raise
+        
+        response = Response(stream_with_context(generate(subscription)), mimetype='text/event-stream',
+                            headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+        # Runs when the server closes the response, even if it was never iterated
+        response.call_on_close(partial(pubsub.unsubscribe, subscription))
+        subscription = None
+        return response
+        
+    except Exception as e:
+        logger.error("Task stream error: %s", e)
+        return jsonify({'error': 'Failed to open task stream'}), 500
+    finally:
+        # Still set if no streaming response took the subscription over
+        if subscription is not None:
+            pubsub.unsubscribe(subscription)
+
 @tasks_bp.route('/<int:task_id>', methods=['GET'])
 @jwt_required()
+@response_cache.cached('task')
+@replica_router.prefer_replica
+@query_guard.budget(1)
 def get_task(task_id):
     """Get a specific task by ID"""
     try:
@@ -125,12 +397,17 @@ def get_task(task_id):
         if not task:
             return jsonify({'error': 'Task not found'}), 404
         
+        # Answer unchanged tasks without serializing them
+        etag = make_etag('task', task.id, task.updated_at.isoformat() if task.updated_at else None)
+        if is_not_modified(etag):
+            return not_modified(etag)
+        
         return jsonify({
             'task': task.to_dict()
-        }), 200
+        }), 200, etag_headers(etag)
         
     except Exception as e:
-        logging.error(f"Get task error: {str(e)}")
+        logger.error("Get task error: %s", e)
         return jsonify({'error': 'Failed to retrieve task'}), 500
 
 @tasks_bp.route('/<int:task_id>', methods=['PUT'])
@@ -140,12 +417,6 @@ def update_task(task_id):
     try:
         current_user_id = int(get_jwt_identity())
         
-        # Find task and ensure it belongs to current user
-        task = Task.query.filter_by(id=task_id, user_id=current_user_id).first()
-        
-        if not task:
-            return jsonify({'error': 'Task not found'}), 404
-        
         # Get JSON data from request
         json_data = request.get_json()
         if not json_data:
@@ -154,40 +425,40 @@ def update_task(task_id):
         # Validate input data
         data = task_update_schema.load(json_data)
         
-        # Update task fields
-        if 'title' in data:
-            task.title = data['title']
-        if 'description' in data:
-            task.description = data['description']
+        # Collect field changes
+        changes = {key: data[key] for key in ('title', 'description', 'completed') if key in data}
         if 'due_date' in data:
             if data['due_date']:
                 due_date = parse_date(data['due_date'])
                 if not due_date:
                     return jsonify({'error': 'Invalid due_date format. Use YYYY-MM-DD'}), 400
-                task.due_date = due_date
+                changes['due_date'] = due_date
             else:
-                task.due_date = None
-        if 'completed' in data:
-            task.completed = data['completed']
+                changes['due_date'] = None
         
-        # Update timestamp
-        task.updated_at = datetime.utcnow()
+        # Save through the write queue, updating counters in the same transaction
+        task = write_queue.run(_update_task, current_user_id, task_id, changes)
         
-        # Save changes
-        db.session.commit()
+        # Task must exist and belong to the current user
+        if task is None:
+            return jsonify({'error': 'Task not found'}), 404
         
-        logging.info(f"Task updated: {task.title} by user {current_user_id}")
+        logger.info("Task updated: %s by user %s", task['title'], current_user_id,
+                    extra={'event': 'task_updated', 'user_id': current_user_id, 'task_id': task_id})
         
         return jsonify({
             'message': 'Task updated successfully',
-            'task': task.to_dict()
+            'task': task
         }), 200
         
     except ValidationError as err:
         return jsonify({'error': 'Validation failed', 'messages': err.messages}), 400
+    except WriteQueueBusyError:
+        db.session.rollback()
+        abort(503)
     except Exception as e:
         db.session.rollback()
-        logging.error(f"Update task error: {str(e)}")
+        logger.error("Update task error: %s", e)
         return jsonify({'error': 'Failed to update task', 'message': str(e)}), 500
 
 @tasks_bp.route('/<int:task_id>', methods=['DELETE'])
@@ -197,57 +468,389 @@ def delete_task(task_id):
     try:
         current_user_id = int(get_jwt_identity())
         
-        # Find task and ensure it belongs to current user
-        task = Task.query.filter_by(id=task_id, user_id=current_user_id).first()
+        # Delete through the write queue, updating counters in the same transaction
+        title = write_queue.run(_delete_task, current_user_id, task_id)
         
-        if not task:
+        # Task must exist and belong to the current user
+        if title is None:
             return jsonify({'error': 'Task not found'}), 404
         
-        # Delete task
-        db.session.delete(task)
-        db.session.commit()
-        
-        logging.info(f"Task deleted: {task.title} by user {current_user_id}")
+        logger.info("Task deleted: %s by user %s", title, current_user_id,
+                    extra={'event': 'task_deleted', 'user_id': current_user_id, 'task_id': task_id})
         
         return jsonify({
             'message': 'Task deleted successfully'
         }), 200
         
+    except WriteQueueBusyError:
+        db.session.rollback()
+        abort(503)
     except Exception as e:
         db.session.rollback()
-        logging.error(f"Delete task error: {str(e)}")
+        logger.error("Delete task error: %s", e)
         return jsonify({'error': 'Failed to delete task', 'message': str(e)}), 500
 
-@tasks_bp.route('/stats', methods=['GET'])
+def _read_batch_list(key):
+    """
+    Read the list under `key` of a batch request body within BATCH_MAX_BYTES and BATCH_MAX_ITEMS
+    
+    Returns:
+        tuple: (raw_items, error_response) where error_response is set when
+               the request as a whole is rejected
+    """
+    max_bytes = current_app.config['BATCH_MAX_BYTES']
+    max_items = current_app.config['BATCH_MAX_ITEMS']
+    
+    if request.content_length is not None and request.content_length > max_bytes:
+        return None, (jsonify({
+            'error': 'Payload too large',
+            'message': f'Batch requests are limited to {max_bytes} bytes'
+        }), 413)
+    
+    # Also bounds bodies sent without a Content-Length header
+    request.max_content_length = max_bytes
+    try:
+        json_data = request.get_json()
+    except RequestEntityTooLarge:
+        return None, (jsonify({
+            'error': 'Payload too large',
+            'message': f'Batch requests are limited to {max_bytes} bytes'
+        }), 413)
+    
+    if not json_data or not isinstance(json_data, dict) or not isinstance(json_data.get(key), list):
+        return None, (jsonify({'error': f'Request body must contain a "{key}" list'}), 400)
+    
+    raw_items = json_data[key]
+    if not raw_items:
+        return None, (jsonify({'error': f'"{key}" must not be empty'}), 400)
+    if len(raw_items) > max_items:
+        return None, (jsonify({
+            'error': 'Batch too large',
+            'message': f'Batch requests are limited to {max_items} items'
+        }), 413)
+    
+    return raw_items, None
+
+def _load_batch_items(key, schema):
+    """
+    Read and validate the list under `key` of a batch request body
+    
+    Returns:
+        tuple: (items, errors, error_response) where items maps index to loaded data,
+               errors is a list of per-item errors and error_response is set when
+               the request as a whole is rejected
+    """
+    raw_items, error_response = _read_batch_list(key)
+    if error_response:
+        return None, None, error_response
+    
+    try:
+        loaded = schema.load(raw_items)
+        messages = {}
+    except ValidationError as err:
+        if not isinstance(err.valid_data, list):
+            return None, None, (jsonify({'error': 'Validation failed', 'messages': err.messages}), 400)
+        loaded = err.valid_data
+        messages = err.messages
+    
+    items = {}
+    errors = []
+    for index, data in enumerate(loaded):
+        if index in messages:
+            errors.append({'index': index, 'messages': messages[index]})
+            continue
+        
+        # Parse due_date if provided
+        if data.get('due_date'):
+            due_date = parse_date(data['due_date'])
+            if not due_date:
+                errors.append({'index': index, 'error': 'Invalid due_date format. Use YYYY-MM-DD'})
+                continue
+            data['due_date'] = due_date
+        items[index] = data
+    
+    return items, errors, None
+
+def _batch_status(succeeded, errors):
+    """201/200 when every item succeeded, 207 on partial success, 400 when nothing did"""
+    if not errors:
+        return None
+    return 207 if succeeded else 400
+
+@tasks_bp.route('/batch', methods=['POST'])
 @jwt_required()
-def get_task_stats():
-    """Get task statistics for the current user"""
+def create_tasks_batch():
+    """Create many tasks for the current user in one transaction"""
     try:
         current_user_id = int(get_jwt_identity())
         
-        # Get task counts
-        total_tasks = Task.query.filter_by(user_id=current_user_id).count()
-        completed_tasks = Task.query.filter_by(user_id=current_user_id, completed=True).count()
-        pending_tasks = total_tasks - completed_tasks
+        items, errors, error_response = _load_batch_items('tasks', task_create_many_schema)
+        if error_response:
+            return error_response
+        
+        created = []
+        if items:
+            rows = [
+                {
+                    'title': data['title'],
+                    'description': data.get('description', ''),
+                    'due_date': data.get('due_date'),
+                    'completed': data.get('completed', False),
+                    'user_id': current_user_id
+                }
+                for data in items.values()
+            ]
+            # One multi-row INSERT ... RETURNING instead of a flush per task
+            tasks = db.session.scalars(
+                insert(Task).returning(Task, sort_by_parameter_order=True),
+                rows
+            ).all()
+            apply_task_changes(current_user_id, [(None, task_state(task)) for task in tasks])
+            
+            # Serialize before commit expires the instances
+            created = [
+                {'index': index, 'task': task.to_dict()}
+                for index, task in zip(items.keys(), tasks)
+            ]
+            db.session.commit()
+        
+        logger.info("Batch created %s tasks by user %s", len(created), current_user_id)
         
-        # Get overdue tasks (due_date < today and not completed)
-        today = datetime.utcnow().date()
-        overdue_tasks = Task.query.filter(
-            Task.user_id == current_user_id,
-            Task.completed == False,
-            Task.due_date < today
-        ).count()
+        return jsonify({
+            'message': f'{len(created)} tasks created',
+            'tasks': created,
+            'errors': errors
+        }), _batch_status(created, errors) or 201
+        
+    except Exception as e:
+        db.session.rollback()
+        logger.error("Batch create tasks error: %s", e)
+        return jsonify({'error': 'Failed to create tasks', 'message': str(e)}), 500
+
+@tasks_bp.route('/batch', methods=['PATCH'])
+@jwt_required()
+def update_tasks_batch():
+    """Update many tasks of the current user in one transaction"""
+    try:
+        current_user_id = int(get_jwt_identity())
+        
+        items, errors, error_response = _load_batch_items('tasks', task_batch_update_schema)
+        if error_response:
+            return error_response
+        
+        # Load every targeted task with one query
+        ids = {data['id'] for data in items.values()}
+        tasks = {
+            task.id: task
+            for task in Task.query.filter(Task.user_id == current_user_id, Task.id.in_(ids))
+        } if ids else {}
+        before = {task_id: task_state(task) for task_id, task in tasks.items()}
+        
+        now = datetime.utcnow()
+        updated = {}
+        for index, data in items.items():
+            task = tasks.get(data['id'])
+            if not task:
+                errors.append({'index': index, 'id': data['id'], 'error': 'Task not found'})
+                continue
+            for field in ('title', 'description', 'due_date', 'completed'):
+                if field in data:
+                    setattr(task, field, data[field])
+            task.updated_at = now
+            updated[index] = task
+        errors.sort(key=lambda error: error['index'])
+        
+        results = []
+        if updated:
+            # Rows changing the same columns are flushed as one executemany UPDATE
+            changed = {task.id: task for task in updated.values()}
+            apply_task_changes(
+                current_user_id,
+                [(before[task_id], task_state(task)) for task_id, task in changed.items()]
+            )
+            
+            # Serialize before commit expires the instances
+            results = [{'index': index, 'task': task.to_dict()} for index, task in updated.items()]
+            db.session.commit()
+        
+        logger.info("Batch updated %s tasks by user %s", len(updated), current_user_id)
         
         return jsonify({
-            'stats': {
-                'total_tasks': total_tasks,
-                'completed_tasks': completed_tasks,
-                'pending_tasks': pending_tasks,
-                'overdue_tasks': overdue_tasks,
-                'completion_rate': round((completed_tasks / total_tasks * 100), 2) if total_tasks > 0 else 0
-            }
+            'message': f'{len(updated)} tasks updated',
+            'tasks': results,
+            'errors': errors
+        }), _batch_status(updated, errors) or 200
+        
+    except Exception as e:
+        db.session.rollback()
+        logger.error("Batch update tasks error: %s", e)
+        return jsonify({'error': 'Failed to update tasks', 'message': str(e)}), 500
+
+@tasks_bp.route('/batch', methods=['DELETE'])
+@jwt_required()
+def delete_tasks_batch():
+    """Delete many tasks of the current user in one transaction"""
+    try:
+        current_user_id = int(get_jwt_identity())
+        
+        # Same byte and item limits as the other batch endpoints, checked
+        # before the ids are validated one by one
+        raw_ids, error_response = _read_batch_list('ids')
+        if error_response:
+            return error_response
+        
+        data = task_batch_delete_schema.load({'ids': raw_ids})
+        ids = list(dict.fromkeys(data['ids']))
+        
+        # Snapshot counter inputs without hydrating ORM objects
+        rows = db.session.execute(
+            select(Task.id, Task.completed, Task.due_date, Task.created_at, Task.updated_at)
+            .where(Task.user_id == current_user_id, Task.id.in_(ids))
+        ).all()
+        found = {row.id: row for row in rows}
+        errors = [{'id': task_id, 'error': 'Task not found'} for task_id in ids if task_id not in found]
+        
+        if found:
+            db.session.execute(
+                delete(Task)
+                .where(Task.user_id == current_user_id, Task.id.in_(list(found)))
+                .execution_options(synchronize_session=False)
+            )
+            apply_task_changes(current_user_id, [(task_state(row), None) for row in rows])
+            db.session.commit()
+        
+        logger.info("Batch deleted %s tasks by user %s", len(found), current_user_id)
+        
+        return jsonify({
+            'message': f'{len(found)} tasks deleted',
+            'deleted': list(found),
+            'errors': errors
+        }), _batch_status(found, errors) or 200
+        
+    except ValidationError as err:
+        return jsonify({'error': 'Validation failed', 'messages': err.messages}), 400
+    except Exception as e:
+        db.session.rollback()
+        logger.error("Batch delete tasks error: %s", e)
+        return jsonify({'error': 'Failed to delete tasks', 'message': str(e)}), 500
+
+@tasks_bp.route('/export', methods=['GET'])
+@jwt_required()
+def export_tasks():
+    """Stream all tasks of the current user as NDJSON or CSV"""
+    try:
+        current_user_id = int(get_jwt_identity())
+        
+        export_format = request.args.get('format', 'ndjson', type=str).lower()
+        if export_format not in EXPORT_FORMATS:
+            return jsonify({
+                'error': 'Invalid format',
+                'message': f"Choose from: {', '.join(EXPORT_FORMATS)}"
+            }), 400
+        
+        completed = request.args.get('completed', type=str)
+        if completed is not None:
+            completed = {'true': True, 'false': False}.get(completed.lower())
+        
+        serialize = ndjson_chunks if export_format == 'ndjson' else csv_chunks
+        
+        def generate():
+            try:
+                yield from serialize(iter_task_rows(current_user_id, completed))
+            except Exception as e:
+                # Headers are already sent, so the stream can only be cut short
+                logger.error("Export tasks stream error: %s", e)
+                raise
+        
+        return Response(
+            stream_with_context(generate()),
+            mimetype=EXPORT_FORMATS[export_format],
+            headers={'Content-Disposition': f'attachment; filename=tasks.{export_format}'}
+        )
+        
+    except Exception as e:
+        logger.error("Export tasks error: %s", e)
+        return jsonify({'error': 'Failed to export tasks'}), 500
+
+@tasks_bp.route('/import', methods=['POST'])
+@jwt_required()
+def import_tasks_file():
+    """Import tasks for the current user from a streamed NDJSON or CSV body"""
+    try:
+        current_user_id = int(get_jwt_identity())
+        
+        # Format from ?format=, falling back to the Content-Type
+        default_format = 'csv' if request.mimetype == 'text/csv' else 'ndjson'
+        import_format = request.args.get('format', default_format, type=str).lower()
+        if import_format not in IMPORT_FORMATS:
+            return jsonify({
+                'error': 'Invalid format',
+                'message': f"Choose from: {', '.join(IMPORT_FORMATS)}"
+            }), 400
+        
+        summary = import_tasks(
+            current_user_id,
+            read_records(request.stream, import_format),
+            batch_size=current_app.config['IMPORT_BATCH_SIZE'],
+            max_errors=current_app.config['IMPORT_MAX_ERRORS']
+        )
+        
+        logger.info("Imported %s tasks (%s rejected) by user %s",
+                    summary['inserted'], summary['rejected'], current_user_id)
+        
+        return jsonify({
+            'message': 'Import completed',
+            **summary
         }), 200
         
+    except UnicodeDecodeError:
+        db.session.rollback()
+        return jsonify({
+            'error': 'Invalid encoding',
+            'message': 'Import files must be UTF-8; batches before the invalid line were imported'
+        }), 400
+    except Exception as e:
+        db.session.rollback()
+        logger.error("Import tasks error: %s", e)
+        return jsonify({'error': 'Failed to import tasks', 'message': str(e)}), 500
+
+@tasks_bp.route('/stats', methods=['GET'])
+@jwt_required()
+@response_cache.cached('stats')
+@replica_router.prefer_replica
+# Counters, plus one aggregate when breakdowns are requested
+@query_guard.budget(lambda: 2 if request.args.get('breakdown') else 1)
+def get_task_stats():
+    """Get task statistics for the current user"""
+    try:
+        current_user_id = int(get_jwt_identity())
+        
+        # Optional breakdowns, e.g. ?breakdown=due_week,completion_day
+        breakdown_param = request.args.get('breakdown', '', type=str)
+        breakdowns = [name.strip() for name in breakdown_param.split(',') if name.strip()]
+        unknown = [name for name in breakdowns if name not in BREAKDOWNS]
+        if unknown:
+            return jsonify({
+                'error': 'Invalid breakdown',
+                'message': f"Unknown breakdown(s): {', '.join(unknown)}. Choose from: {', '.join(BREAKDOWNS)}"
+            }), 400
+        
+        # Stats change with the user's task list and, through overdue, with the date
+        counters = get_counters(current_user_id)
+        etag = stats_etag(current_user_id, counters['version'], request.args, datetime.utcnow().date())
+        if is_not_modified(etag):
+            return not_modified(etag)
+        
+        # Without breakdowns the per-user counters answer in O(1); otherwise
+        # totals and breakdowns come back in one aggregate query
+        if breakdowns:
+            stats, grouped = compute_stats(current_user_id, breakdowns)
+            response = {'stats': stats, 'breakdowns': grouped}
+        else:
+            response = {'stats': stats_from_counters(counters)}
+        
+        return jsonify(response), 200, etag_headers(etag)
+        
     except Exception as e:
-        logging.error(f"Get task stats error: {str(e)}")
+        logger.error("Get task stats error: %s", e)
         return jsonify({'error': 'Failed to retrieve task statistics'}), 500
@@ -0,0 +1,210 @@
+import re
+from sqlalchemy import select, func, text, literal, literal_column, or_, Float
+from app import db
+from models import Task
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Words of ?q= used in the search; anything else (quotes, operators) is ignored
+TERM_PATTERN = re.compile(r'\w+')
+MAX_SEARCH_TERMS = 8
+
+# search_backend() results per database URL
+_backends = {}
+
+# Title matches rank above description matches
+TITLE_WEIGHT = 10.0
+DESCRIPTION_WEIGHT = 1.0
+
+# SQLite: external content FTS5 table over tasks, kept in sync by triggers so
+# every write path (single, batch, import) updates it in the same transaction.
+# user_id is indexed too, so a user's matches are found from the index alone.
+SQLITE_SEARCH_TABLE_DDL = """
+    CREATE VIRTUAL TABLE tasks_fts USING fts5(
+        title, description, user_id,
+        content='tasks', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )
+"""
+
+# Triggers belong to the tasks table: dropping and recreating tasks (e.g.
+# drop_all/create_all) removes them while tasks_fts survives, so each one is
+# checked for on startup by name
+SQLITE_SEARCH_TRIGGERS = {
+    'tasks_fts_insert': """
+    CREATE TRIGGER tasks_fts_insert AFTER INSERT ON tasks BEGIN
+        INSERT INTO tasks_fts(rowid, title, description, user_id)
+        VALUES (new.id, new.title, new.description, new.user_id);
+    END
+    """,
+    'tasks_fts_delete': """
+    CREATE TRIGGER tasks_fts_delete AFTER DELETE ON tasks BEGIN
+        INSERT INTO tasks_fts(tasks_fts, rowid, title, description, user_id)
+        VALUES ('delete', old.id, old.title, old.description, old.user_id);
+    END
+    """,
+    'tasks_fts_update': """
+    CREATE TRIGGER tasks_fts_update AFTER UPDATE OF title, description, user_id ON tasks BEGIN
+        INSERT INTO tasks_fts(tasks_fts, rowid, title, description, user_id)
+        VALUES ('delete', old.id, old.title, old.description, old.user_id);
+        INSERT INTO tasks_fts(rowid, title, description, user_id)
+        VALUES (new.id, new.title, new.description, new.user_id);
+    END
+    """,
+}
+
+# Postgres: a generated tsvector column is recomputed by the database on
+# every write. The 'simple' configuration matches SQLite's tokenizer (no stemming).
+POSTGRES_SEARCH_DDL = (
+    """
+    ALTER TABLE tasks ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(description, '')), 'B')
+    ) STORED
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_tasks_search_vector ON tasks USING GIN (search_vector)",
+)
+
+def search_terms(q):
+    """
+    Split a search string into lowercase words
+
+    Args:
+        q (str): Raw ?q= value
+
+    Returns:
+        list: Up to MAX_SEARCH_TERMS words, each matched as a prefix
+    """
+    return TERM_PATTERN.findall(q.lower())[:MAX_SEARCH_TERMS]
+
+def search_backend(engine=None):
+    """
+    Full-text implementation available on the database
+
+    Returns:
+        str: 'fts5', 'tsvector' or 'like' (unindexed LIKE scan)
+    """
+    engine = engine or db.engine
+    backend = _backends.get(engine.url)
+    if backend is None:
+        backend = 'like'
+        if engine.dialect.name == 'postgresql':
+            backend = 'tsvector'
+        elif engine.dialect.name == 'sqlite':
+            with engine.connect() as connection:
+                options = {row[0] for row in connection.exec_driver_sql('PRAGMA compile_options')}
+            if 'ENABLE_FTS5' in options:
+                backend = 'fts5'
+        _backends[engine.url] = backend
+    return backend
+
+def _missing_search_objects(connection, backend):
+    """Names of the index objects that do not exist (the FTS5 table and its triggers)"""
+    if backend == 'fts5':
+        existing = {row[0] for row in connection.exec_driver_sql(
+            "SELECT name FROM sqlite_master WHERE (type = 'table' AND name = 'tasks_fts') OR type = 'trigger'"
+        )}
+        return [name for name in ('tasks_fts', *SQLITE_SEARCH_TRIGGERS) if name not in existing]
+    exists = connection.exec_driver_sql(
+        "SELECT 1 FROM information_schema.columns WHERE table_name = 'tasks' AND column_name = 'search_vector'"
+    ).first() is not None
+    return [] if exists else ['search_vector']
+
+def ensure_search_index(engine=None):
+    """
+    Create the full-text index if it is missing, indexing existing tasks
+
+    Creating it on a populated table indexes every task once (Postgres
+    rewrites the table to fill the generated column). On SQLite, sync
+    triggers lost with a recreated tasks table are recreated and the index
+    rebuilt, since tasks_fts no longer matches the table.
+
+    Args:
+        engine (sqlalchemy.engine.Engine): Engine to migrate (defaults to db.engine)
+
+    Returns:
+        bool: True if the index was created
+    """
+    engine = engine or db.engine
+    backend = search_backend(engine)
+    if backend == 'like':
+        logger.warning("No full-text search support on %s, ?q= falls back to LIKE", engine.dialect.name)
+        return False
+
+    with engine.begin() as connection:
+        missing = _missing_search_objects(connection, backend)
+        if not missing:
+            return False
+        if backend == 'fts5':
+            if 'tasks_fts' in missing:
+                connection.exec_driver_sql(SQLITE_SEARCH_TABLE_DDL)
+            for name, statement in SQLITE_SEARCH_TRIGGERS.items():
+                if name in missing:
+                    connection.exec_driver_sql(statement)
+            connection.exec_driver_sql("INSERT INTO tasks_fts(tasks_fts) VALUES ('rebuild')")
+        else:
+            for statement in POSTGRES_SEARCH_DDL:
+                connection.exec_driver_sql(statement)
+    logger.info("Created full-text search index objects (%s): %s", backend, ', '.join(missing))
+    return True
+
+def rebuild_search_index(engine=None):
+    """
+    Re-index every task, e.g. after rows were loaded with triggers disabled
+
+    Returns:
+        str: Backend that was rebuilt
+    """
+    engine = engine or db.engine
+    backend = search_backend(engine)
+    ensure_search_index(engine)
+    with engine.begin() as connection:
+        if backend == 'fts5':
+            connection.exec_driver_sql("INSERT INTO tasks_fts(tasks_fts) VALUES ('rebuild')")
+            connection.exec_driver_sql("INSERT INTO tasks_fts(tasks_fts) VALUES ('optimize')")
+        elif backend == 'tsvector':
+            connection.exec_driver_sql("REINDEX INDEX ix_tasks_search_vector")
+    return backend
+
+def apply_search(query, backend, user_id, terms):
+    """
+    Restrict a task query to full-text matches and attach their rank
+
+    Every term matches as a prefix and all terms must match. The score is
+    lower for better matches, so results are ordered by (score, id).
+
+    Args:
+        query (flask_sqlalchemy.query.Query): Task query already limited to the user
+        backend (str): Value of search_backend()
+        user_id (int): Owner of the tasks
+        terms (list): Output of search_terms()
+
+    Returns:
+        tuple: (query, score column expression)
+    """
+    if backend == 'fts5':
+        match = f'user_id:"{user_id}" AND (' + ' '.join(f'"{term}"*' for term in terms) + ')'
+        matches = (
+            select(
+                literal_column('tasks_fts.rowid').label('task_id'),
+                literal_column(f'bm25(tasks_fts, {TITLE_WEIGHT}, {DESCRIPTION_WEIGHT}, 0.0)', Float).label('score')
+            )
+            .select_from(text('tasks_fts'))
+            .where(text('tasks_fts MATCH :search_match').bindparams(search_match=match))
+            .subquery()
+        )
+        return query.join(matches, matches.c.task_id == Task.id), matches.c.score
+
+    if backend == 'tsvector':
+        vector = literal_column('tasks.search_vector')
+        tsquery = func.to_tsquery('simple', ' & '.join(f'{term}:*' for term in terms))
+        score = -func.ts_rank(vector, tsquery, type_=Float)
+        return query.filter(vector.op('@@')(tsquery)), score
+
+    for term in terms:
+        pattern = '%' + term.replace('_', '\\_') + '%'
+        query = query.filter(or_(Task.title.ilike(pattern, escape='\\'),
+                                 Task.description.ilike(pattern, escape='\\')))
+    return query, literal(0.0, Float)
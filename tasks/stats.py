@@ -0,0 +1,177 @@
+from collections import namedtuple
+from datetime import datetime
+from sqlalchemy import select, func, case, and_, literal, null, union_all, String, Float
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
+from app import db
+from models import Task
+
+class seconds_between(FunctionElement):
+    """Seconds elapsed between two timestamp columns"""
+    type = Float()
+    inherit_cache = True
+
+@compiles(seconds_between)
+def _seconds_between_default(element, compiler, **kw):
+    start, end = list(element.clauses)
+    return f"EXTRACT(EPOCH FROM ({compiler.process(end, **kw)} - {compiler.process(start, **kw)}))"
+
+@compiles(seconds_between, 'sqlite')
+def _seconds_between_sqlite(element, compiler, **kw):
+    start, end = list(element.clauses)
+    return f"((julianday({compiler.process(end, **kw)}) - julianday({compiler.process(start, **kw)})) * 86400.0)"
+
+class week_start(FunctionElement):
+    """ISO date (YYYY-MM-DD) of the Monday starting the week of a date column"""
+    type = String()
+    inherit_cache = True
+
+@compiles(week_start)
+def _week_start_default(element, compiler, **kw):
+    return f"to_char(date_trunc('week', {compiler.process(element.clauses, **kw)}), 'YYYY-MM-DD')"
+
+@compiles(week_start, 'sqlite')
+def _week_start_sqlite(element, compiler, **kw):
+    return f"date({compiler.process(element.clauses, **kw)}, '-6 days', 'weekday 1')"
+
+class day_of(FunctionElement):
+    """ISO date (YYYY-MM-DD) of a timestamp column"""
+    type = String()
+    inherit_cache = True
+
+@compiles(day_of)
+def _day_of_default(element, compiler, **kw):
+    return f"to_char({compiler.process(element.clauses, **kw)}, 'YYYY-MM-DD')"
+
+@compiles(day_of, 'sqlite')
+def _day_of_sqlite(element, compiler, **kw):
+    return f"date({compiler.process(element.clauses, **kw)})"
+
+def _count_where(condition):
+    return func.coalesce(func.sum(case((condition, 1), else_=0)), 0)
+
+# Aggregates computed over a set of task rows. Each entry maps the output
+# key to a function of today's date returning a SQL aggregate expression;
+# adding an entry adds a column to the stats query, not another query.
+METRICS = {
+    'total_tasks': lambda today: func.count(Task.id),
+    'completed_tasks': lambda today: _count_where(Task.completed == True),
+    'overdue_tasks': lambda today: _count_where(and_(Task.completed == False, Task.due_date < today)),
+    'avg_completion_seconds': lambda today: func.avg(
+        case((Task.completed == True, seconds_between(Task.created_at, Task.updated_at)))
+    ),
+}
+
+Breakdown = namedtuple('Breakdown', ['period', 'where'])
+
+# Optional groupings of the same metrics, selected with ?breakdown=...
+# Completion time is approximated by updated_at of completed tasks.
+BREAKDOWNS = {
+    'due_week': Breakdown(period=week_start(Task.due_date), where=Task.due_date.isnot(None)),
+    'completion_day': Breakdown(period=day_of(Task.updated_at), where=Task.completed == True),
+}
+
+def build_stats_query(user_id, breakdowns=(), today=None):
+    """
+    Build one statement returning the overall stats row and any breakdown rows
+
+    Every row has the columns (breakdown, period, *METRICS); the overall row
+    has NULL for both breakdown and period. Breakdowns are UNION ALL'd onto
+    the overall aggregate so the whole result comes back in one round trip.
+
+    Args:
+        user_id (int): Owner of the tasks to aggregate
+        breakdowns (iterable): Names from BREAKDOWNS to include
+        today (datetime.date): Reference date for overdue checks (defaults to UTC today)
+
+    Returns:
+        sqlalchemy.sql.Select: Statement to execute
+    """
+    today = today or datetime.utcnow().date()
+    metrics = [expression(today).label(name) for name, expression in METRICS.items()]
+
+    parts = [
+        select(null().label('breakdown'), null().label('period'), *metrics)
+        .where(Task.user_id == user_id)
+    ]
+    for name in breakdowns:
+        breakdown = BREAKDOWNS[name]
+        parts.append(
+            select(literal(name).label('breakdown'), breakdown.period.label('period'), *metrics)
+            .where(Task.user_id == user_id, breakdown.where)
+            .group_by(breakdown.period)
+        )
+
+    return parts[0] if len(parts) == 1 else union_all(*parts)
+
+def _rounded_seconds(seconds):
+    """
+    Round a mean completion time for output
+
+    Counters sum float deltas, so a true zero can come back as a tiny
+    negative value; it is clamped before rounding, which would give -0.0.
+    """
+    return round(max(0.0, float(seconds)), 2) if seconds is not None else None
+
+def _format_metrics(row):
+    """Convert a result row into the public stats dictionary"""
+    total = row.total_tasks or 0
+    completed = int(row.completed_tasks or 0)
+    avg_seconds = row.avg_completion_seconds
+
+    return {
+        'total_tasks': total,
+        'completed_tasks': completed,
+        'pending_tasks': total - completed,
+        'overdue_tasks': int(row.overdue_tasks or 0),
+        'completion_rate': round((completed / total * 100), 2) if total > 0 else 0,
+        'avg_completion_seconds': _rounded_seconds(avg_seconds)
+    }
+
+def stats_from_counters(counters):
+    """
+    Build the public stats dictionary from materialized counters
+
+    Args:
+        counters (dict): Output of tasks.counters.read_counters()
+
+    Returns:
+        dict: Same shape as the stats returned by compute_stats()
+    """
+    total = counters['total']
+    completed = counters['completed']
+
+    return {
+        'total_tasks': total,
+        'completed_tasks': completed,
+        'pending_tasks': total - completed,
+        'overdue_tasks': counters['overdue'],
+        'completion_rate': round((completed / total * 100), 2) if total > 0 else 0,
+        'avg_completion_seconds': _rounded_seconds(counters['completion_seconds'] / completed) if completed > 0 else None
+    }
+
+def compute_stats(user_id, breakdowns=()):
+    """
+    Compute task statistics for a user with a single query
+
+    Args:
+        user_id (int): Owner of the tasks to aggregate
+        breakdowns (iterable): Names from BREAKDOWNS to include
+
+    Returns:
+        tuple: (stats dict, breakdowns dict mapping name to a list of per-period stats)
+    """
+    rows = db.session.execute(build_stats_query(user_id, breakdowns)).all()
+
+    stats = None
+    grouped = {name: [] for name in breakdowns}
+    for row in rows:
+        if row.breakdown is None:
+            stats = _format_metrics(row)
+        else:
+            grouped[row.breakdown].append({'period': row.period, **_format_metrics(row)})
+
+    for periods in grouped.values():
+        periods.sort(key=lambda entry: entry['period'])
+
+    return stats, grouped
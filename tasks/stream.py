@@ -0,0 +1,99 @@
+import time
+from flask import current_app
+from app import db
+from tasks.changes import read_changes
+from utils import encode_sync_token
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Milliseconds browsers wait before reconnecting a closed stream
+STREAM_RETRY_MS = 3000
+
+def sse_frame(event=None, data=None, event_id=None):
+    """
+    Format one Server-Sent Events frame
+
+    Args:
+        event (str): Event type (omitted for the default 'message')
+        data (dict): Payload, sent as one line of JSON
+        event_id (str): Value the client sends back as Last-Event-ID
+
+    Returns:
+        str: Frame terminated by a blank line
+    """
+    lines = []
+    if event_id is not None:
+        lines.append(f'id: {event_id}')
+    if event is not None:
+        lines.append(f'event: {event}')
+    if data is not None:
+        lines.append(f'data: {current_app.json.dumps(data)}')
+    return '\n'.join(lines) + '\n\n'
+
+def change_frames(entries):
+    """
+    SSE frames for read_changes() entries, each with the sync token after it
+
+    Saved tasks (created or updated) are 'task' events carrying the task;
+    deleted ones are 'task_deleted' events carrying its id.
+    """
+    for version, task_id, task in entries:
+        event_id = encode_sync_token(version, task_id)
+        if task is None:
+            yield sse_frame('task_deleted', {'id': task_id}, event_id)
+        else:
+            yield sse_frame('task', task, event_id)
+
+def stream_changes(user_id, position, page, subscription, heartbeat, max_seconds, page_size):
+    """
+    Push a user's task changes until the connection closes or max_seconds pass
+
+    Catches up from the first page of read_changes(), then waits on the
+    subscription and reads again whenever a newer version is announced. The
+    database session is closed between reads, so an idle stream holds no
+    connection. A comment line every heartbeat seconds keeps proxies from
+    closing the connection and detects clients that went away.
+
+    Args:
+        user_id (int): Owner of the tasks
+        position (tuple): (version, task_id) the first page was read after
+        page (dict): First read_changes() page after position
+        subscription (pubsub.Subscription): Notifications for this connection
+        heartbeat (float): Seconds between keepalive comments
+        max_seconds (float): Lifetime of the stream before the client reconnects
+        page_size (int): Entries per read
+
+    Yields:
+        str: SSE frames
+    """
+    deadline = time.monotonic() + max_seconds
+    yield f'retry: {STREAM_RETRY_MS}\n\n'
+
+    while True:
+        yield from change_frames(page['entries'])
+        position = (page['version'], page['task_id'])
+        if page['has_more']:
+            page = read_changes(user_id, position, page_size)
+            db.session.close()
+            if page is None:
+                # Tombstones were purged while the stream was catching up
+                yield sse_frame('expired', {'error': 'Sync token expired'})
+                return
+            continue
+
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            version = subscription.wait(min(heartbeat, remaining))
+            if version is None:
+                yield ': keepalive\n\n'
+            elif version > position[0]:
+                break
+
+        page = read_changes(user_id, position, page_size)
+        db.session.close()
+        if page is None:
+            yield sse_frame('expired', {'error': 'Sync token expired'})
+            return
@@ -0,0 +1,42 @@
+import itertools
+import os
+import tempfile
+import pytest
+
+# Config reads the environment when app is first imported, so point it at a
+# throwaway database and keep background threads out of the test process
+_db_dir = tempfile.mkdtemp(prefix='task_tracker_test_')
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(_db_dir, 'test.db')}"
+os.environ['JOBS_ENABLED'] = 'False'
+os.environ['STREAM_BACKEND'] = 'local'
+os.environ['FLASK_DEBUG'] = 'False'
+# Views that issue more statements than their declared budget fail the test
+os.environ['QUERY_BUDGET_MODE'] = 'raise'
+os.environ.setdefault('LOG_LEVEL', 'WARNING')
+os.environ.setdefault('PASSWORD_HASH_COST', '1024')
+
+from app import app as flask_app
+
+_usernames = itertools.count(1)
+
+@pytest.fixture
+def app():
+    with flask_app.app_context():
+        yield flask_app
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+@pytest.fixture
+def user(client):
+    """A freshly registered user: dict with 'id' and request 'headers'"""
+    name = f'user{os.getpid()}_{next(_usernames)}'
+    response = client.post('/api/auth/register', json={
+        'username': name,
+        'email': f'{name}@example.com',
+        'password': 'password123'
+    })
+    assert response.status_code == 201
+    data = response.get_json()
+    return {'id': data['user']['id'], 'headers': {'Authorization': f"Bearer {data['access_token']}"}}
@@ -0,0 +1,23 @@
+from app import db
+from hashing import HashingBusyError, password_hasher
+from models import User
+
+def busy(*args, **kwargs):
+    raise HashingBusyError()
+
+def test_login_keeps_the_old_hash_when_rehashing_is_busy(app, client, monkeypatch):
+    client.post('/api/auth/register', json={
+        'username': 'rehash_busy', 'email': 'rehash_busy@example.com', 'password': 'password123'
+    })
+    old_hash = User.query.filter_by(username='rehash_busy').one().password_hash
+
+    monkeypatch.setattr(password_hasher, 'needs_rehash', lambda password_hash: True)
+    monkeypatch.setattr(password_hasher, 'hash', busy)
+    response = client.post('/api/auth/login', json={
+        'username_or_email': 'rehash_busy', 'password': 'password123'
+    })
+
+    assert response.status_code == 200
+    assert response.get_json()['access_token']
+    db.session.expire_all()
+    assert User.query.filter_by(username='rehash_busy').one().password_hash == old_hash
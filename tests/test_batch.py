@@ -0,0 +1,30 @@
+import json
+
+def test_batch_delete_rejects_too_many_ids(app, client, user, monkeypatch):
+    monkeypatch.setitem(app.config, 'BATCH_MAX_ITEMS', 3)
+    response = client.delete('/api/tasks/batch', json={'ids': [1, 2, 3, 4]}, headers=user['headers'])
+    assert response.status_code == 413
+    assert response.get_json()['error'] == 'Batch too large'
+
+def test_batch_delete_rejects_large_bodies(app, client, user, monkeypatch):
+    monkeypatch.setitem(app.config, 'BATCH_MAX_BYTES', 64)
+    body = json.dumps({'ids': list(range(1, 100))})
+    response = client.delete('/api/tasks/batch', data=body, content_type='application/json',
+                             headers=user['headers'])
+    assert response.status_code == 413
+    assert response.get_json()['error'] == 'Payload too large'
+
+def test_batch_delete_reports_missing_ids(client, user):
+    created = client.post('/api/tasks/batch', json={'tasks': [{'title': 'a'}, {'title': 'b'}]},
+                          headers=user['headers']).get_json()['tasks']
+    ids = [item['task']['id'] for item in created]
+
+    response = client.delete('/api/tasks/batch', json={'ids': ids + [ids[-1] + 1000]}, headers=user['headers'])
+    assert response.status_code == 207
+    data = response.get_json()
+    assert data['deleted'] == ids
+    assert data['errors'] == [{'id': ids[-1] + 1000, 'error': 'Task not found'}]
+
+def test_batch_delete_requires_ids(client, user):
+    assert client.delete('/api/tasks/batch', json={}, headers=user['headers']).status_code == 400
+    assert client.delete('/api/tasks/batch', json={'ids': ['x']}, headers=user['headers']).status_code == 400
@@ -0,0 +1,57 @@
+import os
+import pytest
+from cache import MemoryCacheBackend, FileCacheBackend, NullCacheBackend, response_cache
+
+@pytest.fixture(params=['memory', 'file'])
+def backend(request, tmp_path):
+    if request.param == 'memory':
+        return MemoryCacheBackend(max_entries=100)
+    return FileCacheBackend(str(tmp_path), max_entries=100)
+
+def test_fill_after_invalidation_is_dropped(backend):
+    generation = backend.generation('1')
+    backend.invalidate('1')
+    backend.set('1', 'tasks', {'body': 'stale'}, 30, generation)
+    assert backend.get('1', 'tasks') is None
+
+    backend.set('1', 'tasks', {'body': 'fresh'}, 30, backend.generation('1'))
+    assert backend.get('1', 'tasks') == {'body': 'fresh'}
+
+def test_invalidation_of_another_user_keeps_the_fill(backend):
+    generation = backend.generation('1')
+    backend.invalidate('2')
+    backend.set('1', 'tasks', {'body': 'kept'}, 30, generation)
+    assert backend.get('1', 'tasks') == {'body': 'kept'}
+
+def test_file_backend_stays_bounded(tmp_path):
+    backend = FileCacheBackend(str(tmp_path), max_entries=20)
+    for index in range(100):
+        backend.set(str(index % 7), f'key{index}', {'index': index}, 30)
+    files = [name for directory in tmp_path.iterdir() if directory.is_dir() for name in os.listdir(directory)]
+    # Each sweep (every max_entries / 10 writes) trims back to max_entries
+    assert len(files) <= 20 + backend.sweep_interval
+    assert backend.stats()['evictions'] >= 100 - len(files)
+    # The latest entries survive
+    assert backend.get(str(99 % 7), 'key99') == {'index': 99}
+
+def test_file_backend_drops_expired_entries(tmp_path):
+    backend = FileCacheBackend(str(tmp_path), max_entries=10)
+    backend.set('1', 'old', {'value': 1}, -1)
+    assert backend.get('1', 'old') is None
+    assert os.listdir(tmp_path / '1') == []
+
+def test_null_backend_records_nothing():
+    backend = NullCacheBackend()
+    backend.set('1', 'tasks', {'body': 'x'}, 30)
+    assert backend.get('1', 'tasks') is None
+    assert set(backend.stats().values()) == {0}
+
+def test_cached_list_is_invalidated_by_a_write(client, user, monkeypatch):
+    monkeypatch.setattr(response_cache, 'backend', MemoryCacheBackend())
+    assert client.get('/api/tasks', headers=user['headers']).headers['X-Cache'] == 'MISS'
+    assert client.get('/api/tasks', headers=user['headers']).headers['X-Cache'] == 'HIT'
+
+    client.post('/api/tasks', json={'title': 'new'}, headers=user['headers'])
+    response = client.get('/api/tasks', headers=user['headers'])
+    assert response.headers['X-Cache'] == 'MISS'
+    assert [task['title'] for task in response.get_json()['tasks']] == ['new']
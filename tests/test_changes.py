@@ -0,0 +1,62 @@
+def create_task(client, user, title):
+    response = client.post('/api/tasks', json={'title': title}, headers=user['headers'])
+    assert response.status_code == 201
+    return response.get_json()['task']
+
+def sync(client, user, token=None):
+    query = {'since': token} if token else {}
+    response = client.get('/api/tasks/changes', query_string=query, headers=user['headers'])
+    assert response.status_code == 200
+    return response.get_json()
+
+def test_changes_lists_updates_and_deletions(client, user):
+    kept = create_task(client, user, 'kept')
+    removed = create_task(client, user, 'removed')
+    token = sync(client, user)['next_token']
+
+    client.put(f"/api/tasks/{kept['id']}", json={'completed': True}, headers=user['headers'])
+    client.delete(f"/api/tasks/{removed['id']}", headers=user['headers'])
+
+    page = sync(client, user, token)
+    assert [task['id'] for task in page['changes']] == [kept['id']]
+    assert page['deleted'] == [removed['id']]
+    assert page['has_more'] is False
+
+def test_reused_id_is_not_reported_deleted(client, user):
+    token = sync(client, user)['next_token']
+    old = create_task(client, user, 'old')
+    client.delete(f"/api/tasks/{old['id']}", headers=user['headers'])
+    new = create_task(client, user, 'new')
+    # SQLite hands the highest deleted rowid out again
+    assert new['id'] == old['id']
+
+    page = sync(client, user, token)
+    assert [(task['id'], task['title']) for task in page['changes']] == [(new['id'], 'new')]
+    assert page['deleted'] == []
+
+def test_reused_id_after_client_saw_the_old_task(client, user):
+    old = create_task(client, user, 'old')
+    token = sync(client, user)['next_token']
+    client.delete(f"/api/tasks/{old['id']}", headers=user['headers'])
+    new = create_task(client, user, 'new')
+
+    page = sync(client, user, token)
+    assert [(task['id'], task['title']) for task in page['changes']] == [(new['id'], 'new')]
+    assert page['deleted'] == []
+
+def test_deletion_without_reuse_is_kept_across_pages(client, user):
+    first = create_task(client, user, 'first')
+    second = create_task(client, user, 'second')
+    token = sync(client, user)['next_token']
+    client.delete(f"/api/tasks/{first['id']}", headers=user['headers'])
+    client.put(f"/api/tasks/{second['id']}", json={'title': 'renamed'}, headers=user['headers'])
+
+    response = client.get('/api/tasks/changes', query_string={'since': token, 'per_page': 1}, headers=user['headers'])
+    page = response.get_json()
+    assert page['deleted'] == [first['id']] and page['changes'] == [] and page['has_more']
+    page = sync(client, user, page['next_token'])
+    assert [task['title'] for task in page['changes']] == ['renamed']
+
+def test_invalid_token(client, user):
+    assert client.get('/api/tasks/changes', query_string={'since': 'not-a-token'},
+                      headers=user['headers']).status_code == 400
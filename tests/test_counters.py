@@ -0,0 +1,74 @@
+import json
+from datetime import datetime, timedelta
+from tasks.counters import reconcile_counters, sweep_overdue
+
+YESTERDAY = (datetime.utcnow() - timedelta(days=1)).strftime('%Y-%m-%d')
+TOMORROW = (datetime.utcnow() + timedelta(days=1)).strftime('%Y-%m-%d')
+
+def assert_reconciled(client, user):
+    """Stored counters match the tasks table, and stats agree with a full aggregate"""
+    assert reconcile_counters(user_id=user['id'], fix=False) == []
+    counted = client.get('/api/tasks/stats', headers=user['headers']).get_json()['stats']
+    aggregated = client.get('/api/tasks/stats?breakdown=due_week', headers=user['headers']).get_json()['stats']
+    for field in ('total_tasks', 'completed_tasks', 'pending_tasks', 'overdue_tasks'):
+        assert counted[field] == aggregated[field], field
+    return counted
+
+def create_batch(client, user, tasks):
+    response = client.post('/api/tasks/batch', json={'tasks': tasks}, headers=user['headers'])
+    assert response.status_code == 201
+    return [item['task']['id'] for item in response.get_json()['tasks']]
+
+def test_counters_after_batch_writes(client, user):
+    ids = create_batch(client, user, [
+        {'title': 'late', 'due_date': YESTERDAY},
+        {'title': 'soon', 'due_date': TOMORROW},
+        {'title': 'done', 'completed': True},
+        {'title': 'plain'},
+    ])
+    stats = assert_reconciled(client, user)
+    assert (stats['total_tasks'], stats['completed_tasks'], stats['overdue_tasks']) == (4, 1, 1)
+
+    response = client.patch('/api/tasks/batch', json={'tasks': [
+        {'id': ids[0], 'completed': True},
+        {'id': ids[1], 'due_date': YESTERDAY},
+        {'id': ids[2], 'completed': False},
+    ]}, headers=user['headers'])
+    assert response.status_code == 200
+    stats = assert_reconciled(client, user)
+    assert (stats['completed_tasks'], stats['overdue_tasks']) == (1, 1)
+
+    response = client.delete('/api/tasks/batch', json={'ids': ids[:2]}, headers=user['headers'])
+    assert response.status_code == 200
+    stats = assert_reconciled(client, user)
+    assert (stats['total_tasks'], stats['completed_tasks'], stats['overdue_tasks']) == (2, 0, 0)
+
+def test_counters_after_import(client, user):
+    records = [
+        {'title': 'imported late', 'due_date': YESTERDAY},
+        {'title': 'imported done', 'completed': True, 'due_date': YESTERDAY},
+        {'title': ''},  # rejected
+        {'title': 'imported plain'},
+    ]
+    body = '\n'.join(json.dumps(record) for record in records)
+    response = client.post('/api/tasks/import?format=ndjson', data=body,
+                           content_type='application/x-ndjson', headers=user['headers'])
+    assert response.status_code == 200
+    summary = response.get_json()
+    assert (summary['inserted'], summary['rejected']) == (3, 1)
+    stats = assert_reconciled(client, user)
+    assert (stats['total_tasks'], stats['completed_tasks'], stats['overdue_tasks']) == (3, 1, 1)
+
+def test_counters_after_single_deletes_and_sweep(client, user):
+    ids = create_batch(client, user, [{'title': 'late', 'due_date': YESTERDAY}, {'title': 'other'}])
+    sweep_overdue()
+    assert assert_reconciled(client, user)['overdue_tasks'] == 1
+
+    # Writes after the sweep adjust the materialized overdue count
+    assert client.delete(f'/api/tasks/{ids[0]}', headers=user['headers']).status_code == 200
+    stats = assert_reconciled(client, user)
+    assert (stats['total_tasks'], stats['overdue_tasks']) == (1, 0)
+
+    assert client.delete(f'/api/tasks/{ids[1]}', headers=user['headers']).status_code == 200
+    stats = assert_reconciled(client, user)
+    assert stats['total_tasks'] == 0 and stats['avg_completion_seconds'] is None
@@ -0,0 +1,63 @@
+from datetime import datetime, timedelta
+import pytest
+from werkzeug.datastructures import MultiDict
+import tasks.routes
+
+def days_ahead(days):
+    """datetime class whose utcnow() is days ahead of the real clock"""
+    class Later(datetime):
+        @classmethod
+        def utcnow(cls):
+            return datetime.utcnow() + timedelta(days=days)
+    return Later
+
+def get(client, user, query, etag=None):
+    headers = dict(user['headers'])
+    if etag:
+        headers['If-None-Match'] = etag
+    return client.get('/api/tasks', query_string=query, headers=headers)
+
+@pytest.fixture
+def due_tomorrow(client, user):
+    due = (datetime.utcnow() + timedelta(days=1)).strftime('%Y-%m-%d')
+    response = client.post('/api/tasks', json={'title': 'due tomorrow', 'due_date': due}, headers=user['headers'])
+    assert response.status_code == 201
+    return response.get_json()['task']
+
+def test_unchanged_list_is_not_modified(client, user, due_tomorrow):
+    etag = get(client, user, {}).headers['ETag']
+    assert get(client, user, {}, etag).status_code == 304
+
+    client.put(f"/api/tasks/{due_tomorrow['id']}", json={'title': 'renamed'}, headers=user['headers'])
+    assert get(client, user, {}, etag).status_code == 200
+
+def test_overdue_list_changes_with_the_date(client, user, due_tomorrow, monkeypatch):
+    today = get(client, user, {'overdue': 'true'})
+    assert today.get_json()['tasks'] == []
+    etag = today.headers['ETag']
+    assert get(client, user, {'overdue': 'true'}, etag).status_code == 304
+
+    # Two days on, the task is overdue though nothing was written
+    monkeypatch.setattr(tasks.routes, 'datetime', days_ahead(2))
+    later = get(client, user, {'overdue': 'true'}, etag)
+    assert later.status_code == 200
+    assert [task['id'] for task in later.get_json()['tasks']] == [due_tomorrow['id']]
+
+def test_plain_list_etag_survives_the_date_change(client, user, due_tomorrow, monkeypatch):
+    etag = get(client, user, {}).headers['ETag']
+    monkeypatch.setattr(tasks.routes, 'datetime', days_ahead(1))
+    assert get(client, user, {}, etag).status_code == 304
+
+def test_stats_etag_changes_with_the_date(client, user, due_tomorrow, monkeypatch):
+    etag = client.get('/api/tasks/stats', headers=user['headers']).headers['ETag']
+    monkeypatch.setattr(tasks.routes, 'datetime', days_ahead(1))
+    response = client.get('/api/tasks/stats', headers={**user['headers'], 'If-None-Match': etag})
+    assert response.status_code == 200
+
+def test_asgi_fast_path_uses_the_view_etag(client, user, due_tomorrow):
+    asgi = pytest.importorskip('asgi')
+    for query in ({}, {'overdue': 'true'}, {'completed': 'false', 'overdue': 'true'}):
+        response = get(client, user, query)
+        version = tasks.routes.get_counters(user['id'])['version']
+        etag = asgi.CONDITIONAL_PATHS['/api/tasks'](user['id'], version, MultiDict(query))
+        assert response.headers['ETag'] == f'"{etag}"'
@@ -0,0 +1,125 @@
+import importlib.util
+import os
+import uuid
+from datetime import datetime, timedelta
+import pytest
+from app import db
+from jobs import JobScheduler, job_scheduler
+from models import Job
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+@pytest.fixture
+def scheduler(monkeypatch):
+    """The app's scheduler, enabled, with a polling loop that returns at once"""
+    served = []
+    monkeypatch.setattr(job_scheduler, 'enabled', True)
+    monkeypatch.setattr(job_scheduler, 'serve', lambda: served.append(os.getpid()))
+    monkeypatch.setattr(job_scheduler, '_thread_pid', None)
+    monkeypatch.setattr(job_scheduler, '_thread', None)
+    yield served
+    if job_scheduler._thread is not None:
+        job_scheduler._thread.join(5)
+
+def test_requests_do_not_start_jobs(client, user, scheduler):
+    client.get('/api/tasks', headers=user['headers'])
+    assert job_scheduler._thread_pid is None
+
+def test_gunicorn_worker_starts_jobs(scheduler):
+    spec = importlib.util.spec_from_file_location('gunicorn_conf', os.path.join(ROOT, 'gunicorn.conf.py'))
+    gunicorn_conf = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(gunicorn_conf)
+
+    class Worker:
+        pid = os.getpid()
+        log = type('Log', (), {'info': staticmethod(lambda message: None)})()
+
+    gunicorn_conf.post_worker_init(Worker())
+    job_scheduler._thread.join(5)
+    assert scheduler == [os.getpid()]
+
+def test_disabled_jobs_are_not_started(scheduler, monkeypatch):
+    monkeypatch.setattr(job_scheduler, 'enabled', False)
+    job_scheduler.ensure_started()
+    assert job_scheduler._thread_pid is None and scheduler == []
+
+@pytest.fixture
+def jobs(app):
+    """A scheduler of its own (app's jobs untouched) with a fresh job name per test"""
+    scheduler = JobScheduler()
+    name = f'test_job_{uuid.uuid4().hex[:8]}'
+    outcomes = []
+
+    @scheduler.job(name, timedelta(days=1), run_on_create=True, lease=timedelta(minutes=5))
+    def job():
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    scheduler.ensure_jobs()
+    return scheduler, scheduler.jobs[name], outcomes
+
+def job_row(name):
+    db.session.expire_all()
+    return db.session.get(Job, name)
+
+def histogram_count(scheduler, name, status):
+    for line in scheduler.durations.expose():
+        if line.startswith('job_duration_seconds_count') and f'job="{name}"' in line and f'status="{status}"' in line:
+            return int(float(line.rsplit(' ', 1)[1]))
+    return 0
+
+def test_a_claimed_job_cannot_be_claimed_again(jobs):
+    scheduler, job, outcomes = jobs
+    now = datetime.utcnow()
+    assert scheduler.claim(job, now)
+    assert not scheduler.claim(job, now)
+    assert not scheduler.claim(job, now + timedelta(minutes=4), due_only=False)
+    # The lease of a holder that died expires
+    assert scheduler.claim(job, now + timedelta(minutes=6), due_only=False)
+
+def test_successful_run_releases_the_lease(jobs):
+    scheduler, job, outcomes = jobs
+    outcomes.append('done')
+    assert scheduler.claim(job)
+    assert scheduler.run(job)
+
+    row = job_row(job.name)
+    assert (row.locked_by, row.locked_until, row.last_status, row.attempts) == (None, None, 'ok', 0)
+    assert row.next_run_at == job.next_run_after(row.last_finished_at)
+    assert histogram_count(scheduler, job.name, 'ok') == 1
+
+def test_failures_back_off_then_give_up_until_the_next_run(jobs):
+    scheduler, job, outcomes = jobs
+    outcomes.extend(RuntimeError(f'failure {n}') for n in range(scheduler.max_retries + 1))
+
+    delays = []
+    for attempt in range(1, scheduler.max_retries + 1):
+        assert scheduler.claim(job, due_only=False)
+        assert not scheduler.run(job)
+        row = job_row(job.name)
+        assert (row.attempts, row.last_status, row.locked_by) == (attempt, 'retrying', None)
+        assert row.last_error == f'failure {attempt - 1}'
+        delay = (row.next_run_at - row.last_finished_at).total_seconds()
+        # retry_seconds * 2 ** (attempt - 1), with +/- 20% jitter
+        expected = scheduler.retry_seconds * 2 ** (attempt - 1)
+        assert 0.8 * expected <= delay <= 1.2 * expected
+        delays.append(delay)
+    assert delays == sorted(delays)
+
+    assert scheduler.claim(job, due_only=False)
+    assert not scheduler.run(job)
+    row = job_row(job.name)
+    assert (row.attempts, row.last_status) == (0, 'failed')
+    assert row.next_run_at == job.next_run_after(row.last_finished_at)
+    assert histogram_count(scheduler, job.name, 'failed') == scheduler.max_retries + 1
+
+def test_success_after_a_failure_resets_attempts(jobs):
+    scheduler, job, outcomes = jobs
+    outcomes.extend([RuntimeError('flaky'), 'recovered'])
+    for _ in range(2):
+        assert scheduler.claim(job, due_only=False)
+        scheduler.run(job)
+    row = job_row(job.name)
+    assert (row.attempts, row.last_status, row.last_error) == (0, 'ok', None)
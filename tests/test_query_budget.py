@@ -0,0 +1,19 @@
+import pytest
+from sqlalchemy import text
+from app import db
+from query_guard import query_guard, QueryBudgetExceeded
+
+def test_budgets_are_enforced_in_tests():
+    assert query_guard.mode == 'raise'
+
+def test_view_over_budget_fails(app):
+    @query_guard.budget(1)
+    def chatty_view():
+        db.session.execute(text('SELECT 1'))
+        db.session.execute(text('SELECT 2'))
+        return 'ok'
+
+    with app.test_request_context('/chatty'):
+        with pytest.raises(QueryBudgetExceeded):
+            chatty_view()
+    query_guard.budgets.pop('chatty_view')
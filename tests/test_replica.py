@@ -0,0 +1,95 @@
+import json
+import os
+import sqlite3
+import subprocess
+import sys
+import textwrap
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Config reads REPLICA_DATABASE_URL when app is imported, so the scenario
+# runs in its own interpreter with a primary and a replica SQLite file. The
+# replica is a snapshot of the primary taken before the last task was added,
+# which tells the two apart.
+SCENARIO = textwrap.dedent('''
+    import json, sqlite3, sys, time
+    from sqlalchemy import select, update
+    from app import app, db
+    from database import replica_router
+    from models import Task
+
+    primary_path, replica_path = sys.argv[1:3]
+    client = app.test_client()
+    data = client.post('/api/auth/register', json={
+        'username': 'replica', 'email': 'replica@example.com', 'password': 'password123'
+    }).get_json()
+    headers = {'Authorization': f"Bearer {data['access_token']}"}
+    old = client.post('/api/tasks', json={'title': 'old'}, headers=headers).get_json()['task']
+
+    with sqlite3.connect(primary_path) as source, sqlite3.connect(replica_path) as target:
+        source.backup(target)
+
+    new = client.post('/api/tasks', json={'title': 'new'}, headers=headers).get_json()['task']
+
+    def observe():
+        tasks = client.get('/api/tasks', headers=headers).get_json()['tasks']
+        stats = client.get('/api/tasks/stats', headers=headers).get_json()['stats']
+        return {
+            'titles': sorted(task['title'] for task in tasks),
+            'total': stats['total_tasks'],
+            'get_new': client.get(f"/api/tasks/{new['id']}", headers=headers).status_code,
+        }
+
+    result = {'sticky': observe()}
+    time.sleep(replica_router.sticky_seconds + 0.5)
+    result['expired'] = observe()
+
+    # A write after the window still goes to the primary and starts a new one
+    client.put(f"/api/tasks/{old['id']}", json={'title': 'renamed'}, headers=headers)
+    result['after_write'] = observe()
+
+    # Flushes and DML of a session routed to the replica use the primary
+    with app.app_context():
+        db.session.info['read_replica'] = True
+        db.session.add(Task(title='flushed', user_id=data['user']['id']))
+        db.session.flush()
+        db.session.execute(update(Task).where(Task.id == old['id']).values(title='dml'))
+        result['replica_select'] = sorted(db.session.scalars(select(Task.title)))
+        db.session.commit()
+        db.session.info.pop('read_replica', None)
+
+    print(json.dumps(result))
+''')
+
+def titles(path):
+    with sqlite3.connect(path) as connection:
+        return sorted(row[0] for row in connection.execute('SELECT title FROM tasks'))
+
+def test_reads_follow_the_sticky_window_and_writes_stay_on_the_primary(tmp_path):
+    primary, replica = tmp_path / 'primary.db', tmp_path / 'replica.db'
+    env = {
+        **os.environ,
+        'DATABASE_URL': f'sqlite:///{primary}',
+        'REPLICA_DATABASE_URL': f'sqlite:///{replica}',
+        'REPLICA_STICKY_SECONDS': '1',
+        'JOBS_ENABLED': 'False',
+        'STREAM_BACKEND': 'local',
+        'FLASK_DEBUG': 'False',
+        'QUERY_BUDGET_MODE': 'raise',
+        'LOG_LEVEL': 'WARNING',
+        'PASSWORD_HASH_COST': '1024',
+    }
+    completed = subprocess.run([sys.executable, '-c', SCENARIO, str(primary), str(replica)],
+                               cwd=ROOT, env=env, capture_output=True, text=True, timeout=60)
+    assert completed.returncode == 0, completed.stderr
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+
+    # The user just wrote: list, stats and detail come from the primary
+    assert result['sticky'] == {'titles': ['new', 'old'], 'total': 2, 'get_new': 200}
+    # Once the window has passed they come from the replica snapshot
+    assert result['expired'] == {'titles': ['old'], 'total': 1, 'get_new': 404}
+    assert result['after_write'] == {'titles': ['new', 'renamed'], 'total': 2, 'get_new': 200}
+
+    assert result['replica_select'] == ['old']
+    assert titles(primary) == ['dml', 'flushed', 'new']
+    assert titles(replica) == ['old']
@@ -0,0 +1,56 @@
+import pytest
+
+def test_search_pages_by_offset(client, user):
+    for index in range(5):
+        client.post('/api/tasks', json={'title': f'quarterly report {index}'}, headers=user['headers'])
+    client.post('/api/tasks', json={'title': 'unrelated'}, headers=user['headers'])
+
+    seen = []
+    page = 1
+    while True:
+        response = client.get('/api/tasks', query_string={'q': 'quarter', 'per_page': 2, 'page': page},
+                              headers=user['headers'])
+        assert response.status_code == 200
+        data = response.get_json()
+        seen += [task['title'] for task in data['tasks']]
+        if not data['pagination']['has_next']:
+            break
+        page += 1
+
+    assert sorted(seen) == [f'quarterly report {index}' for index in range(5)]
+
+def test_search_rejects_cursor(client, user):
+    response = client.get('/api/tasks', query_string={'q': 'report', 'cursor': ''}, headers=user['headers'])
+    assert response.status_code == 400
+
+def test_recreated_tasks_table_gets_its_triggers_back(app, tmp_path):
+    from sqlalchemy import create_engine, text
+    from models import Task
+    from tasks.search import ensure_search_index, search_backend
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'search.db'}")
+    if search_backend(engine) != 'fts5':
+        pytest.skip('SQLite build without FTS5')
+    metadata = Task.metadata
+    metadata.create_all(engine)
+    assert ensure_search_index(engine)
+    assert not ensure_search_index(engine)
+
+    # drop_all/create_all drops the triggers with tasks but keeps tasks_fts
+    metadata.drop_all(engine)
+    metadata.create_all(engine)
+    with engine.begin() as connection:
+        connection.execute(text("INSERT INTO users (id, username, email, password_hash, created_at) "
+                                "VALUES (1, 'searcher', 's@example.com', 'x', CURRENT_TIMESTAMP)"))
+        connection.execute(text("INSERT INTO tasks (id, user_id, title, description, completed, created_at, updated_at) "
+                                "VALUES (1, 1, 'before restart', '', 0, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)"))
+
+    assert ensure_search_index(engine)
+    with engine.begin() as connection:
+        triggers = {row[0] for row in connection.execute(text("SELECT name FROM sqlite_master WHERE type = 'trigger'"))}
+        assert triggers >= {'tasks_fts_insert', 'tasks_fts_update', 'tasks_fts_delete'}
+        # Rows written before the triggers came back are indexed by the rebuild
+        assert connection.execute(text("SELECT rowid FROM tasks_fts WHERE tasks_fts MATCH 'restart'")).all() == [(1,)]
+        connection.execute(text("UPDATE tasks SET title = 'renamed' WHERE id = 1"))
+        assert connection.execute(text("SELECT rowid FROM tasks_fts WHERE tasks_fts MATCH 'renamed'")).all() == [(1,)]
+    engine.dispose()
@@ -0,0 +1,27 @@
+import math
+from tasks.stats import stats_from_counters
+
+def counters(**values):
+    return {'total': 2, 'completed': 2, 'completion_seconds': 0.0, 'overdue': 0, **values}
+
+def test_drifted_zero_is_not_negative():
+    seconds = stats_from_counters(counters(completion_seconds=-1e-9))['avg_completion_seconds']
+    assert seconds == 0.0 and math.copysign(1, seconds) == 1
+
+def test_average_is_rounded():
+    assert stats_from_counters(counters(completion_seconds=10.0 / 3))['avg_completion_seconds'] == 1.67
+
+def test_no_completed_tasks():
+    assert stats_from_counters(counters(completed=0))['avg_completion_seconds'] is None
+
+def test_stats_paths_agree(client, user):
+    for title in ('a', 'b', 'c'):
+        task = client.post('/api/tasks', json={'title': title}, headers=user['headers']).get_json()['task']
+        client.put(f"/api/tasks/{task['id']}", json={'completed': True}, headers=user['headers'])
+
+    counted = client.get('/api/tasks/stats', headers=user['headers']).get_json()['stats']
+    aggregated = client.get('/api/tasks/stats?breakdown=due_week', headers=user['headers']).get_json()['stats']
+    assert counted['completed_tasks'] == aggregated['completed_tasks'] == 3
+    assert counted['avg_completion_seconds'] >= 0.0
+    # SQLite computes the aggregate from julianday(), which keeps about a millisecond
+    assert abs(counted['avg_completion_seconds'] - aggregated['avg_completion_seconds']) <= 0.05
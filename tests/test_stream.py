@@ -0,0 +1,23 @@
+from pubsub import pubsub
+
+def test_default_limit_does_not_depend_on_threads(app):
+    assert app.config['STREAM_MAX_CONNECTIONS'] == 100
+    assert pubsub.max_connections == 100
+
+def test_stream_replays_changes_then_closes(app, client, user, monkeypatch):
+    monkeypatch.setitem(app.config, 'STREAM_MAX_SECONDS', 0)
+    token = client.get('/api/tasks/changes', headers=user['headers']).get_json()['next_token']
+    client.post('/api/tasks', json={'title': 'streamed'}, headers=user['headers'])
+
+    response = client.get('/api/tasks/stream', query_string={'since': token}, headers=user['headers'])
+    assert response.status_code == 200
+    body = response.get_data(as_text=True)
+    assert 'event: task' in body and '"streamed"' in body
+    response.close()
+    assert pubsub.subscribed_users() == []
+
+def test_streams_beyond_the_limit_get_503(client, user, monkeypatch):
+    monkeypatch.setattr(pubsub, 'max_connections', 0)
+    response = client.get('/api/tasks/stream', headers=user['headers'])
+    assert response.status_code == 503
+    assert response.headers['Retry-After']
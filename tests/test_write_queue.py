@@ -0,0 +1,35 @@
+import threading
+import time
+import pytest
+from write_queue import write_queue
+
+@pytest.fixture
+def busy_writer(app):
+    """Hold the writer thread until the returned event is set"""
+    if not write_queue.enabled:
+        pytest.skip('write queue is disabled for this database')
+    release = threading.Event()
+    started = threading.Event()
+
+    def block():
+        started.set()
+        release.wait(5)
+
+    thread = threading.Thread(target=write_queue.run, args=(block,))
+    thread.start()
+    started.wait(5)
+    yield release
+    release.set()
+    thread.join(5)
+
+def test_queued_write_times_out_with_503(client, user, busy_writer, monkeypatch):
+    monkeypatch.setattr(write_queue, 'timeout', 0.05)
+    response = client.post('/api/tasks', json={'title': 'queued'}, headers=user['headers'])
+    assert response.status_code == 503
+    assert response.headers['Retry-After']
+
+    # The dropped write is not applied once the writer frees up
+    busy_writer.set()
+    time.sleep(0.1)
+    tasks = client.get('/api/tasks', headers=user['headers']).get_json()['tasks']
+    assert [task['title'] for task in tasks] == []
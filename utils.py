@@ -1,6 +1,10 @@
 from datetime import datetime
+import base64
+import binascii
 import logging
 
+logger = logging.getLogger(__name__)
+
 def parse_date(date_string):
     """
     Parse date string in YYYY-MM-DD format to date object
@@ -14,7 +18,7 @@ def parse_date(date_string):
     try:
         return datetime.strptime(date_string, '%Y-%m-%d').date()
     except (ValueError, TypeError) as e:
-        logging.error(f"Date parsing error: {str(e)}")
+        logger.error("Date parsing error: %s", e)
         return None
 
 def format_date(date_obj):
@@ -32,7 +36,7 @@ def format_date(date_obj):
             return date_obj.strftime('%Y-%m-%d')
         return None
     except (ValueError, TypeError, AttributeError) as e:
-        logging.error(f"Date formatting error: {str(e)}")
+        logger.error("Date formatting error: %s", e)
         return None
 
 def validate_pagination_params(page, per_page, max_per_page=100):
@@ -74,3 +78,73 @@ def sanitize_string(input_string, max_length=None):
         sanitized = sanitized[:max_length]
     
     return sanitized
+
+def encode_cursor(created_at, task_id):
+    """
+    Encode a keyset position into an opaque pagination cursor
+    
+    Args:
+        created_at (datetime.datetime): Creation timestamp of the last row returned
+        task_id (int): ID of the last row returned
+    
+    Returns:
+        str: URL-safe cursor token
+    """
+    raw = f"{created_at.isoformat()}|{task_id}".encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def decode_cursor(token):
+    """
+    Decode a pagination cursor produced by encode_cursor
+    
+    Args:
+        token (str): Cursor token from a previous response
+    
+    Returns:
+        tuple or None: (created_at, task_id) or None if the token is invalid
+    """
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode('ascii')).decode('utf-8')
+        created_at, task_id = raw.split('|', 1)
+        return datetime.fromisoformat(created_at), int(task_id)
+    except (ValueError, TypeError, UnicodeError, binascii.Error) as e:
+        logger.error("Cursor decoding error: %s", e)
+        return None
+
+def encode_sync_token(version, task_id=None):
+    """
+    Encode a delta sync position into an opaque token
+    
+    Args:
+        version (int): Change version the client has caught up to
+        task_id (int): Last task returned within that version, if the
+            version was only partly delivered
+    
+    Returns:
+        str: URL-safe sync token
+    """
+    raw = f"{version}" if task_id is None else f"{version}|{task_id}"
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+def decode_sync_token(token):
+    """
+    Decode a sync token produced by encode_sync_token
+    
+    Args:
+        token (str): Token from a previous response
+    
+    Returns:
+        tuple or None: (version, task_id or None) or None if the token is invalid
+    """
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode('ascii')).decode('utf-8')
+        version, _, task_id = raw.partition('|')
+        version = int(version)
+        if version < 0:
+            raise ValueError(f"negative version {version}")
+        return version, int(task_id) if task_id else None
+    except (ValueError, TypeError, UnicodeError, binascii.Error) as e:
+        logger.error("Sync token decoding error: %s", e)
+        return None
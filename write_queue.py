@@ -0,0 +1,146 @@
+import os
+import queue
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from app import db
+from database import is_sqlite_file
+import logging
+
+logger = logging.getLogger(__name__)
+
+class WriteQueueBusyError(Exception):
+    """Raised when a queued write did not start within SQLITE_WRITE_QUEUE_TIMEOUT"""
+
+class WriteQueue:
+    """
+    Single writer thread per process that coalesces commits
+
+    With SQLite only one connection can write at a time, so request threads
+    racing for the lock mostly wait on each other's fsync. Writes submitted
+    through run() are executed by one thread instead; whatever queued up while
+    the previous commit was in flight (up to SQLITE_WRITE_QUEUE_BATCH writes)
+    runs in a single BEGIN IMMEDIATE transaction, each write in its own
+    savepoint so a failing write does not take the others down.
+
+    When disabled (any other database, or SQLITE_WRITE_QUEUE off) run() calls
+    the function in the request's session and commits it.
+
+    Only single-task creates, updates and deletes are queued. Batch, import
+    and auth writes commit in the request's own session and compete for the
+    SQLite lock through busy_timeout instead.
+    """
+
+    def __init__(self, app=None):
+        self.enabled = False
+        self.max_batch = 64
+        self.timeout = 10.0
+        self._app = None
+        self._queue = None
+        self._thread = None
+        self._thread_pid = None
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self._app = app
+        self.max_batch = app.config.get('SQLITE_WRITE_QUEUE_BATCH', self.max_batch)
+        self.timeout = app.config.get('SQLITE_WRITE_QUEUE_TIMEOUT', self.timeout)
+        with app.app_context():
+            sqlite_file = is_sqlite_file(db.engine.url)
+        # Savepoints inside the shared transaction need the tuned SQLite engine
+        self.enabled = (sqlite_file
+                        and app.config.get('SQLITE_TUNING', True)
+                        and app.config.get('SQLITE_WRITE_QUEUE', True))
+        app.extensions['write_queue'] = self
+
+    def _get_queue(self):
+        # Threads do not survive fork, so each (gunicorn) worker process starts its own writer
+        with self._lock:
+            if self._thread is None or self._thread_pid != os.getpid():
+                self._queue = queue.SimpleQueue()
+                self._thread = threading.Thread(target=self._writer, args=(self._queue,),
+                                                name='write-queue', daemon=True)
+                self._thread_pid = os.getpid()
+                self._thread.start()
+            return self._queue
+
+    def run(self, fn, *args):
+        """
+        Run a write function and commit it
+
+        The function runs in a session of its own when queued, so it must
+        take plain values and return plain data (e.g. to_dict() output
+        built before commit), not ORM instances.
+
+        Args:
+            fn (callable): Function doing the writes through db.session
+            *args: Arguments passed to fn
+
+        Returns:
+            Whatever fn returned, once its transaction is committed
+
+        Raises:
+            WriteQueueBusyError: The write was still waiting in the queue
+                after SQLITE_WRITE_QUEUE_TIMEOUT seconds; it was dropped
+                and will not be applied
+        """
+        if not self.enabled:
+            result = fn(*args)
+            db.session.commit()
+            return result
+
+        future = Future()
+        self._get_queue().put((future, fn, args))
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            # A write the writer already started is in a commit bounded by
+            # busy_timeout, so wait for its outcome rather than misreport it
+            if not future.cancel():
+                return future.result()
+            raise WriteQueueBusyError('Write queue timed out')
+
+    def _writer(self, pending):
+        with self._app.app_context():
+            while True:
+                batch = [pending.get()]
+                while len(batch) < self.max_batch:
+                    try:
+                        batch.append(pending.get_nowait())
+                    except queue.Empty:
+                        break
+                self._commit_batch(batch)
+
+    def _commit_batch(self, batch):
+        # Drop writes whose request gave up waiting; the rest can no longer be cancelled
+        batch = [item for item in batch if item[0].set_running_or_notify_cancel()]
+        if not batch:
+            return
+        session = db.session
+        outcomes = []
+        try:
+            session.connection(execution_options={'sqlite_begin': 'IMMEDIATE'})
+            for future, fn, args in batch:
+                try:
+                    with session.begin_nested():
+                        outcomes.append((future, fn(*args), None))
+                except Exception as e:
+                    outcomes.append((future, None, e))
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            logger.error("Write queue commit of %s writes failed: %s", len(batch), e)
+            for future, fn, args in batch:
+                future.set_exception(e)
+            return
+        finally:
+            db.session.remove()
+
+        for future, result, error in outcomes:
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+write_queue = WriteQueue()